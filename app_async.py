@@ -0,0 +1,372 @@
+# 📌 app_async.py - asyncio serving mode: ASGI app with the async LINE client & an aiomysql pool
+#
+# Run: uvicorn app_async:app --host 0.0.0.0 --port 8080
+#
+# Same routes and handle_message behaviour as app_v0_0_7.py, but a webhook never ties up
+# a thread: replies run as tasks on one event loop, and LINE / MySQL calls are awaited.
+# Request-time reads (snapshot rows, watchlists, follows) use aiomysql. The in-memory
+# series store & registry are refreshed by background tasks on the sync pool, which also
+# serves the rare live-query fallback in a worker thread.
+import asyncio
+import logging
+import os
+
+import aiohttp
+import aiomysql
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse, Response
+from starlette.routing import Mount, Route
+from starlette.staticfiles import StaticFiles
+from linebot import AsyncLineBotApi, LineBotApi, WebhookParser
+from linebot.aiohttp_async_http_client import AiohttpAsyncHttpClient
+from linebot.exceptions import InvalidSignatureError, LineBotApiError
+from linebot.models import MessageEvent, TextMessage, TextSendMessage, FollowEvent, UnfollowEvent
+
+from credentials import DB_CONFIG, LINE_ACCESS_TOKEN, LINE_SECRET
+import charts
+import db_pool
+import indicator_handler
+import indicator_registry
+import metrics
+import query_language
+import reply_cache
+import series_store
+import snapshots
+import startup
+import watchlist
+from work_queue import WEBHOOK_QUEUE_SIZE
+
+LINE_API_ENDPOINT = os.environ.get("LINE_API_ENDPOINT", LineBotApi.DEFAULT_API_ENDPOINT)
+STORE_REFRESH_CHECK = 1.0  # Seconds between data-version checks by the background refresher
+
+parser = WebhookParser(LINE_SECRET)
+
+# 🔹 Created in `lifespan()` (they need the running event loop)
+line_bot_api = None
+pool = None
+_in_flight = set()  # Webhook tasks still running (bounded by WEBHOOK_QUEUE_SIZE)
+_warm_up = None  # First startup.warm_up() attempt, in a worker thread (failures retry on their own thread)
+
+
+# ✅ aiomysql takes the same settings as mysql.connector under slightly different names
+def aiomysql_config():
+	config = dict(DB_CONFIG)
+	if "database" in config:
+		config["db"] = config.pop("database")
+	if "passwd" in config:
+		config["password"] = config.pop("passwd")
+	return {k: v for k, v in config.items() if k in ("host", "port", "user", "password", "db", "charset", "unix_socket")}
+
+
+# ----------------------------------------------------------------------------
+# Routes
+
+async def home(request):
+	return PlainTextResponse("LINE Bot is running!")
+
+
+async def ready(request):
+	status = startup.status()
+	status["ready"] = status["ready"] and pool is not None
+	return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
+async def stats(request):
+	return JSONResponse({
+		"db_pool": db_pool.pool_stats(),
+		"async_db_pool": {"size": pool.size, "free": pool.freesize, "max": pool.maxsize} if pool else None,
+		"reply_cache": await cache_call(reply_cache.reply_cache.stats),
+		"series_store": series_store.series_store.stats(),
+		"in_flight": len(_in_flight),
+	})
+
+
+async def metrics_endpoint(request):
+	return Response(await cache_call(metrics.render), media_type="text/plain; version=0.0.4")  # Gauges read the cache
+
+
+async def callback(request):
+	signature = request.headers.get("X-Line-Signature")
+	body = (await request.body()).decode("utf-8")
+
+	if metrics.LOG_WEBHOOK_BODIES:
+		metrics.log_event("webhook_body", level=logging.DEBUG, sample=False, body=body)
+
+	if not signature:
+		metrics.inc("webhook_requests_total", outcome="missing_signature")
+		metrics.log_event("webhook_missing_signature", level=logging.WARNING)
+		return PlainTextResponse("Bad Request", status_code=400)
+
+	try:
+		with metrics.timer("webhook_signature_seconds"):
+			events = parser.parse(body, signature)  # ✅ Verify the signature before scheduling anything
+	except InvalidSignatureError:
+		metrics.inc("webhook_requests_total", outcome="invalid_signature")
+		metrics.log_event("webhook_invalid_signature", level=logging.WARNING, hint="Check LINE_SECRET")
+		return PlainTextResponse("Bad Request", status_code=400)
+
+	# 🔹 Same backpressure as the sync server: shed load so LINE redelivers instead of timing out
+	if events and len(_in_flight) >= WEBHOOK_QUEUE_SIZE:
+		metrics.inc("webhook_requests_total", outcome="queue_full")
+		metrics.log_event("webhook_queue_full", level=logging.WARNING, depth=len(_in_flight))
+		return PlainTextResponse("Service Unavailable", status_code=503)
+
+	# ✅ Acknowledge LINE right away; the events are handled by a task on the event loop
+	if events:
+		task = asyncio.create_task(process_events(events))
+		_in_flight.add(task)
+		task.add_done_callback(_in_flight.discard)
+
+	metrics.inc("webhook_requests_total", outcome="accepted")
+	metrics.log_event("webhook_accepted", events=len(events), bytes=len(body))
+	return PlainTextResponse("OK")
+
+
+async def process_events(events):
+	if not startup.is_ready() and _warm_up is not None:
+		# 🔹 STARTUP_MODE=background: hold events until the first warm-up attempt ends (bounded)
+		await asyncio.wait({_warm_up}, timeout=startup.STARTUP_READY_TIMEOUT)
+	for event in events:
+		try:
+			if isinstance(event, MessageEvent) and isinstance(event.message, TextMessage):
+				await handle_message(event)
+			elif isinstance(event, (FollowEvent, UnfollowEvent)):
+				await handle_follow(event)
+		except Exception as e:
+			metrics.log_event("work_item_failed", level=logging.ERROR, queue="webhook", error=repr(e))
+
+
+# ✅ Reply-cache calls: inline for the in-process cache, on a worker thread for the shared one
+#    (REPLY_CACHE_URL), whose Redis client blocks for a network round-trip
+async def cache_call(function, *args):
+	if isinstance(reply_cache.reply_cache, reply_cache.SharedReplyCache):
+		return await asyncio.get_running_loop().run_in_executor(None, function, *args)
+	return function(*args)
+
+
+# ✅ Every reply goes through here so LINE API latency & failures are measured
+async def reply(event, messages):
+	try:
+		with metrics.timer("line_api_seconds", call="reply_message"):
+			await line_bot_api.reply_message(event.reply_token, messages)
+	except LineBotApiError as e:
+		metrics.inc("line_api_errors_total", call="reply_message", status=e.status_code)
+		metrics.log_event("line_reply_failed", level=logging.ERROR, status=e.status_code, error=str(e))
+
+
+# ----------------------------------------------------------------------------
+# Message handling (same behaviour as app_v0_0_7.handle_message)
+
+async def handle_message(event):
+	user_message = event.message.text.strip().upper()  # Normalize input to uppercase
+
+	# ✅ Watchlist commands: "WATCH CPI FFR", "UNWATCH CPI", "WATCHLIST"
+	command = watchlist.parse_command(user_message)
+	if command:
+		reply_text = await handle_watch_command(event, *command)
+		await reply(event, TextSendMessage(text=reply_text))
+		return
+
+	# ✅ Chart commands: "CPI 5Y", "UR 18M", "SP500 MAX"
+	chart = charts.parse_command(user_message)
+	if chart and indicator_registry.get_registry().is_reply_key(chart.key):
+		message = await chart_reply(chart)
+		await reply(event, TextSendMessage(text=message) if isinstance(message, str) else message)
+		return
+
+	# ✅ Queries: "CPI PCE", "UR 2020-01..2021-12", "10YY VS FFR" (one batched read, one reply)
+	query = query_language.parse(user_message, indicator_registry.get_registry())
+	if query:
+		await reply(event, await answer_query(query))
+		return
+
+	if indicator_registry.get_registry().is_reply_key(user_message):  # ✅ Kept fresh by _refresh_registry()
+		messages = await get_indicator_info_and_history(user_message)
+		if isinstance(messages, list):
+			await reply(event, messages)  # ✅ Multiple messages (JOLTS)
+		else:
+			await reply(event, TextSendMessage(text=messages))
+	else:
+		reply_text = "I can provide macroeconomic data. Send an abbreviation (e.g., 'FFR') to get details."
+		await reply(event, TextSendMessage(text=reply_text))
+
+
+# 🔹 Renders run in the chart process pool; the event loop only awaits the future
+async def chart_reply(request):
+	message, job = charts.plan(request)
+	if job is not None:
+		try:
+			await asyncio.wait_for(asyncio.wrap_future(charts.submit(job)), charts.CHART_RENDER_TIMEOUT)
+		except Exception:  # Timeout or render error (already logged by charts._finished)
+			return charts.RENDER_FAILED
+	return message
+
+
+# 🔹 Same plan as query_language.answer(); the batched read is awaited on aiomysql
+async def answer_query(query):
+	metrics.inc("query_requests_total", kind=query.kind)
+	plan = await cache_call(query_language.plan, query)
+	if plan.missing:
+		sql, params = query_language.batch_query(query, plan.missing)
+		table = "indicator_snapshots" if query.kind == query_language.MULTI else "indicator_data"
+		try:
+			async with pool.acquire() as conn:
+				async with conn.cursor() as cursor:
+					with metrics.timer("db_query_seconds", query=f"SELECT {table}"):
+						await cursor.execute(sql, params)
+						rows = await cursor.fetchall()
+		except aiomysql.Error as err:
+			metrics.log_event("query_read_error", level=logging.ERROR, keys=",".join(plan.missing), error=str(err))
+			rows = None
+		loop = asyncio.get_running_loop()
+		for key in await cache_call(query_language.add_rows, query, plan, rows):
+			response = await loop.run_in_executor(None, indicator_handler.build_reply, key)
+			await cache_call(query_language.add_live_reply, plan, key, response)
+	return query_language.build_messages(query, plan.found)
+
+
+# ✅ Reply cache → in-memory series store → snapshot row (aiomysql) → live queries (worker thread)
+async def get_indicator_info_and_history(user_input):
+	response, version = await cache_call(indicator_handler.reply_from_memory, user_input)
+	if response is not None:
+		return response
+
+	texts = await read_snapshot(user_input)
+	if texts is not None:
+		metrics.inc("reply_source_total", source="snapshot")
+		response = indicator_handler.messages_from_texts(texts)
+	else:
+		metrics.inc("reply_source_total", source="live")
+		response = await asyncio.get_running_loop().run_in_executor(None, indicator_handler.build_reply, user_input)
+
+	await cache_call(indicator_handler.remember_reply, user_input, response, version)
+	return response
+
+
+async def read_snapshot(reply_key):
+	try:
+		async with pool.acquire() as conn:
+			async with conn.cursor() as cursor:
+				with metrics.timer("db_query_seconds", query="SELECT indicator_snapshots"):
+					await cursor.execute(snapshots.READ_REPLY_QUERY, (reply_key,))
+					row = await cursor.fetchone()
+	except aiomysql.Error as err:
+		metrics.log_event("snapshot_read_error", level=logging.ERROR, reply_key=reply_key, error=str(err))
+		return None
+
+	if not row or row[0] is None:
+		return None
+	return snapshots.decode_reply(row[0])
+
+
+async def handle_watch_command(event, command, keys):
+	user_id = getattr(event.source, "user_id", None)
+	if not user_id:
+		return watchlist.ONE_ON_ONE_ONLY
+
+	keys, unknown, usage = watchlist.check_keys(indicator_registry.get_registry(), command, keys)
+	if usage:
+		return usage
+
+	try:
+		async with pool.acquire() as conn:
+			async with conn.cursor() as cursor:
+				if command != watchlist.LIST_COMMAND:
+					# 🔹 The only multi-statement write: subscriber row & subscriptions commit together
+					await conn.begin()
+					try:
+						await cursor.execute(watchlist.ENSURE_SUBSCRIBER_QUERY, (user_id,))
+						await cursor.executemany(
+							watchlist.UPSERT_SUBSCRIPTION_QUERY,
+							watchlist.subscription_rows(user_id, keys, command == watchlist.WATCH_COMMAND)
+						)
+						await conn.commit()
+					except BaseException:
+						await conn.rollback()
+						raise
+				await cursor.execute(watchlist.LIST_QUERY, (user_id,))
+				current = [row[0] for row in await cursor.fetchall()]
+	except aiomysql.Error as err:
+		metrics.log_event("watchlist_update_failed", level=logging.ERROR, user_id=user_id, error=str(err))
+		return watchlist.UPDATE_FAILED
+
+	return watchlist.format_reply(current, unknown)
+
+
+async def handle_follow(event):
+	user_id = getattr(event.source, "user_id", None)
+	if not user_id:
+		return
+	active = 1 if isinstance(event, FollowEvent) else 0
+	try:
+		async with pool.acquire() as conn:
+			async with conn.cursor() as cursor:
+				await cursor.execute(watchlist.FOLLOW_QUERY, (user_id, active))
+	except aiomysql.Error as err:
+		metrics.log_event("subscriber_update_failed", level=logging.ERROR, user_id=user_id, error=str(err))
+
+
+# ----------------------------------------------------------------------------
+# Startup, background refresh & shutdown
+
+async def _refresh_registry():
+	# 🔹 Check twice per interval so request-time get_registry() never finds it stale (never blocks)
+	loop = asyncio.get_running_loop()
+	while True:
+		await asyncio.sleep(indicator_registry.REGISTRY_CHECK_INTERVAL / 2)
+		await loop.run_in_executor(None, indicator_registry.get_registry)
+
+
+async def _refresh_series_store():
+	loop = asyncio.get_running_loop()
+	while True:
+		await asyncio.sleep(STORE_REFRESH_CHECK)
+		await loop.run_in_executor(None, series_store.series_store.maybe_refresh)
+
+
+async def lifespan(app):
+	global line_bot_api, pool, _warm_up
+	metrics.configure_logging()
+	loop = asyncio.get_running_loop()
+
+	# ✅ Sync pool, registry, series store & warm replies, off the event loop (see startup.py);
+	#    steps the gunicorn master already did are skipped
+	series_store.series_store.auto_refresh = False
+	_warm_up = loop.run_in_executor(None, startup.warm_up_or_retry)
+	if startup.STARTUP_MODE != "background":
+		await _warm_up
+
+	# 🔹 Autocommit: read-only checkouts end no transaction, so release() keeps them pooled
+	#    (aiomysql closes connections returned mid-transaction)
+	pool = await aiomysql.create_pool(minsize=1, maxsize=db_pool.POOL_SIZE, autocommit=True, **aiomysql_config())
+	session = aiohttp.ClientSession()
+	line_bot_api = AsyncLineBotApi(LINE_ACCESS_TOKEN, AiohttpAsyncHttpClient(session), endpoint=LINE_API_ENDPOINT)
+	background = [asyncio.create_task(_refresh_registry()), asyncio.create_task(_refresh_series_store())]
+
+	metrics.register_gauges("db_pool", db_pool.pool_stats)
+	metrics.register_gauges("reply_cache", reply_cache.reply_cache.stats)
+	metrics.register_gauges("series_store", series_store.series_store.stats)
+	try:
+		yield
+	finally:
+		# 🔹 Let in-flight replies finish before closing the clients they use
+		if _in_flight:
+			await asyncio.wait(set(_in_flight), timeout=10)
+		for task in background:
+			task.cancel()
+		await session.close()
+		pool.close()
+		await pool.wait_closed()
+
+
+app = Starlette(
+	routes=[
+		Route("/", home, methods=["GET"]),
+		Route("/ready", ready, methods=["GET"]),
+		Route("/stats", stats, methods=["GET"]),
+		Route("/metrics", metrics_endpoint, methods=["GET"]),
+		Route("/callback", callback, methods=["POST"]),
+		Mount("/charts", StaticFiles(directory=charts.CHART_CACHE_DIR, check_dir=False)),
+	],
+	lifespan=lifespan,
+)
@@ -1,17 +1,31 @@
-import requests
-from flask import Flask, request, abort
-from linebot import LineBotApi, WebhookHandler
-from linebot.exceptions import InvalidSignatureError
-from linebot.models import MessageEvent, TextMessage, TextSendMessage
+import logging
+from flask import Flask, request, abort, jsonify, Response, send_from_directory
+from linebot import LineBotApi, WebhookParser
+from linebot.exceptions import InvalidSignatureError, LineBotApiError
+from linebot.models import MessageEvent, TextMessage, TextSendMessage, FollowEvent, UnfollowEvent
 from indicator_handler import get_indicator_info_and_history
-from credentials import LINE_ACCESS_TOKEN, LINE_SECRET, USER_ID, DB_CONFIG
+from credentials import LINE_ACCESS_TOKEN, LINE_SECRET
+import mysql.connector
+import db_pool
+import reply_cache
+import indicator_registry
+import series_store
+import watchlist
+import charts
+import query_language
+import startup
+import metrics
+from work_queue import WorkQueue
 import os
 
 # Initialize Flask app
 app = Flask(__name__)
 
-line_bot_api = LineBotApi(LINE_ACCESS_TOKEN)
-handler = WebhookHandler(LINE_SECRET)
+# 🔹 LINE_API_ENDPOINT points the bot at a local LINE stand-in for benchmarks
+LINE_API_ENDPOINT = os.environ.get("LINE_API_ENDPOINT", LineBotApi.DEFAULT_API_ENDPOINT)
+
+line_bot_api = LineBotApi(LINE_ACCESS_TOKEN, endpoint=LINE_API_ENDPOINT)
+parser = WebhookParser(LINE_SECRET)
 
 
 # Home Route to Check Server Status
@@ -19,50 +33,180 @@ handler = WebhookHandler(LINE_SECRET)
 def home():
 	return "LINE Bot is running!"
 
+# Readiness: 503 until the startup warm-up (pool, registry, series store, replies) is done
+@app.route("/ready", methods=["GET"])
+def ready():
+	status = startup.status()
+	return jsonify(status), 200 if status["ready"] else 503
+
+# Connection Pool, Reply Cache & Webhook Queue Statistics
+@app.route("/stats", methods=["GET"])
+def stats():
+	return jsonify({
+		"db_pool": db_pool.pool_stats(),
+		"reply_cache": reply_cache.reply_cache.stats(),
+		"webhook_queue": event_queue.stats(),
+		"series_store": series_store.series_store.stats(),
+	})
+
+# Prometheus-style metrics: hot-path timers & counters plus the /stats gauges
+@app.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+	return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+# Chart images (content-addressed file names, so they can be cached for good)
+@app.route("/charts/<path:name>", methods=["GET"])
+def chart_image(name):
+	return send_from_directory(charts.CHART_CACHE_DIR, name, max_age=365 * 24 * 3600)
+
 # Webhook Endpoint for LINE Messages
 @app.route("/callback", methods=["POST"])
 def callback():
 	signature = request.headers.get("X-Line-Signature", None)
 	body = request.get_data(as_text=True)
 
-	print("===== Webhook Request Received =====")
-	print("Signature:", signature)
-	print("Body:", body)
+	# 🔹 Full bodies contain user IDs & message text: only logged when LOG_WEBHOOK_BODIES=1
+	if metrics.LOG_WEBHOOK_BODIES:
+		metrics.log_event("webhook_body", level=logging.DEBUG, sample=False, body=body)
 
 	if not signature:
-		print("❌ ERROR: Missing Signature in Request Headers")
+		metrics.inc("webhook_requests_total", outcome="missing_signature")
+		metrics.log_event("webhook_missing_signature", level=logging.WARNING)
 		abort(400)
 
 	try:
-		handler.handle(body, signature)
+		with metrics.timer("webhook_signature_seconds"):
+			events = parser.parse(body, signature)  # ✅ Verify the signature before queueing anything
 	except InvalidSignatureError:
-		print("❌ ERROR: Invalid Signature - Check LINE_SECRET")
+		metrics.inc("webhook_requests_total", outcome="invalid_signature")
+		metrics.log_event("webhook_invalid_signature", level=logging.WARNING, hint="Check LINE_SECRET")
 		abort(400)
 
+	# ✅ Hand the events to the worker pool & acknowledge LINE right away
+	if events and not event_queue.submit(events):
+		# 🔹 Queue is full: shed load so LINE can redeliver instead of timing out
+		metrics.inc("webhook_requests_total", outcome="queue_full")
+		metrics.log_event("webhook_queue_full", level=logging.WARNING, depth=event_queue.stats().get("depth"))
+		abort(503)
+
+	metrics.inc("webhook_requests_total", outcome="accepted")
+	metrics.log_event("webhook_accepted", events=len(events), bytes=len(body))
 	return "OK"
 
 
+# 🔹 Worker: dispatch one webhook's events (runs on the worker pool)
+def process_events(events):
+	startup.wait_ready()  # 🔹 STARTUP_MODE=background: hold events until the first warm-up attempt ends
+	for event in events:
+		if isinstance(event, MessageEvent) and isinstance(event.message, TextMessage):
+			handle_message(event)
+		elif isinstance(event, (FollowEvent, UnfollowEvent)):
+			handle_follow(event)
+
+
+event_queue = WorkQueue(process_events, name="webhook")
+
+metrics.register_gauges("db_pool", db_pool.pool_stats)
+metrics.register_gauges("reply_cache", reply_cache.reply_cache.stats)
+metrics.register_gauges("webhook_queue", event_queue.stats)
+metrics.register_gauges("series_store", series_store.series_store.stats)
+
+
+# ✅ Every reply goes through here so LINE API latency & failures are measured
+def reply(event, messages):
+	try:
+		with metrics.timer("line_api_seconds", call="reply_message"):
+			line_bot_api.reply_message(event.reply_token, messages)
+	except LineBotApiError as e:
+		metrics.inc("line_api_errors_total", call="reply_message", status=e.status_code)
+		metrics.log_event("line_reply_failed", level=logging.ERROR, status=e.status_code, error=str(e))
+
+
 # 🔹 LINE Bot Message Handling
-@handler.add(MessageEvent, message=TextMessage)
 def handle_message(event):
 	user_message = event.message.text.strip().upper()  # Normalize input to uppercase
 
-	if user_message in ["FFR", "CPI", "NFP", "GDP", "UR", "LFPR", "JOLTS", "AWH", "WAGE", "RTSAL", "IP",
-						"ISMPMI", "AUTO", "NHOME", "XHOME", "MORTG", "HSTART", "BPERM", "HPI", "TBLNC",
-						"FDEF", "USDEBT", "SP500", "10YY", "YCURV", "BSPRD", "PPI", "PCE", "M2", "V", "MCSI"]:
+	# ✅ Watchlist commands: "WATCH CPI FFR", "UNWATCH CPI", "WATCHLIST"
+	command = watchlist.parse_command(user_message)
+	if command:
+		reply_text = handle_watch_command(event, *command)
+		reply(event, TextSendMessage(text=reply_text))
+		return
+
+	# ✅ Chart commands: "CPI 5Y", "UR 18M", "SP500 MAX"
+	chart = charts.parse_command(user_message)
+	if chart and indicator_registry.get_registry().is_reply_key(chart.key):
+		message = charts.chart_reply(chart)
+		reply(event, TextSendMessage(text=message) if isinstance(message, str) else message)
+		return
+
+	# ✅ Queries: "CPI PCE", "UR 2020-01..2021-12", "10YY VS FFR" (one batched read, one reply)
+	query = query_language.parse(user_message, indicator_registry.get_registry())
+	if query:
+		reply(event, query_language.answer(query))
+		return
+
+	if indicator_registry.get_registry().is_reply_key(user_message):  # ✅ O(1) registry lookup
 		messages = get_indicator_info_and_history(user_message)  # ✅ Fetch data
 
 		if isinstance(messages, list):  
 			# ✅ If multiple messages (JOLTS), send them as an array
-			line_bot_api.reply_message(event.reply_token, messages)
+			reply(event, messages)
 		else:
 			# ✅ If single message (CPI, FFR, etc.), send normally
-			line_bot_api.reply_message(event.reply_token, TextSendMessage(text=messages))
+			reply(event, TextSendMessage(text=messages))
 	else:
 		reply_text = "I can provide macroeconomic data. Send an abbreviation (e.g., 'FFR') to get details."
-		line_bot_api.reply_message(event.reply_token, TextSendMessage(text=reply_text))
+		reply(event, TextSendMessage(text=reply_text))
+
+
+# 🔹 Watchlist commands: update `subscriptions` and reply with the user's current list
+def handle_watch_command(event, command, keys):
+	user_id = getattr(event.source, "user_id", None)
+	if not user_id:
+		return watchlist.ONE_ON_ONE_ONLY
+
+	keys, unknown, usage = watchlist.check_keys(indicator_registry.get_registry(), command, keys)
+	if usage:
+		return usage
+
+	try:
+		with db_pool.connection() as db:
+			cursor = db.cursor()
+			try:
+				if command != watchlist.LIST_COMMAND:
+					watchlist.set_watch(db, cursor, user_id, keys, command == watchlist.WATCH_COMMAND)
+				current = watchlist.get_watchlist(cursor, user_id)
+			finally:
+				cursor.close()
+	except mysql.connector.Error as err:
+		metrics.log_event("watchlist_update_failed", level=logging.ERROR, user_id=user_id, error=str(err))
+		return watchlist.UPDATE_FAILED
+
+	return watchlist.format_reply(current, unknown)
+
+
+# 🔹 Follow / Unfollow: keep the `subscribers` table in sync for push notifications
+def handle_follow(event):
+	user_id = getattr(event.source, "user_id", None)
+	if not user_id:
+		return
+	active = 1 if isinstance(event, FollowEvent) else 0
+	try:
+		with db_pool.connection() as db:
+			cursor = db.cursor()
+			try:
+				cursor.execute(watchlist.FOLLOW_QUERY, (user_id, active))
+				db.commit()
+			finally:
+				cursor.close()
+	except mysql.connector.Error as err:
+		metrics.log_event("subscriber_update_failed", level=logging.ERROR, user_id=user_id, error=str(err))
 
 
 # Flask server
 if __name__ == "__main__":
-	app.run(host="0.0.0.0", port=8080)
+	metrics.configure_logging()
+	startup.start()  # ✅ Pool, registry, series store & replies warm before (or, in background mode, while) serving
+	event_queue.start()
+	app.run(host="0.0.0.0", port=int(os.environ.get("PORT", "8080")))
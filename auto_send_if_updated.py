@@ -1,57 +1,150 @@
+import json
+import time
+import uuid
 import mysql.connector
-from datetime import datetime, timedelta
+from datetime import datetime
 from linebot import LineBotApi
 from linebot.models import TextSendMessage
-from credentials import DB_CONFIG, LINE_ACCESS_TOKEN, USER_ID  # Import credentials
-import time
+from credentials import LINE_ACCESS_TOKEN, USER_ID  # Import credentials
+import db_pool  # Shared connection pool (configured from credentials.DB_CONFIG)
+import indicator_registry  # Abbreviation → format type
+import value_formatter  # Formatting rules shared with the bot's replies
+import fanout  # Batched multicast delivery
+import watchlist  # Indicator → subscribers reverse index
+import metrics  # Query & LINE API timers
+from collections import defaultdict
 
 # Helper function to log messages with a timestamp
 def log(message):
     print(f"[{datetime.now()}] {message}")
 
-# ✅ Function to Check for Updates in the Last 24 Hours
-def check_new_updates():
+# ----------------------------------------------------------------------------
+# Change-log consumer
+#
+# auto_update.py appends every insert/revision to `indicator_changes` in the same
+# transaction as the data. This script reads the changes after its stored cursor
+# (`notifier_cursors`) and, before sending anything, saves the delivery plan in
+# `notifier_deliveries`: every multicast batch with its exact recipients, message
+# and a random retry key. Sends only ever come from that saved plan, so a re-run
+# after a failure sends the same users under the same keys (LINE drops batches it
+# already accepted), whatever changed in the log, subscribers or watchlists since.
+# The cursor advances, and the plan is deleted, once every batch is delivered.
+#
+# Batches end at MAX(change_id). That is safe because every writer holds
+# db_pool.data_write_lock from its first insert to its commit: change ids become
+# visible in id order, so no lower id can commit after a higher one was read.
+
+CONSUMER_NAME = "line_push"
+
+# Latest & previous value for each indicator touched by changes in (start, end].
+# "Latest" is the indicator's newest row in indicator_data, not the newest changed
+# date: a batch of revised history must not be announced as this month's value.
+PENDING_CHANGES_QUERY = """
+    SELECT i.indicator_name, i.abbreviation, d.value AS latest_value,
+           (SELECT p.value FROM indicator_data p
+            WHERE p.indicator_id = d.indicator_id AND p.record_date < d.record_date
+            ORDER BY p.record_date DESC LIMIT 1) AS previous_value
+    FROM (
+        SELECT DISTINCT indicator_id
+        FROM indicator_changes
+        WHERE change_id > %s AND change_id <= %s
+    ) c
+    JOIN indicator_data d ON d.indicator_id = c.indicator_id
+     AND d.record_date = (SELECT MAX(m.record_date) FROM indicator_data m WHERE m.indicator_id = c.indicator_id)
+    JOIN indicators i ON i.indicator_id = c.indicator_id
+    ORDER BY i.indicator_id;
+"""
+
+
+PLAN_QUERY = """
+    SELECT batch_no, start_change_id, end_change_id, retry_key, user_ids, message, delivered_at
+    FROM notifier_deliveries
+    WHERE consumer = %s
+    ORDER BY batch_no
+"""
+
+SAVE_PLAN_QUERY = """
+    INSERT INTO notifier_deliveries
+        (consumer, batch_no, start_change_id, end_change_id, retry_key, user_ids, message)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+"""
+
+
+def read_cursor(cursor, consumer=CONSUMER_NAME):
+    cursor.execute("SELECT last_change_id FROM notifier_cursors WHERE consumer = %s", (consumer,))
+    row = cursor.fetchone()
+    return row[0] if row else 0
+
+
+def advance_cursor(db, cursor, change_id, consumer=CONSUMER_NAME):
+    cursor.execute("""
+        INSERT INTO notifier_cursors (consumer, last_change_id) VALUES (%s, %s)
+        ON DUPLICATE KEY UPDATE last_change_id = VALUES(last_change_id)
+    """, (consumer, change_id))
+    cursor.execute("DELETE FROM notifier_deliveries WHERE consumer = %s", (consumer,))  # 🔹 Same transaction
+    db.commit()
+
+
+def load_plan(cursor, consumer=CONSUMER_NAME):
+    cursor.execute(PLAN_QUERY, (consumer,))
+    return cursor.fetchall()
+
+
+# ✅ Store every batch (recipients, message, retry key) before the first send
+def save_plan(db, cursor, consumer, start_id, end_id, batches):
+    cursor.executemany(SAVE_PLAN_QUERY, [
+        (consumer, batch_no, start_id, end_id, str(uuid.uuid4()), json.dumps(user_ids), text)
+        for batch_no, (user_ids, text) in enumerate(batches)
+    ])
+    db.commit()
+
+
+# ✅ Notify about every change after the stored cursor; returns True if the cursor advanced
+def process_change_log(consumer=CONSUMER_NAME):
     try:
-        # Connect to MySQL Database
-        db = mysql.connector.connect(**DB_CONFIG)
+        db = db_pool.get_connection()
         cursor = db.cursor(buffered=True)
 
-        # Get the Timestamp for 24 Hours Ago
-        yesterday = datetime.now() - timedelta(days=1)
-
-        # Fetch Updated Indicators and Their Latest & Previous Values
-        query = """
-            SELECT i.indicator_name, i.abbreviation, d.value AS latest_value, 
-                   (SELECT d2.value FROM indicator_data d2 
-                    WHERE d2.indicator_id = d.indicator_id 
-                    AND d2.record_date < d.record_date 
-                    ORDER BY d2.record_date DESC LIMIT 1) AS previous_value
-            FROM indicator_data d
-            JOIN indicators i ON d.indicator_id = i.indicator_id
-            WHERE d.last_updated >= %s
-            ORDER BY d.last_updated DESC
-            LIMIT 100;
-        """
-
-        start_time = time.time()
-        cursor.execute(query, (yesterday,))
-        updated_data = cursor.fetchall()
-        elapsed = time.time() - start_time
-        log(f"DEBUG: Query executed in {elapsed:.2f} seconds.")
-
-        if updated_data:
-            log(f"✅ {len(updated_data)} new data points found! Sending notification...")
-            return updated_data
+        # Only one consumer may run at a time (released automatically if the session dies)
+        cursor.execute("SELECT GET_LOCK(%s, 0)", (f"notifier:{consumer}",))
+        if not cursor.fetchone()[0]:
+            log("Another notifier run holds the lock; exiting.")
+            return False
+
+        plan = load_plan(cursor, consumer)
+        if plan:
+            start_id, end_id = plan[0][1], plan[0][2]
+            log(f"🔄 Resuming the saved delivery plan for changes {start_id + 1}..{end_id}.")
         else:
-            log("✅ No new data found in the last 24 hours.")
-            return []
+            start_id = read_cursor(cursor, consumer)
+            cursor.execute("SELECT COALESCE(MAX(change_id), 0) FROM indicator_changes")
+            end_id = cursor.fetchone()[0]
+            if end_id <= start_id:
+                log("✅ No new changes since the last notification.")
+                return False
+
+            with metrics.timer("notifier_read_seconds") as read_timer:
+                cursor.execute(PENDING_CHANGES_QUERY, (start_id, end_id))
+                updated_data = cursor.fetchall()
+            log(f"Changes {start_id + 1}..{end_id} read in {read_timer.seconds:.2f} seconds.")
+
+            batches = plan_notification(updated_data) if updated_data else []
+            if batches:
+                log(f"✅ {len(updated_data)} indicators changed! Saving {len(batches)} batches...")
+                save_plan(db, cursor, consumer, start_id, end_id, batches)
+                plan = load_plan(cursor, consumer)
+
+        if plan and not send_planned(db, cursor, consumer, plan):
+            log("❌ Cursor not advanced; undelivered batches of the saved plan will be retried on the next run.")
+            return False
+
+        advance_cursor(db, cursor, end_id, consumer)
+        log(f"✅ Cursor advanced to change {end_id}.")
+        return True
 
     except mysql.connector.Error as err:
         log(f"❌ Database Error: {err}")
-        return []
-    except KeyboardInterrupt:
-        log("Query interrupted by user.")
-        return []
+        return False
 
     finally:
         if 'cursor' in locals() and cursor is not None:
@@ -59,7 +152,7 @@ def check_new_updates():
                 cursor.close()
             except Exception as e:
                 log(f"Error closing cursor: {e}")
-        if 'db' in locals() and db.is_connected():
+        if 'db' in locals() and db is not None:
             db.close()
 
 # ----------------------------------------------------------------------------
@@ -67,83 +160,118 @@ def check_new_updates():
 def format_value(abbrev, value):
     """
     Format the given value based on the indicator abbreviation.
-    
-    The formatting rules mimic the following query_templates:
-      - For yoy_growth and percentage: round to 2 decimals and add '%'
-      - For monetary: prepend '$' and round to 2 decimals
-      - For large_numbers: format with commas and no decimals
-      - For hours: round to 1 decimal and append ' hrs'
-      - For decimal_2: round to 2 decimals
-      - For no_decimals: multiply by 1000 and format with no decimals
-      - For billions: divide by 1000, round to 2 decimals, prepend '$', and append ' B'
-    
-    Adjust the rules below as needed.
+
+    Uses the same rules as the bot's replies (value_formatter), keyed by the
+    indicator's `format_type` in the registry. Values are raw stored levels, so
+    YoY indicators are shown as levels rather than percentages.
     """
-    try:
-        num = float(value)
-    except (ValueError, TypeError):
-        return str(value)
-    
-    # Define the formatting categories
-    format_types = {
-        "yoy_growth": ["CPI", "HPI", "PPI", "PCE"],
-        "percentage": ["GDP", "FFR", "MORTG", "UR", "LFPR", "V", "10YY", "YCURV", "BSPRD"],
-        "monetary": ["WAGE"],
-        "large_numbers": ["NFP", "RTSAL", "XHOME", "TBLNC", "M2"],
-        "hours": ["AWH"],
-        "decimal_2": ["IP", "AUTO", "MCSI", "SP500"],
-        "no_decimals": ["NHOME", "HSTART", "BPERM", "JOLTS_OPN", "JOLTS_QUT", "JOLTS_LAY"],
-        "billions": ["FDEF", "USDEBT"]
-    }
-    
-    if abbrev in format_types["yoy_growth"]:
-        return f"{num:.2f}%"
-    elif abbrev in format_types["percentage"]:
-        return f"{num:.2f}%"
-    elif abbrev in format_types["monetary"]:
-        return f"${num:.2f}"
-    elif abbrev in format_types["large_numbers"]:
-        return f"{num:,.0f}"
-    elif abbrev in format_types["hours"]:
-        return f"{num:.1f} hrs"
-    elif abbrev in format_types["decimal_2"]:
-        return f"{num:.2f}"
-    elif abbrev in format_types["no_decimals"]:
-        return f"{num * 1000:,.0f}"
-    elif abbrev in format_types["billions"]:
-        return f"${num / 1000:.2f} B"
-    else:
-        return f"{num:.2f}"
+    format_type = indicator_registry.get_registry().format_type(abbrev)
+    return value_formatter.format_level(format_type, value)
 
 # ----------------------------------------------------------------------------
-# ✅ Function to Send Notification via LINE
-def send_update_notification(updated_data):
-    try:
-        message = "📢 Macroeconomic Data Update 🚀\n"
-        message += f"✅ {len(updated_data)} new data points were updated in the last 24 hours.\n\n"
-        message += "🔹 Key Updates:\n"
+# Build the notification text from "- Indicator (ABBR): latest (Previous: ...)" lines
+def build_message(lines):
+    message = "📢 Macroeconomic Data Update 🚀\n"
+    message += f"✅ {len(lines)} indicators were updated since the last notification.\n\n"
+    message += "🔹 Key Updates:\n"
+    message += "".join(lines)
+    message += "\n📊 Check the latest data by sending an abbreviation (e.g., 'CPI') to the bot!"
+    return message
 
-        for indicator, abbrev, latest_value, previous_value in updated_data:
-            formatted_latest = format_value(abbrev, latest_value)
-            formatted_previous = format_value(abbrev, previous_value)
-            message += f"- {indicator} ({abbrev}): {formatted_latest} (Previous: {formatted_previous})\n"
+# ----------------------------------------------------------------------------
+# Group recipients by what they should receive:
+#   - users with a watchlist get only the changed indicators they watch
+#   - users without a watchlist get every update
+# Returns {frozenset of reply keys (None = everything): [user_id, ...]}
+def plan_audiences(recipients, changed_keys, index):
+    targeted = index.recipients_for(changed_keys)  # ✅ Reverse-index lookup per changed indicator
+    audiences = defaultdict(list)
+    for user_id in recipients:
+        if not index.is_watching(user_id):
+            audiences[None].append(user_id)
+        elif user_id in targeted:
+            audiences[frozenset(targeted[user_id])].append(user_id)
+    return audiences
 
-        message += "\n📊 Check the latest data by sending an abbreviation (e.g., 'CPI') to the bot!"
+# ----------------------------------------------------------------------------
+# ✅ The multicast batches for `updated_data`: [(user_ids, message text)], up to 500 users each
+def plan_notification(updated_data):
+    registry = indicator_registry.get_registry()
+
+    # One line per updated data point, grouped by the reply key users watch (JOLTS_OPN → JOLTS)
+    lines_by_key = defaultdict(list)
+    for indicator, abbrev, latest_value, previous_value in updated_data:
+        formatted_latest = format_value(abbrev, latest_value)
+        formatted_previous = format_value(abbrev, previous_value)
+        lines_by_key[registry.reply_key_of(abbrev)].append(
+            f"- {indicator} ({abbrev}): {formatted_latest} (Previous: {formatted_previous})\n"
+        )
+
+    recipients = get_recipients()
+    audiences = plan_audiences(recipients, lines_by_key.keys(), watchlist.watchlist_index)
+    log(f"✅ {len(recipients)} subscribers → {sum(len(u) for u in audiences.values())} recipients "
+        f"in {len(audiences)} audiences.")
 
+    # Each audience gets its own message, split into batches of 500
+    batches = []
+    for keys, user_ids in audiences.items():
+        text = build_message([line for key in (keys or lines_by_key) for line in lines_by_key[key]])
+        batches += [(batch, text) for batch in fanout.chunked(user_ids, fanout.MULTICAST_BATCH_SIZE)]
+    return batches
+
+# ----------------------------------------------------------------------------
+# ✅ Send the saved plan's undelivered batches via LINE; returns True once every batch is delivered
+def send_planned(db, cursor, consumer, plan):
+    pending = [row for row in plan if row[6] is None]
+    if not pending:
+        return True
+    try:
         # Initialize the synchronous LINE API client
         line_bot_api = LineBotApi(LINE_ACCESS_TOKEN)
-        # Synchronously send the push message
-        line_bot_api.push_message(USER_ID, TextSendMessage(text=message))
-        log("✅ Notification sent successfully.")
+
+        user_ids = [json.loads(row[4]) for row in pending]
+        start = time.perf_counter()
+        outcomes = fanout.send_batches(line_bot_api, [
+            (row[3], users, [TextSendMessage(text=row[5])]) for row, users in zip(pending, user_ids)
+        ])
+        report = fanout.build_report(user_ids, outcomes, time.perf_counter() - start)
+        log(fanout.format_report(report))
     except Exception as e:
         log(f"❌ Failed to send notification: {e}")
+        return False
+
+    delivered = [row[0] for row, (ok, _) in zip(pending, outcomes) if ok]
+    if delivered:
+        cursor.execute(f"""
+            UPDATE notifier_deliveries SET delivered_at = NOW()
+            WHERE consumer = %s AND batch_no IN ({', '.join(['%s'] * len(delivered))})
+        """, (consumer, *delivered))
+        db.commit()
+
+    if report.failed_batches:
+        log(f"❌ {report.failed_batches} batches could not be delivered.")
+        return False
+    log("✅ Notification sent successfully.")
+    return True
+
+# ----------------------------------------------------------------------------
+# ✅ Active subscribers; falls back to credentials.USER_ID when nobody has subscribed yet
+def get_recipients():
+    try:
+        with db_pool.connection() as db:
+            cursor = db.cursor()
+            try:
+                recipients = fanout.load_subscribers(cursor)
+                watchlist.watchlist_index.refresh(cursor)  # Incremental after the first load
+            finally:
+                cursor.close()
+    except mysql.connector.Error as err:
+        log(f"❌ Database Error loading subscribers: {err}")
+        recipients = []
+    return recipients or [USER_ID]
 
 # ----------------------------------------------------------------------------
 # ✅ Main Execution
 if __name__ == "__main__":
     log("auto_send_if_updated.py started.")
-    new_data = check_new_updates()
-    if not new_data:
-        log("Exiting: No updates to process.")
-    else:
-        send_update_notification(new_data)
+    process_change_log()
@@ -1,37 +1,160 @@
 # 📌 auto_update.py - Fetches new data from FRED & updates MySQL database
-import requests
+import argparse
+import os
+import queue
+import time
 import mysql.connector
-from datetime import datetime
-from credentials import DB_CONFIG  # ✅ Import DB_CONFIG
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+import db_pool  # ✅ Shared connection pool (configured from credentials.DB_CONFIG)
+import reply_cache  # ✅ Signals the bot to drop cached replies for updated indicators
+import fred_client  # ✅ Keep-alive session, rate limiting & retries for FRED
+import snapshots  # ✅ Precomputed per-indicator replies & metrics
+import storage_layout  # ✅ Archive rows for rolled-up indicator_data partitions
+import indicator_registry
+from indicator_handler import build_reply_texts
 
 # Helper function to log messages with timestamp
 def log(message):
 	print(f"[{datetime.now()}] {message}")
 
-# ✅ Function to Fetch Data from FRED API
-def fetch_fred_data(series_id, api_key, last_recorded_date):
-	url = f"https://api.stlouisfed.org/fred/series/observations?series_id={series_id}&api_key={api_key}&file_type=json"
-	response = requests.get(url)
-	data = response.json()
+# ✅ Re-fetch this many days before the last stored date so late FRED revisions are caught
+REVISION_LOOKBACK_DAYS = int(os.environ.get("FRED_REVISION_LOOKBACK_DAYS", "120"))
+NO_DATA_DATE = "1900-01-01"  # Placeholder date for indicators with no stored rows
+BULK_CHUNK_SIZE = int(os.environ.get("DB_BULK_CHUNK_SIZE", "1000"))  # Rows per multi-row INSERT & commit
+VALUE_SCALE = Decimal("0.000001")  # indicator_data.value is DECIMAL(18,6)
 
-	if "observations" in data:
-		# 🔹 Ensure `last_recorded_date` is a string
-		last_recorded_date = str(last_recorded_date)
+# ✅ Function to Fetch Data from FRED API (incremental: only the window FRED may have changed)
+def fetch_fred_data(series_id, api_key, last_recorded_date, realtime_start=None, vintage_dates=None):
+	params = {"series_id": series_id, "api_key": api_key}
+
+	# 🔹 Ask FRED for observations from (last date - lookback) onward instead of the full history
+	observation_start = None
+	if last_recorded_date and str(last_recorded_date) != NO_DATA_DATE:
+		if isinstance(last_recorded_date, str):
+			last_recorded_date = datetime.strptime(last_recorded_date, "%Y-%m-%d").date()
+		observation_start = (last_recorded_date - timedelta(days=REVISION_LOOKBACK_DAYS)).isoformat()
+		params["observation_start"] = observation_start
+
+	# 🔹 Optional ALFRED real-time parameters
+	if realtime_start:
+		params["realtime_start"] = str(realtime_start)
+	if vintage_dates:
+		params["vintage_dates"] = ",".join(str(d) for d in vintage_dates)
+
+	data = fred_client.get_json("series/observations", params)
 
-		# 🔹 Filter data to only return new records after `last_recorded_date`
+	if "observations" in data:
+		# 🔹 Skip missing values ("."); rows inside the lookback window are re-upserted
 		recent_data = [
 			(obs["date"], float(obs["value"]))
 			for obs in data["observations"]
-			if obs["value"] != "." and obs["date"] > last_recorded_date  # ✅ Ensures proper date comparison
+			if obs["value"] != "." and (observation_start is None or obs["date"] >= observation_start)
 		]
 		return recent_data
 	return []
 
+# ✅ Bulk-write observations for one indicator; returns (inserted, updated, unchanged)
+#    `changes_after` ("YYYY-MM-DD") limits the change log to rows dated after it
+def write_observations(db, cursor, indicator_id, observations, chunk_size=None, record_changes=True, changes_after=None):
+	if not observations:
+		return 0, 0, 0
+	chunk_size = chunk_size or BULK_CHUNK_SIZE
+
+	# 🔹 Read what is already stored in the fetched date range (one range scan on the unique key)
+	dates = [str(record_date) for record_date, _ in observations]
+	cursor.execute("""
+		SELECT record_date, value FROM indicator_data
+		WHERE indicator_id = %s AND record_date BETWEEN %s AND %s
+	""", (indicator_id, min(dates), max(dates)))
+	existing = {str(record_date): value for record_date, value in cursor.fetchall()}
+	# 🔹 Points rolled up into indicator_data_archive are stored too (live rows win)
+	archived = storage_layout.read_archive(cursor, [indicator_id], date.fromisoformat(min(dates)), date.fromisoformat(max(dates)))
+	for record_date, value in archived.get(indicator_id, []):
+		existing.setdefault(str(record_date), value)
+
+	# 🔹 Only new dates and revised values need a write
+	rows = []
+	inserted = updated = unchanged = 0
+	for record_date, value in observations:
+		record_date = str(record_date)
+		value = Decimal(repr(value)).quantize(VALUE_SCALE)
+		stored = existing.get(record_date)
+		if stored is None:
+			inserted += 1
+		elif stored != value:
+			updated += 1
+		else:
+			unchanged += 1
+			continue
+		rows.append((indicator_id, record_date, value, stored))
+
+	# ✅ Multi-row INSERT ... ON DUPLICATE KEY UPDATE, committed chunk by chunk
+	for start in range(0, len(rows), chunk_size):
+		chunk = rows[start:start + chunk_size]
+		# 🔹 One writer at a time from the first INSERT to the commit, so change ids commit in order
+		with db_pool.data_write_lock(db, cursor):
+			# 🔹 `last_updated` before `value`: MySQL assigns left to right, so the IF must see the old value
+			placeholders = ", ".join(["(%s, %s, %s)"] * len(chunk))
+			params = [param for row in chunk for param in row[:3]]
+			cursor.execute(f"""
+				INSERT INTO indicator_data (indicator_id, record_date, value)
+				VALUES {placeholders}
+				ON DUPLICATE KEY UPDATE
+					last_updated = IF(value <> VALUES(value), NOW(), last_updated),
+					value = VALUES(value);
+			""", params)
+
+			# 🔹 Change log rows commit atomically with the data they describe (outbox)
+			logged = [row for row in chunk if changes_after is None or row[1] > changes_after] if record_changes else []
+			if logged:
+				placeholders = ", ".join(["(%s, %s, %s, %s)"] * len(logged))
+				params = [param for row in logged for param in (row[0], row[1], row[3], row[2])]
+				cursor.execute(f"""
+					INSERT INTO indicator_changes (indicator_id, record_date, old_value, new_value)
+					VALUES {placeholders};
+				""", params)
+			db.commit()
+
+	return inserted, updated, unchanged
+
+# ✅ Materialize snapshot rows so the bot answers with a single primary-key lookup, then tell
+#    running bot processes which cached replies are now stale
+#    (`all_snapshots` refreshes every snapshot, otherwise only the ones whose data changed)
+# `history=True`: rows were written without change-log entries, so bots reload their series store
+def publish_changes(db, cursor, changed_abbreviations, all_snapshots=False, history=False):
+	try:
+		registry = indicator_registry.load_registry()
+		if all_snapshots:
+			reply_keys = registry.reply_keys
+		else:
+			reply_keys = {registry.reply_key_of(abbreviation) for abbreviation in changed_abbreviations}
+		snapshot_start = time.perf_counter()
+		written = snapshots.materialize_snapshots(
+			db, cursor,
+			[(registry.get(key).indicator_id, key) for key in sorted(reply_keys) if registry.get(key)],
+			build_reply_texts
+		)
+		log(f"✅ {written} snapshots refreshed in {time.perf_counter() - snapshot_start:.2f}s")
+	except mysql.connector.Error as err:
+		db.rollback()
+		log(f"❌ Error refreshing snapshots (bot falls back to live queries): {err}")
+
+	reply_cache.publish_updates(changed_abbreviations, history=history)
+	if changed_abbreviations:
+		log(f"✅ Published data version for: {', '.join(sorted(changed_abbreviations))}")
+
 # ✅ Function to Insert New Data into MySQL (Only If New)
-def update_database():
+# `series_ids` limits the run to those FRED series (used by scheduler.py); returns the
+# abbreviations whose data changed. Abbreviations that gained an observation dated after
+# their last stored one (a release, not a revision) are also added to `landed` if given.
+def update_database(series_ids=None, landed=None):
+	changed_abbreviations = set()  # Indicators whose rows actually changed
 	try:
 		# 🔹 Connect to MySQL Database
-		db = mysql.connector.connect(**DB_CONFIG)
+		db = db_pool.get_connection()
 		cursor = db.cursor()
 
 		# 🔹 Fetch API Key from `data_sources` Table
@@ -39,43 +162,299 @@ def update_database():
 		fred_api_key = cursor.fetchone()[0]  # Extract API Key
 
 		# 🔹 Fetch List of Indicators & Their FRED Series IDs
-		cursor.execute("SELECT indicator_id, fred_series_id FROM indicators WHERE source = 'FRED'")
+		cursor.execute("SELECT indicator_id, fred_series_id, abbreviation FROM indicators WHERE source = 'FRED'")
 		indicators = cursor.fetchall()
+		if series_ids is not None:
+			wanted = set(series_ids)
+			indicators = [row for row in indicators if row[1] in wanted]
+
+		# ✅ Fetch last recorded date for every indicator in one query
+		cursor.execute("""
+			SELECT indicator_id, MAX(record_date) FROM indicator_data GROUP BY indicator_id
+		""")
+		last_dates = dict(cursor.fetchall())
+
+		# 🔹 Build one fetch job per indicator (no existing data → default start date)
+		jobs = []
+		for indicator_id, series_id, abbreviation in indicators:
+			last_recorded_date = last_dates.get(indicator_id) or NO_DATA_DATE
+			jobs.append((series_id, (series_id, fred_api_key, last_recorded_date)))
+
+		# ✅ Fetch stage: all series concurrently (bounded by FRED_MAX_WORKERS & FRED_RATE_LIMIT)
+		log(f"🔄 Fetching {len(jobs)} series from FRED with {fred_client.FRED_MAX_WORKERS} workers...")
+		fetch_start = time.perf_counter()
+		results = fred_client.fetch_many(jobs, fetch_fred_data)
+		log(f"✅ Fetch stage finished in {time.perf_counter() - fetch_start:.2f}s")
+		log(fred_client.format_timing_report(results))
+
+		inserted_total = updated_total = unchanged_total = 0
+
+		# 🔹 Write stage: single connection, one indicator at a time
+		for (indicator_id, series_id, abbreviation), result in zip(indicators, results):
+			if result.error is not None:
+				log(f"❌ Error fetching data for {series_id}: {result.error}")
+				continue
+
+			try:
+				inserted, updated, unchanged = write_observations(db, cursor, indicator_id, result.data)
+			except mysql.connector.Error as err:
+				db.rollback()  # 🔹 Only the failed chunk is lost; earlier chunks are committed
+				log(f"❌ Error inserting data for {series_id}: {err}")
+				changed_abbreviations.add(abbreviation)  # Earlier chunks may have landed
+				continue
+
+			inserted_total += inserted
+			updated_total += updated
+			unchanged_total += unchanged
+			if inserted or updated:
+				changed_abbreviations.add(abbreviation)
+			# 🔹 Rows inside the lookback window are revisions; only a newer date is a release
+			last_date = last_dates.get(indicator_id)
+			newest = max((str(record_date) for record_date, _ in result.data), default=None)
+			if landed is not None and inserted and (last_date is None or newest > str(last_date)):
+				landed.add(abbreviation)
+
+		log(f"✅ {inserted_total} inserted, {updated_total} updated, {unchanged_total} unchanged data points.")
+
+		# ✅ Snapshots & data-version signal (a full run refreshes every snapshot)
+		publish_changes(db, cursor, changed_abbreviations, all_snapshots=series_ids is None)
+
+	except mysql.connector.Error as err:
+		log(f"❌ Database Connection Error: {err}")
+
+	finally:
+		if 'cursor' in locals() and cursor is not None:
+			cursor.close()
+		if 'db' in locals() and db is not None:
+			db.close()
+		log("✅ Database connection returned to pool.")
 
-		updates_made = 0  # Counter to track updates
-
-		# 🔹 Loop through Each Indicator & Fetch Data
-		for indicator_id, series_id in indicators:
-			# ✅ Fetch last recorded date for the indicator
-			cursor.execute("""
-				SELECT MAX(record_date) FROM indicator_data WHERE indicator_id = %s
-			""", (indicator_id,))
-			last_recorded_date = cursor.fetchone()[0]
-
-			# ✅ If there's no existing data, set default start date
-			last_recorded_date = last_recorded_date if last_recorded_date else "1900-01-01"
-
-			log(f"🔄 Fetching data for {series_id} after {last_recorded_date}...")
-
-			# ✅ Fetch only new data
-			data = fetch_fred_data(series_id, fred_api_key, last_recorded_date)
-
-			for record_date, value in data:
-				try:
-					# ✅ Insert new data if it's newer than the last recorded date
-					cursor.execute("""
-						INSERT INTO indicator_data (indicator_id, record_date, value) 
-						VALUES (%s, %s, %s)
-						ON DUPLICATE KEY UPDATE 
-							value = VALUES(value), 
-							last_updated = IF(value <> VALUES(value), NOW(), last_updated);
-					""", (indicator_id, record_date, value))
-					updates_made += 1
-				except mysql.connector.Error as err:
-					log(f"❌ Error inserting data for {series_id}: {err}")
+	return changed_abbreviations
 
+# ----------------------------------------------------------------------------
+# Backfill: full history (and optionally ALFRED vintages) for chosen series, resumable
+#
+# Each (series, mode) is read from FRED page by page in date order by a fetch worker; one
+# writer (the main thread, one DB connection) upserts every page in BULK_CHUNK_SIZE chunks
+# and then records where the next page starts in `backfill_checkpoints`. An interrupted run
+# re-reads at most the page in flight: the next run resumes at the stored checkpoint.
+
+BACKFILL_PAGE_SIZE = int(os.environ.get("BACKFILL_PAGE_SIZE", "10000"))  # Observations per FRED request (max 100000)
+BACKFILL_QUEUE_PAGES = int(os.environ.get("BACKFILL_QUEUE_PAGES", "16"))  # Fetched pages buffered ahead of the writer
+ALFRED_REALTIME_START = "1776-07-04"  # FRED's earliest real-time date: ask for every vintage
+ALFRED_REALTIME_END = "9999-12-31"
+
+OBSERVATIONS = "observations"  # Current values → indicator_data
+VINTAGES = "vintages"  # Every ALFRED vintage → indicator_vintages
+
+BackfillJob = namedtuple("BackfillJob", ["indicator_id", "series_id", "abbreviation", "mode"])
+
+READ_CHECKPOINTS_QUERY = "SELECT series_id, mode, next_start, completed_at FROM backfill_checkpoints"
+DELETE_CHECKPOINT_QUERY = "DELETE FROM backfill_checkpoints WHERE series_id = %s AND mode = %s"
+SAVE_CHECKPOINT_QUERY = """
+	INSERT INTO backfill_checkpoints (series_id, mode, next_start, rows_written, completed_at)
+	VALUES (%s, %s, %s, %s, IF(%s, NOW(), NULL))
+	ON DUPLICATE KEY UPDATE
+		next_start = VALUES(next_start),
+		rows_written = rows_written + VALUES(rows_written),
+		completed_at = VALUES(completed_at);
+"""
+
+# ✅ One page of a series in date order; returns (rows, next_start) with next_start None on the last page
+def fetch_backfill_page(series_id, api_key, observation_start, mode, limit=None):
+	limit = limit or BACKFILL_PAGE_SIZE
+	params = {"series_id": series_id, "api_key": api_key, "sort_order": "asc", "limit": limit}
+	if observation_start:
+		params["observation_start"] = str(observation_start)
+	if mode == VINTAGES:
+		params["realtime_start"] = ALFRED_REALTIME_START
+		params["realtime_end"] = ALFRED_REALTIME_END
+
+	observations = fred_client.get_json("series/observations", params).get("observations", [])
+
+	# 🔹 A full page may stop partway through one date's vintages: that date is re-read next page
+	next_start = None
+	if len(observations) >= limit:
+		last_date = observations[-1]["date"]
+		if observations[0]["date"] == last_date:  # Only with a tiny page size: take the page & move on
+			next_start = (date.fromisoformat(last_date) + timedelta(days=1)).isoformat()
+		else:
+			observations = [obs for obs in observations if obs["date"] < last_date]
+			next_start = last_date
+
+	if mode == VINTAGES:
+		rows = [
+			(obs["date"], obs["realtime_start"], obs["realtime_end"], None if obs["value"] == "." else float(obs["value"]))
+			for obs in observations
+		]
+	else:
+		rows = [(obs["date"], float(obs["value"])) for obs in observations if obs["value"] != "."]
+	return rows, next_start
+
+# ✅ Bulk-upsert vintage rows (record_date, realtime_start, realtime_end, value or None); returns rows written
+def write_vintages(db, cursor, indicator_id, rows, chunk_size=None):
+	chunk_size = chunk_size or BULK_CHUNK_SIZE
+	for start in range(0, len(rows), chunk_size):
+		chunk = rows[start:start + chunk_size]
+		placeholders = ", ".join(["(%s, %s, %s, %s, %s)"] * len(chunk))
+		params = [
+			param
+			for record_date, realtime_start, realtime_end, value in chunk
+			for param in (indicator_id, record_date, realtime_start, realtime_end,
+						  None if value is None else Decimal(repr(value)).quantize(VALUE_SCALE))
+		]
+		cursor.execute(f"""
+			INSERT INTO indicator_vintages (indicator_id, record_date, realtime_start, realtime_end, value)
+			VALUES {placeholders}
+			ON DUPLICATE KEY UPDATE
+				realtime_end = VALUES(realtime_end),
+				value = VALUES(value);
+		""", params)
 		db.commit()
-		log(f"✅ {updates_made} new data points updated in the database.")
+	return len(rows)
+
+# 🔹 Fetch worker: streams one job's pages to the writer until the last page (or the writer gives up on it)
+def _stream_pages(job, api_key, observation_start, pages, stopped):
+	try:
+		while job not in stopped:
+			rows, next_start = fetch_backfill_page(job.series_id, api_key, observation_start, job.mode)
+			pages.put((job, rows, next_start, None))
+			if next_start is None:
+				return
+			observation_start = next_start
+	except Exception as err:  # ✅ One failing series must not abort the others; it resumes next run
+		pages.put((job, None, None, err))
+
+# ✅ Load the full history of `targets` (abbreviations or FRED series IDs; None = every FRED indicator)
+# By default only observations newer than an indicator's latest stored date go to the change
+# log: history is not news for the notifier. Bots reload their series store to pick it up.
+def backfill(targets=None, vintages=False, restart=False, start=None, record_changes=True, log_history=False):
+	changed_abbreviations = set()
+	history_written = False
+	stopped = set()  # Jobs finished or abandoned (their fetch workers stop)
+	try:
+		db = db_pool.get_connection()
+		cursor = db.cursor()
+
+		cursor.execute("SELECT api_key FROM data_sources WHERE source_name = 'FRED'")
+		fred_api_key = cursor.fetchone()[0]
+
+		cursor.execute("SELECT indicator_id, fred_series_id, abbreviation FROM indicators WHERE source = 'FRED'")
+		indicators = cursor.fetchall()
+		if targets:
+			wanted = {target.upper() for target in targets}
+			selected = [row for row in indicators if (row[1] or "").upper() in wanted or row[2].upper() in wanted]
+			unknown = wanted - {(row[1] or "").upper() for row in selected} - {row[2].upper() for row in selected}
+			if unknown:
+				log(f"⚠️ Not FRED indicators, skipped: {', '.join(sorted(unknown))}")
+		else:
+			selected = indicators
+
+		# 🔹 Latest stored date per indicator (live or archived), read before anything is written
+		latest_dates = {}
+		if selected:
+			ids = [row[0] for row in selected]
+			placeholders = ", ".join(["%s"] * len(ids))
+			cursor.execute(f"""
+				SELECT indicator_id, MAX(last_date) FROM (
+					SELECT indicator_id, MAX(record_date) AS last_date FROM indicator_data
+					WHERE indicator_id IN ({placeholders}) GROUP BY indicator_id
+					UNION ALL
+					SELECT indicator_id, MAX(last_date) FROM indicator_data_archive
+					WHERE indicator_id IN ({placeholders}) GROUP BY indicator_id
+				) latest
+				GROUP BY indicator_id
+			""", ids + ids)
+			latest_dates = {indicator_id: str(last_date) for indicator_id, last_date in cursor.fetchall()}
+
+		modes = [OBSERVATIONS, VINTAGES] if vintages else [OBSERVATIONS]
+		jobs = [BackfillJob(indicator_id, series_id, abbreviation, mode)
+				for indicator_id, series_id, abbreviation in selected for mode in modes]
+
+		if restart:
+			cursor.executemany(DELETE_CHECKPOINT_QUERY, [(job.series_id, job.mode) for job in jobs])
+			db.commit()
+		cursor.execute(READ_CHECKPOINTS_QUERY)
+		checkpoints = {(series_id, mode): (next_start, completed_at)
+					   for series_id, mode, next_start, completed_at in cursor.fetchall()}
+
+		# 🔹 Skip finished jobs, resume interrupted ones, start the rest at `start` (FRED's first date if None)
+		starts = {}
+		for job in jobs:
+			checkpoint = checkpoints.get((job.series_id, job.mode))
+			if checkpoint is None:
+				starts[job] = start
+			elif checkpoint[1] is not None:
+				log(f"✅ {job.series_id} {job.mode}: already backfilled on {checkpoint[1]} (use --restart to reload)")
+			else:
+				starts[job] = checkpoint[0]
+				log(f"🔄 {job.series_id} {job.mode}: resuming from {checkpoint[0] or 'the first observation'}")
+
+		log(f"🔄 Backfilling {len(starts)} series/mode jobs with {fred_client.FRED_MAX_WORKERS} workers...")
+		backfill_start = time.perf_counter()
+		pages = queue.Queue(maxsize=BACKFILL_QUEUE_PAGES)  # ✅ Bounded: fetchers wait for the writer
+		remaining = set(starts)
+		written_by_job = dict.fromkeys(starts, 0)
+		completed = 0
+
+		with ThreadPoolExecutor(max_workers=fred_client.FRED_MAX_WORKERS, thread_name_prefix="backfill") as executor:
+			futures = [executor.submit(_stream_pages, job, fred_api_key, job_start, pages, stopped)
+					   for job, job_start in starts.items()]
+			try:
+				while remaining:
+					job, rows, next_start, error = pages.get()
+					if job not in remaining:
+						continue
+					if error is not None:
+						log(f"❌ Error fetching {job.series_id} {job.mode} (resumes from its checkpoint): {error}")
+						remaining.discard(job)
+						continue
+
+					try:
+						if job.mode == VINTAGES:
+							written = write_vintages(db, cursor, job.indicator_id, rows)
+						else:
+							# 🔹 First load (nothing stored yet): log none of it, the series is new rather than updated
+							first_load = job.indicator_id not in latest_dates and not log_history
+							log_changes = record_changes and not first_load
+							changes_after = None if log_history else latest_dates.get(job.indicator_id)
+							inserted, updated, _ = write_observations(
+								db, cursor, job.indicator_id, rows,
+								record_changes=log_changes, changes_after=changes_after
+							)
+							written = inserted + updated
+							if written:
+								changed_abbreviations.add(job.abbreviation)
+								history_written |= not log_changes or changes_after is not None
+						# 🔹 Checkpoint only after the page's rows are committed
+						cursor.execute(SAVE_CHECKPOINT_QUERY, (job.series_id, job.mode, next_start, written, next_start is None))
+						db.commit()
+					except mysql.connector.Error as err:
+						db.rollback()
+						log(f"❌ Error writing {job.series_id} {job.mode} (resumes from its checkpoint): {err}")
+						stopped.add(job)
+						remaining.discard(job)
+						continue
+
+					written_by_job[job] += written
+					if next_start is None:
+						stopped.add(job)
+						remaining.discard(job)
+						completed += 1
+						log(f"✅ {job.series_id} {job.mode}: {written_by_job[job]} rows written")
+			finally:
+				# 🔹 On errors or Ctrl-C: stop the fetchers and unblock any waiting on a full queue
+				stopped.update(starts)
+				while not all(future.done() for future in futures):
+					try:
+						pages.get(timeout=0.1)
+					except queue.Empty:
+						pass
+
+		log(f"✅ Backfill finished in {time.perf_counter() - backfill_start:.2f}s: "
+			f"{sum(written_by_job.values())} rows written, {completed}/{len(starts)} jobs complete.")
+
+		publish_changes(db, cursor, changed_abbreviations, history=history_written)
 
 	except mysql.connector.Error as err:
 		log(f"❌ Database Connection Error: {err}")
@@ -83,11 +462,30 @@ def update_database():
 	finally:
 		if 'cursor' in locals() and cursor is not None:
 			cursor.close()
-		if 'db' in locals() and db.is_connected():
+		if 'db' in locals() and db is not None:
 			db.close()
-		log("✅ Database connection closed.")
 
-# ✅ Run the `auto_update` function
+	return changed_abbreviations
+
+# ✅ Run the `auto_update` function (or `backfill`)
 if __name__ == "__main__":
-	log("auto_update.py started.")
-	update_database()
+	parser = argparse.ArgumentParser(description="Fetch new FRED data into MySQL")
+	subcommands = parser.add_subparsers(dest="command")
+	backfill_parser = subcommands.add_parser("backfill", help="Load the full history of chosen series (resumable)")
+	backfill_parser.add_argument("series", nargs="*", help="Abbreviations or FRED series IDs (default: every FRED indicator)")
+	backfill_parser.add_argument("--vintages", action="store_true", help="Also load ALFRED vintages into indicator_vintages")
+	backfill_parser.add_argument("--restart", action="store_true", help="Ignore saved checkpoints and start over")
+	backfill_parser.add_argument("--start", help="First observation date (YYYY-MM-DD) for series without a checkpoint")
+	backfill_parser.add_argument("--no-change-log", action="store_true",
+								 help="Skip indicator_changes (initial loads with no bot or notifier running)")
+	backfill_parser.add_argument("--change-log-history", action="store_true",
+								 help="Also log observations older than each series' latest stored date")
+	args = parser.parse_args()
+
+	if args.command == "backfill":
+		log("auto_update.py backfill started.")
+		backfill(args.series, vintages=args.vintages, restart=args.restart, start=args.start,
+				 record_changes=not args.no_change_log, log_history=args.change_log_history)
+	else:
+		log("auto_update.py started.")
+		update_database()
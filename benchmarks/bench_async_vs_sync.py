@@ -0,0 +1,187 @@
+# 📌 bench_async_vs_sync.py - Compare the Flask server (app_v0_0_7.py) with the asyncio server (app_async.py)
+#
+# Usage: python benchmarks/bench_async_vs_sync.py [--requests 2000] [--concurrency 200]
+#                                                 [--line-latency-ms 150] [--mix CPI=40,JOLTS=20,SP500=20,HELLO=20]
+#                                                 [--modes sync,async]
+#
+# Each server runs as a subprocess against the database in credentials.DB_CONFIG, with
+# LINE_API_ENDPOINT pointed at a local LINE stand-in that answers reply calls after
+# --line-latency-ms (LINE's own round-trip is where the sync server's threads block).
+# Signed webhooks are posted concurrently; a request counts as done when its reply
+# reaches the stand-in. Reports throughput and end-to-end latency percentiles.
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import aiohttp
+
+from bench_common import REPO_DIR, log, ms, percentile
+from bench_webhook import DEFAULT_MIX, make_body, parse_mix, sign
+
+SERVER_COMMANDS = {
+	"sync": [sys.executable, "app_v0_0_7.py"],
+	"async": [sys.executable, "-m", "uvicorn", "app_async:app", "--host", "127.0.0.1", "--log-level", "warning"],
+}
+
+
+class MockLine:
+	"""LINE Messaging API stand-in: records when each reply token arrives."""
+
+	def __init__(self, latency_ms):
+		self.latency = latency_ms / 1000
+		self.received = {}
+		self.lock = threading.Lock()
+
+	def handler(self):
+		mock = self
+
+		class Handler(BaseHTTPRequestHandler):
+			protocol_version = "HTTP/1.1"
+
+			def do_POST(self):
+				body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+				time.sleep(mock.latency)
+				try:
+					token = json.loads(body).get("replyToken")
+				except ValueError:
+					token = None
+				if token:
+					with mock.lock:
+						mock.received[token] = time.perf_counter()
+				self.send_response(200)
+				self.send_header("Content-Type", "application/json")
+				self.send_header("Content-Length", "2")
+				self.end_headers()
+				self.wfile.write(b"{}")
+
+			def log_message(self, format, *args):
+				pass
+
+		return Handler
+
+
+def wait_until_up(url, timeout=60):
+	deadline = time.monotonic() + timeout
+	while time.monotonic() < deadline:
+		try:
+			with urllib.request.urlopen(url, timeout=1) as response:
+				if response.status == 200:
+					return True
+		except OSError:
+			time.sleep(0.25)
+	return False
+
+
+async def drive(base_url, texts, concurrency, channel_secret, mock, timeout):
+	semaphore = asyncio.Semaphore(concurrency)
+	sent = {}
+
+	async def post(session, text):
+		reply_token = uuid.uuid4().hex
+		body = make_body(text, reply_token, f"Ubench{random.randrange(1000):05d}")
+		headers = {"X-Line-Signature": sign(body, channel_secret), "Content-Type": "application/json"}
+		async with semaphore:
+			sent[reply_token] = time.perf_counter()
+			async with session.post(f"{base_url}/callback", data=body, headers=headers) as response:
+				await response.read()
+				return response.status
+
+	connector = aiohttp.TCPConnector(limit=concurrency)
+	async with aiohttp.ClientSession(connector=connector) as session:
+		start = time.perf_counter()
+		statuses = await asyncio.gather(*(post(session, text) for text in texts))
+
+	# 🔹 Replies are sent after the 200 ack: wait for the stand-in to see every accepted one
+	accepted = sum(1 for status in statuses if status == 200)
+	deadline = time.monotonic() + timeout
+	while time.monotonic() < deadline:
+		with mock.lock:
+			if len([t for t in sent if t in mock.received]) >= accepted:
+				break
+		await asyncio.sleep(0.05)
+
+	with mock.lock:
+		latencies = [mock.received[t] - sent[t] for t in sent if t in mock.received]
+		finished = max((mock.received[t] for t in sent if t in mock.received), default=start)
+	return statuses, latencies, finished - start
+
+
+def run_mode(mode, args, texts, channel_secret):
+	mock = MockLine(args.line_latency_ms)
+	line_server = ThreadingHTTPServer(("127.0.0.1", 0), mock.handler())
+	line_server.daemon_threads = True
+	threading.Thread(target=line_server.serve_forever, daemon=True).start()
+
+	port = args.port
+	env = dict(os.environ,
+			   PORT=str(port),
+			   LINE_API_ENDPOINT=f"http://127.0.0.1:{line_server.server_address[1]}",
+			   LOG_SAMPLE_RATE="0")
+	command = SERVER_COMMANDS[mode] + (["--port", str(port)] if mode == "async" else [])
+	server = subprocess.Popen(command, cwd=REPO_DIR, env=env, stdout=subprocess.DEVNULL)
+	try:
+		base_url = f"http://127.0.0.1:{port}"
+		if not wait_until_up(base_url + "/"):
+			raise RuntimeError(f"{mode} server did not start")
+
+		log(f"[{mode}] warming up...")
+		asyncio.run(drive(base_url, list(parse_mix(args.mix)), 4, channel_secret, mock, args.timeout))
+		log(f"[{mode}] {len(texts)} webhooks, {args.concurrency} concurrent, LINE latency {args.line_latency_ms:.0f}ms")
+		statuses, latencies, wall = asyncio.run(
+			drive(base_url, texts, args.concurrency, channel_secret, mock, args.timeout)
+		)
+	finally:
+		server.terminate()
+		server.wait(timeout=15)
+		line_server.shutdown()
+
+	return {
+		"mode": mode,
+		"wall": wall,
+		"replied": len(latencies),
+		"rejected": sum(1 for status in statuses if status != 200),
+		"p50": percentile(latencies, 50),
+		"p95": percentile(latencies, 95),
+		"p99": percentile(latencies, 99),
+	}
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Benchmark the sync Flask server against the asyncio server")
+	parser.add_argument("--requests", type=int, default=2000)
+	parser.add_argument("--concurrency", type=int, default=200)
+	parser.add_argument("--line-latency-ms", type=float, default=150.0, help="Simulated LINE reply API latency")
+	parser.add_argument("--mix", default=DEFAULT_MIX, help="Comma-separated TEXT=weight pairs")
+	parser.add_argument("--modes", default="sync,async")
+	parser.add_argument("--port", type=int, default=8181)
+	parser.add_argument("--timeout", type=float, default=120.0, help="Seconds to wait for outstanding replies")
+	parser.add_argument("--seed", type=int, default=0)
+	args = parser.parse_args()
+
+	from credentials import LINE_SECRET
+
+	weights = parse_mix(args.mix)
+	rng = random.Random(args.seed)
+	texts = rng.choices(list(weights), weights=list(weights.values()), k=args.requests)
+
+	reports = [run_mode(mode.strip(), args, texts, LINE_SECRET) for mode in args.modes.split(",")]
+
+	print()
+	print(f"{'server':<8} {'wall':>9} {'replies/s':>10} {'replied':>8} {'rejected':>9} {'p50':>10} {'p95':>10} {'p99':>10}")
+	for r in reports:
+		rate = r["replied"] / r["wall"] if r["wall"] > 0 else 0.0
+		print(f"{r['mode']:<8} {r['wall']:>8.2f}s {rate:>10,.0f} {r['replied']:>8} {r['rejected']:>9} "
+			  f"{ms(r['p50']):>10} {ms(r['p95']):>10} {ms(r['p99']):>10}")
+
+
+if __name__ == "__main__":
+	main()
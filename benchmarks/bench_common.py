@@ -0,0 +1,34 @@
+# 📌 bench_common.py - Helpers shared by the benchmark scripts
+import os
+import sys
+from datetime import datetime
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_DIR not in sys.path:
+	sys.path.insert(0, REPO_DIR)
+
+
+def log(message):
+	print(f"[{datetime.now()}] {message}")
+
+
+# ✅ Nearest-rank percentile (same definition as work_queue's stats)
+def percentile(samples, pct):
+	if not samples:
+		return None
+	ordered = sorted(samples)
+	index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+	return ordered[index]
+
+
+def ms(seconds):
+	return "-" if seconds is None else f"{seconds * 1000:.1f}ms"
+
+
+# ✅ Execute schema.sql (mysqldump format) statement by statement on `cursor`
+def load_schema(cursor, path=os.path.join(REPO_DIR, "schema.sql")):
+	with open(path, "r", encoding="utf-8") as f:
+		lines = [line for line in f if not line.startswith("--")]
+	for statement in "".join(lines).split(";\n"):
+		if statement.strip():
+			cursor.execute(statement)
@@ -0,0 +1,140 @@
+# 📌 bench_ingest.py - End-to-end auto_update.py benchmark against the local FRED stand-in
+#
+# Usage: python benchmarks/bench_ingest.py [--series 35] [--length 5000] [--new-points 5]
+#                                          [--latency-ms 50] [--error-rate 0.02] [--workers 8]
+#
+# Starts benchmarks/mock_fred_server.py in-process, builds a fresh copy of schema.sql in a
+# scratch database (BENCH_DATABASE, default "macro_bench") using credentials.DB_CONFIG,
+# seeds one FRED indicator per synthetic series, then runs the real
+# fetch_fred_data → update_database pipeline three times:
+#   cold         empty tables, full history
+#   incremental  the mock publishes --new-points more observations per series
+#   no-op        nothing changed upstream (revision lookback only)
+# and reports wall time, rows written per second and p50/p99 per-series fetch latency.
+import argparse
+import os
+import tempfile
+import time
+
+from bench_common import REPO_DIR, load_schema, log, ms, percentile  # noqa: F401 (REPO_DIR sets sys.path)
+from mock_fred_server import add_arguments, mock_from_args, start_server
+
+BENCH_DATABASE = os.environ.get("BENCH_DATABASE", "macro_bench")
+
+
+# ✅ Fresh scratch schema + one FRED indicator per synthetic series
+def build_database(series_ids):
+	import mysql.connector
+	from credentials import DB_CONFIG
+
+	config = {k: v for k, v in DB_CONFIG.items() if k != "database"}
+	db = mysql.connector.connect(**config)
+	cursor = db.cursor()
+	cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{BENCH_DATABASE}`")
+	cursor.execute(f"USE `{BENCH_DATABASE}`")
+	load_schema(cursor)
+	cursor.execute("""
+		INSERT INTO data_sources (source_name, api_key, update_frequency) VALUES ('FRED', 'bench', 'D')
+	""")
+	cursor.executemany("""
+		INSERT INTO indicators (indicator_name, fred_series_id, source, category, frequency, unit, abbreviation)
+		VALUES (%s, %s, 'FRED', 'Leading', 'D', 'Index', %s)
+	""", [(f"Synthetic {series_id}", series_id, series_id) for series_id in series_ids])
+	db.commit()
+	cursor.close()
+	db.close()
+
+	# 🔹 Point the shared pool at the scratch database (db_pool reads this dict lazily)
+	DB_CONFIG["database"] = BENCH_DATABASE
+
+
+def count_rows(cursor):
+	cursor.execute("SELECT (SELECT COUNT(*) FROM indicator_data), (SELECT COUNT(*) FROM indicator_changes)")
+	return cursor.fetchone()
+
+
+def run_phase(label, auto_update, db_pool, fetch_results):
+	with db_pool.connection() as db:
+		cursor = db.cursor()
+		rows_before, changes_before = count_rows(cursor)
+		cursor.close()
+
+	fetch_results.clear()
+	start = time.perf_counter()
+	auto_update.update_database()
+	wall = time.perf_counter() - start
+
+	with db_pool.connection() as db:
+		cursor = db.cursor()
+		rows_after, changes_after = count_rows(cursor)
+		cursor.close()
+
+	latencies = [result.seconds for result in fetch_results]
+	return {
+		"phase": label,
+		"wall": wall,
+		"fetched": sum(len(result.data) for result in fetch_results if result.data),
+		"written": changes_after - changes_before,  # Inserted + revised rows (one change-log row each)
+		"inserted": rows_after - rows_before,
+		"errors": sum(1 for result in fetch_results if result.error is not None),
+		"p50": percentile(latencies, 50),
+		"p99": percentile(latencies, 99),
+	}
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Benchmark auto_update.py against a local FRED stand-in")
+	add_arguments(parser)
+	parser.add_argument("--new-points", type=int, default=5, help="Observations published before the incremental run")
+	parser.add_argument("--workers", type=int, default=None, help="FRED_MAX_WORKERS for the run")
+	args = parser.parse_args()
+
+	mock = mock_from_args(args)
+	server, base_url = start_server(mock)
+	log(f"Mock FRED at {base_url}: {args.series} series × {args.length} observations")
+
+	# 🔹 Settings read at import time: no real quota to respect, and never signal a live bot
+	os.environ.setdefault("FRED_RATE_LIMIT", "1000000")
+	os.environ.setdefault("FRED_BACKOFF_BASE", "0.05")
+	os.environ["DATA_VERSION_FILE"] = os.path.join(tempfile.mkdtemp(), "data_version.json")
+	if args.workers:
+		os.environ["FRED_MAX_WORKERS"] = str(args.workers)
+
+	log(f"Building scratch schema in `{BENCH_DATABASE}`...")
+	build_database(mock.series_ids())
+
+	import auto_update
+	import db_pool
+	import fred_client
+
+	fred_client.FRED_API_URL = base_url
+
+	# 🔹 Keep the per-series FetchResults update_database() produces
+	fetch_results = []
+	fetch_many = fred_client.fetch_many
+
+	def recording_fetch_many(jobs, fetch, max_workers=None):
+		results = fetch_many(jobs, fetch, max_workers)
+		fetch_results.extend(results)
+		return results
+
+	fred_client.fetch_many = recording_fetch_many
+
+	reports = [run_phase("cold", auto_update, db_pool, fetch_results)]
+	mock.advance(args.new_points)
+	reports.append(run_phase("incremental", auto_update, db_pool, fetch_results))
+	reports.append(run_phase("no-op", auto_update, db_pool, fetch_results))
+	server.shutdown()
+
+	print()
+	print(f"{'phase':<12} {'wall':>9} {'fetched':>9} {'written':>9} {'rows/s':>10} "
+		  f"{'p50/series':>11} {'p99/series':>11} {'errors':>7}")
+	for r in reports:
+		rate = r["written"] / r["wall"] if r["wall"] > 0 else 0.0
+		print(f"{r['phase']:<12} {r['wall']:>8.2f}s {r['fetched']:>9,} {r['written']:>9,} {rate:>10,.0f} "
+			  f"{ms(r['p50']):>11} {ms(r['p99']):>11} {r['errors']:>7}")
+	print(f"\nMock served {mock.requests} requests ({mock.injected_errors} injected failures).")
+
+
+if __name__ == "__main__":
+	main()
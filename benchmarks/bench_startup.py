@@ -0,0 +1,176 @@
+# 📌 bench_startup.py - Cold-start cost of a bot worker: import time & time to first reply
+#
+# Usage: python benchmarks/bench_startup.py [--modes sync,async] [--startup-modes blocking,background]
+#                                           [--runs 5] [--text CPI] [--imports 5]
+#
+# Import time: `python -X importtime -c "import <app>"` in a fresh interpreter, --imports
+# times per app; reports the median total and the heaviest modules the app pulls in.
+#
+# Time to first reply: each server runs as a subprocess (as in bench_async_vs_sync.py) with
+# LINE_API_ENDPOINT pointed at a local LINE stand-in. A signed webhook for --text is posted
+# the moment `/` answers; reports, from process start, when `/` answered (listening), when
+# `/ready` answered 200 (warm), when the first reply reached the stand-in, and the latency
+# of a second, warm reply.
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from http.server import ThreadingHTTPServer
+
+from bench_async_vs_sync import SERVER_COMMANDS, MockLine
+from bench_common import REPO_DIR, log, ms
+from bench_webhook import make_body, sign
+
+APP_MODULES = {"sync": "app_v0_0_7", "async": "app_async"}
+POLL_INTERVAL = 0.01
+
+
+# ✅ (total seconds, [(cumulative seconds, module)]) from one `-X importtime` run
+def import_profile(module):
+	result = subprocess.run(
+		[sys.executable, "-X", "importtime", "-c", f"import {module}"],
+		cwd=REPO_DIR, capture_output=True, text=True, env=dict(os.environ, LOG_SAMPLE_RATE="0"),
+	)
+	if result.returncode != 0:
+		raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+	modules = []
+	for line in result.stderr.splitlines():
+		if not line.startswith("import time:") or "cumulative" in line:
+			continue
+		_, cumulative, name = line[len("import time:"):].split("|")
+		modules.append((int(cumulative) / 1e6, name[1:].rstrip()))  # Drop the separator space, keep the nesting
+	end = max(i for i, (_, name) in enumerate(modules) if name == module)
+	start = end
+	while start > 0 and modules[start - 1][1].startswith(" "):
+		start -= 1  # 🔹 A module's imports are listed right before it, nested under it
+	direct = [(seconds, name.strip()) for seconds, name in modules[start:end]
+			  if name.startswith("  ") and not name.startswith("   ")]
+	return modules[end][0], sorted(direct, reverse=True)
+
+
+def status_of(url):
+	try:
+		with urllib.request.urlopen(url, timeout=1) as response:
+			return response.status
+	except urllib.error.HTTPError as e:
+		return e.code
+	except OSError:
+		return None
+
+
+def wait_for(condition, deadline):
+	while time.monotonic() < deadline:
+		if condition():
+			return time.perf_counter()
+		time.sleep(POLL_INTERVAL)
+	return None
+
+
+def post_webhook(base_url, text, channel_secret):
+	reply_token = uuid.uuid4().hex
+	body = make_body(text, reply_token, "Ubench00001")
+	request = urllib.request.Request(f"{base_url}/callback", data=body.encode("utf-8"), headers={
+		"X-Line-Signature": sign(body, channel_secret), "Content-Type": "application/json",
+	})
+	sent = time.perf_counter()
+	with urllib.request.urlopen(request, timeout=30) as response:
+		response.read()
+	return reply_token, sent
+
+
+def run_once(mode, startup_mode, args, channel_secret):
+	mock = MockLine(0)
+	line_server = ThreadingHTTPServer(("127.0.0.1", 0), mock.handler())
+	line_server.daemon_threads = True
+	threading.Thread(target=line_server.serve_forever, daemon=True).start()
+
+	env = dict(os.environ,
+			   PORT=str(args.port),
+			   LINE_API_ENDPOINT=f"http://127.0.0.1:{line_server.server_address[1]}",
+			   STARTUP_MODE=startup_mode,
+			   LOG_SAMPLE_RATE="0")
+	command = SERVER_COMMANDS[mode] + (["--port", str(args.port)] if mode == "async" else [])
+	base_url = f"http://127.0.0.1:{args.port}"
+	deadline = time.monotonic() + args.timeout
+
+	start = time.perf_counter()
+	server = subprocess.Popen(command, cwd=REPO_DIR, env=env, stdout=subprocess.DEVNULL)
+	try:
+		listening = wait_for(lambda: status_of(base_url + "/") == 200, deadline)
+		if listening is None:
+			raise RuntimeError(f"{mode} server did not start")
+		first_token, _ = post_webhook(base_url, args.text, channel_secret)
+		ready = wait_for(lambda: status_of(base_url + "/ready") == 200, deadline)
+		wait_for(lambda: first_token in mock.received, deadline)
+
+		warm_token, sent = post_webhook(base_url, args.text, channel_secret)
+		wait_for(lambda: warm_token in mock.received, deadline)
+	finally:
+		server.terminate()
+		server.wait(timeout=15)
+		line_server.shutdown()
+
+	def since_start(moment):
+		return moment - start if moment is not None else None
+
+	return {
+		"listening": since_start(listening),
+		"ready": since_start(ready),
+		"first_reply": since_start(mock.received.get(first_token)),  # 🔹 Arrival times are this process's perf_counter
+		"warm_reply": mock.received[warm_token] - sent if warm_token in mock.received else None,
+	}
+
+
+def median(values):
+	values = [v for v in values if v is not None]
+	return statistics.median(values) if values else None
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Benchmark bot worker cold start")
+	parser.add_argument("--modes", default="sync,async")
+	parser.add_argument("--startup-modes", default="blocking,background")
+	parser.add_argument("--runs", type=int, default=5, help="Server starts per mode")
+	parser.add_argument("--imports", type=int, default=5, help="Fresh-interpreter imports per app")
+	parser.add_argument("--text", default="CPI", help="Message text of the timed webhooks")
+	parser.add_argument("--top", type=int, default=8, help="Heaviest direct imports listed per app")
+	parser.add_argument("--port", type=int, default=8182)
+	parser.add_argument("--timeout", type=float, default=120.0)
+	args = parser.parse_args()
+
+	from credentials import LINE_SECRET
+
+	modes = [mode.strip() for mode in args.modes.split(",")]
+
+	print()
+	for mode in modes:
+		module = APP_MODULES[mode]
+		profiles = [import_profile(module) for _ in range(args.imports)]
+		print(f"import {module}: {ms(median([total for total, _ in profiles]))} (median of {args.imports})")
+		for seconds, name in profiles[-1][1][:args.top]:
+			print(f"    {name:<28} {ms(seconds):>10}")
+
+	reports = []
+	for mode in modes:
+		for startup_mode in args.startup_modes.split(","):
+			log(f"[{mode}/{startup_mode}] {args.runs} cold starts...")
+			runs = [run_once(mode, startup_mode.strip(), args, LINE_SECRET) for _ in range(args.runs)]
+			reports.append((f"{mode}/{startup_mode.strip()}", {
+				key: median([run[key] for run in runs]) for key in ("listening", "ready", "first_reply", "warm_reply")
+			}))
+
+	print()
+	print(f"{'server':<20} {'listening':>10} {'ready':>10} {'first reply':>12} {'warm reply':>11}   (medians; from process start)")
+	for label, r in reports:
+		print(f"{label:<20} {ms(r['listening']):>10} {ms(r['ready']):>10} {ms(r['first_reply']):>12} {ms(r['warm_reply']):>11}")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,188 @@
+# 📌 bench_storage_layout.py - Read & write paths on the legacy indicator_data layout vs. the partitioned one
+#
+# Usage: python benchmarks/bench_storage_layout.py [--indicators 35] [--days 12000]
+#                                                  [--partition-by date] [--years-per-partition 5]
+#                                                  [--rollup-years 10] [--repeats 300]
+#
+# Builds schema.sql in a scratch database (BENCH_DATABASE, default "macro_bench") with
+# --indicators daily series of --days points each, then measures, on the legacy layout,
+# after `storage_layout.migrate` and after `storage_layout.rollup` (everything older than
+# --rollup-years; date partitioning only):
+#   latest-15     the reply query (newest 15 rows of one indicator)
+#   point         one (indicator, date) lookup (the YoY comparison)
+#   range-1y      one year of one indicator
+#   store-load    SeriesStore.load() (every row, plus archive rows once rolled up)
+#   write         auto_update.write_observations: 120 days of revisions + 1 new day per indicator
+# and the table's data + index size.
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+
+from bench_common import REPO_DIR, load_schema, log, ms, percentile  # noqa: F401 (REPO_DIR sets sys.path)
+
+BENCH_DATABASE = os.environ.get("BENCH_DATABASE", "macro_bench")
+
+READ_QUERIES = {
+	"latest-15": """
+		SELECT record_date, value FROM indicator_data
+		WHERE indicator_id = %s ORDER BY record_date DESC LIMIT 15
+	""",
+	"point": "SELECT value FROM indicator_data WHERE indicator_id = %s AND record_date = %s",
+	"range-1y": """
+		SELECT record_date, value FROM indicator_data
+		WHERE indicator_id = %s AND record_date BETWEEN %s AND %s
+	""",
+}
+
+
+# ✅ Fresh scratch schema, filled server-side (one recursive CTE per indicator)
+def build_database(indicators, days):
+	import mysql.connector
+	from credentials import DB_CONFIG
+
+	config = {k: v for k, v in DB_CONFIG.items() if k != "database"}
+	db = mysql.connector.connect(**config)
+	cursor = db.cursor()
+	cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{BENCH_DATABASE}`")
+	cursor.execute(f"USE `{BENCH_DATABASE}`")
+	cursor.execute("DROP TABLE IF EXISTS indicator_data_old, indicator_data_new")
+	load_schema(cursor)
+	cursor.executemany("""
+		INSERT INTO indicators (indicator_name, fred_series_id, source, category, frequency, unit, abbreviation)
+		VALUES (%s, %s, 'FRED', 'Leading', 'D', 'Index', %s)
+	""", [(f"Synthetic {n}", f"SYN{n:05d}", f"SYN{n}") for n in range(1, indicators + 1)])
+	db.commit()
+
+	cursor.execute(f"SET SESSION cte_max_recursion_depth = {days + 1}")
+	for indicator_id in range(1, indicators + 1):
+		cursor.execute("""
+			INSERT INTO indicator_data (indicator_id, record_date, value)
+			WITH RECURSIVE seq (n) AS (
+				SELECT 0 UNION ALL SELECT n + 1 FROM seq WHERE n + 1 < %s
+			)
+			SELECT %s, DATE_SUB(CURDATE(), INTERVAL n DAY), 100 + MOD(n * 7919 + %s, 1000) / 10
+			FROM seq
+		""", (days, indicator_id, indicator_id))
+		db.commit()
+	cursor.close()
+	db.close()
+
+	# 🔹 Point the shared pool at the scratch database (db_pool reads this dict lazily)
+	DB_CONFIG["database"] = BENCH_DATABASE
+
+
+def time_reads(cursor, indicators, days, repeats, rng):
+	results = {}
+	today = date.today()
+	for label, query in READ_QUERIES.items():
+		samples = []
+		for _ in range(repeats):
+			indicator_id = rng.randint(1, indicators)
+			day = today - timedelta(days=rng.randrange(min(days, 3650)))  # 🔹 Recent decade: what replies read
+			params = {
+				"latest-15": (indicator_id,),
+				"point": (indicator_id, day),
+				"range-1y": (indicator_id, day - timedelta(days=365), day),
+			}[label]
+			start = time.perf_counter()
+			cursor.execute(query, params)
+			cursor.fetchall()
+			samples.append(time.perf_counter() - start)
+		results[label] = samples
+	return results
+
+
+def time_writes(db, cursor, auto_update, indicators, rng):
+	today = date.today()
+	samples = []
+	for indicator_id in range(1, indicators + 1):
+		observations = [
+			(today - timedelta(days=n), 100 + rng.random() * 10)
+			for n in range(-1, 120)  # Tomorrow (new row) + 120 days of revisions
+		]
+		start = time.perf_counter()
+		auto_update.write_observations(db, cursor, indicator_id, observations)
+		samples.append(time.perf_counter() - start)
+	return samples
+
+
+def measure(label, args, auto_update, db_pool, series_store, storage_layout, rng):
+	with db_pool.connection() as db:
+		cursor = db.cursor()
+		try:
+			data_bytes, index_bytes = storage_layout.table_size(cursor, "indicator_data")
+			reads = time_reads(cursor, args.indicators, args.days, args.repeats, rng)
+			writes = time_writes(db, cursor, auto_update, args.indicators, rng)
+		finally:
+			cursor.close()
+
+	loads = []
+	for _ in range(3):
+		store = series_store.SeriesStore()
+		store.load()
+		loads.append(store.load_seconds)
+
+	log(f"[{label}] measured")
+	return {"layout": label, "bytes": data_bytes + index_bytes, "reads": reads, "writes": writes, "load": min(loads)}
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Benchmark indicator_data storage layouts")
+	parser.add_argument("--indicators", type=int, default=35)
+	parser.add_argument("--days", type=int, default=12000, help="Daily points per indicator (~33 years)")
+	parser.add_argument("--partition-by", choices=["date", "indicator"], default="date")
+	parser.add_argument("--years-per-partition", type=int, default=5)
+	parser.add_argument("--indicators-per-partition", type=int, default=8)
+	parser.add_argument("--rollup-years", type=int, default=10, help="Archive partitions older than this (0 = skip)")
+	parser.add_argument("--repeats", type=int, default=300)
+	parser.add_argument("--seed", type=int, default=0)
+	args = parser.parse_args()
+
+	# 🔹 Never signal a live bot from the scratch run
+	os.environ["DATA_VERSION_FILE"] = os.path.join(tempfile.mkdtemp(), "data_version.json")
+
+	log(f"Building {args.indicators} × {args.days} rows in `{BENCH_DATABASE}`...")
+	build_database(args.indicators, args.days)
+
+	import auto_update
+	import db_pool
+	import series_store
+	import storage_layout
+
+	rng = random.Random(args.seed)
+	reports = [measure("legacy", args, auto_update, db_pool, series_store, storage_layout, rng)]
+
+	with db_pool.connection() as db:
+		cursor = db.cursor()
+		start = time.perf_counter()
+		storage_layout.migrate(db, cursor, args.partition_by, args.years_per_partition, args.indicators_per_partition)
+		log(f"Migration took {time.perf_counter() - start:.2f}s")
+		cursor.execute("DROP TABLE indicator_data_old")
+		cursor.close()
+	reports.append(measure(f"partitioned ({args.partition_by})", args, auto_update, db_pool, series_store, storage_layout, rng))
+
+	if args.rollup_years and args.partition_by == "date":
+		before = date(date.today().year - args.rollup_years, 1, 1)
+		with db_pool.connection() as db:
+			cursor = db.cursor()
+			storage_layout.rollup(db, cursor, before)
+			archive_data, archive_index = storage_layout.table_size(cursor, "indicator_data_archive")
+			cursor.close()
+		report = measure(f"rolled up (< {before})", args, auto_update, db_pool, series_store, storage_layout, rng)
+		report["bytes"] += archive_data + archive_index
+		reports.append(report)
+
+	print()
+	columns = list(READ_QUERIES) + ["write"]
+	print(f"{'layout':<28} {'size':>9} {'store-load':>11} " + " ".join(f"{c + ' p50/p99':>22}" for c in columns))
+	for r in reports:
+		cells = [r["reads"][c] for c in READ_QUERIES] + [r["writes"]]
+		print(f"{r['layout']:<28} {r['bytes'] / 1e6:>7.1f}MB {ms(r['load']):>11} "
+			  + " ".join(f"{ms(percentile(s, 50)) + ' / ' + ms(percentile(s, 99)):>22}" for s in cells))
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,213 @@
+# 📌 bench_webhook.py - Load test for the /callback webhook with signed synthetic LINE events
+#
+# Usage: python benchmarks/bench_webhook.py [--requests 2000] [--concurrency 16]
+#                                           [--mix CPI=40,JOLTS=20,SP500=20,HELLO=20] [--cold]
+#
+# Builds MessageEvent payloads signed with credentials.LINE_SECRET, posts them to the
+# Flask app in-process (app.test_client(), no network), and replaces
+# `line_bot_api.reply_message` with a recorder so nothing reaches LINE. Replies are built
+# by the real handler against the database in credentials.DB_CONFIG (read-only inputs
+# only). Reports ack latency (POST → 200), end-to-end latency (POST → reply_message),
+# throughput and DB queries per request.
+import argparse
+import base64
+import hashlib
+import hmac
+import json
+import random
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from bench_common import log, ms, percentile
+
+DEFAULT_MIX = "CPI=40,JOLTS=20,SP500=20,HELLO=20"  # HELLO = unknown input
+
+
+def parse_mix(mix):
+	weights = {}
+	for part in mix.split(","):
+		text, _, weight = part.partition("=")
+		weights[text.strip().upper()] = float(weight or 1)
+	return weights
+
+
+# ✅ One webhook body with a single text MessageEvent (same shape LINE sends)
+def make_body(text, reply_token, user_id):
+	return json.dumps({
+		"destination": "Ubenchdestination",
+		"events": [{
+			"type": "message",
+			"mode": "active",
+			"timestamp": int(time.time() * 1000),
+			"source": {"type": "user", "userId": user_id},
+			"webhookEventId": uuid.uuid4().hex.upper()[:26],
+			"deliveryContext": {"isRedelivery": False},
+			"replyToken": reply_token,
+			"message": {"id": str(random.getrandbits(48)), "type": "text", "text": text},
+		}],
+	})
+
+
+def sign(body, channel_secret):
+	digest = hmac.new(channel_secret.encode("utf-8"), body.encode("utf-8"), hashlib.sha256).digest()
+	return base64.b64encode(digest).decode("utf-8")
+
+
+class ReplyRecorder:
+	"""Stands in for LineBotApi.reply_message; wakes the sender when its reply arrives."""
+
+	def __init__(self):
+		self._lock = threading.Lock()
+		self._waiting = {}
+		self.replies = {}
+
+	def expect(self, reply_token):
+		event = threading.Event()
+		with self._lock:
+			self._waiting[reply_token] = event
+		return event
+
+	def reply_message(self, reply_token, messages, notification_disabled=False, timeout=None):
+		messages = messages if isinstance(messages, list) else [messages]
+		with self._lock:
+			self.replies[reply_token] = (time.perf_counter(), len(messages))
+			event = self._waiting.pop(reply_token, None)
+		if event:
+			event.set()
+
+
+class QueryCounter:
+	"""Counts cursor.execute calls per input text (the webhook worker tags its thread)."""
+
+	def __init__(self):
+		self.current = threading.local()
+		self.by_text = Counter()
+		self._lock = threading.Lock()
+
+	def add(self, count=1):
+		text = getattr(self.current, "text", None)
+		with self._lock:
+			self.by_text[text] += count
+
+
+class CountingCursor:
+	def __init__(self, cursor, counter):
+		self._cursor = cursor
+		self._counter = counter
+
+	def __getattr__(self, name):
+		return getattr(self._cursor, name)
+
+	def execute(self, *args, **kwargs):
+		self._counter.add()
+		return self._cursor.execute(*args, **kwargs)
+
+	def executemany(self, *args, **kwargs):
+		self._counter.add()
+		return self._cursor.executemany(*args, **kwargs)
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Load test the LINE webhook")
+	parser.add_argument("--requests", type=int, default=2000)
+	parser.add_argument("--concurrency", type=int, default=16, help="Concurrent webhook senders")
+	parser.add_argument("--mix", default=DEFAULT_MIX, help="Comma-separated TEXT=weight pairs")
+	parser.add_argument("--cold", action="store_true", help="Bypass the reply cache (every request hits the DB)")
+	parser.add_argument("--timeout", type=float, default=30.0, help="Seconds to wait for each reply")
+	parser.add_argument("--seed", type=int, default=0)
+	args = parser.parse_args()
+
+	import app_v0_0_7 as bot
+	import db_pool
+	import indicator_registry
+	import reply_cache
+	from credentials import LINE_SECRET
+
+	recorder = ReplyRecorder()
+	bot.line_bot_api.reply_message = recorder.reply_message  # ✅ Nothing is sent to LINE
+
+	counter = QueryCounter()
+	pooled_cursor = db_pool.PooledConnection.cursor
+	db_pool.PooledConnection.cursor = lambda self, *a, **kw: CountingCursor(pooled_cursor(self, *a, **kw), counter)
+
+	handle_message = bot.handle_message
+
+	def tagged_handle_message(event):
+		counter.current.text = event.message.text.strip().upper()
+		try:
+			handle_message(event)
+		finally:
+			counter.current.text = None
+
+	bot.handle_message = tagged_handle_message
+
+	if args.cold:
+		reply_cache.reply_cache.get = lambda key, version: None
+
+	db_pool.init_pool()
+	indicator_registry.get_registry()
+	bot.event_queue.start()
+	client = bot.app.test_client()
+
+	weights = parse_mix(args.mix)
+	rng = random.Random(args.seed)
+	texts = rng.choices(list(weights), weights=list(weights.values()), k=args.requests)
+
+	def send(text):
+		reply_token = uuid.uuid4().hex
+		body = make_body(text, reply_token, f"Ubench{rng.randrange(1000):05d}")
+		headers = {"X-Line-Signature": sign(body, LINE_SECRET), "Content-Type": "application/json"}
+		done = recorder.expect(reply_token)
+
+		start = time.perf_counter()
+		response = client.post("/callback", data=body, headers=headers)
+		acked = time.perf_counter()
+		if response.status_code != 200:
+			return text, response.status_code, acked - start, None
+		if not done.wait(args.timeout):
+			return text, "timeout", acked - start, None
+		return text, 200, acked - start, recorder.replies[reply_token][0] - start
+
+	# ✅ Warm-up: one request per input so first-call costs (and startup queries) stay out of the numbers
+	for text in weights:
+		send(text)
+	counter.by_text.clear()
+
+	log(f"Sending {args.requests} webhooks with {args.concurrency} senders ({'cold' if args.cold else 'warm'} cache)...")
+	start = time.perf_counter()
+	with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+		results = list(executor.map(send, texts))
+	wall = time.perf_counter() - start
+
+	statuses = Counter(status for _, status, _, _ in results)
+	by_text = defaultdict(list)
+	for text, status, ack, total in results:
+		if total is not None:
+			by_text[text].append(total)
+	acks = [ack for _, _, ack, _ in results]
+	totals = [total for _, _, _, total in results if total is not None]
+	requests_by_text = Counter(text for text, _, _, _ in results)
+
+	print()
+	print(f"Requests: {args.requests} in {wall:.2f}s → {args.requests / wall:,.0f} req/s   statuses: {dict(statuses)}")
+	print(f"Ack  latency p50 {ms(percentile(acks, 50))}  p95 {ms(percentile(acks, 95))}  p99 {ms(percentile(acks, 99))}")
+	print(f"Reply latency p50 {ms(percentile(totals, 50))}  p95 {ms(percentile(totals, 95))}  p99 {ms(percentile(totals, 99))}")
+	print()
+	print(f"{'input':<10} {'requests':>9} {'p50':>10} {'p99':>10} {'queries/req':>12}")
+	for text in weights:
+		samples = by_text.get(text, [])
+		sent = requests_by_text.get(text, 0)
+		queries = counter.by_text.get(text, 0) / sent if sent else 0.0
+		print(f"{text:<10} {sent:>9} {ms(percentile(samples, 50)):>10} {ms(percentile(samples, 99)):>10} {queries:>12.2f}")
+	total_queries = sum(counter.by_text.values())
+	print(f"{'(all)':<10} {args.requests:>9} {'':>10} {'':>10} {total_queries / args.requests:>12.2f}")
+	print()
+	print(f"Webhook queue: {bot.event_queue.stats()}")
+	print(f"DB pool: {db_pool.pool_stats()}")
+
+
+if __name__ == "__main__":
+	main()
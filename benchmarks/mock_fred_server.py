@@ -0,0 +1,217 @@
+# 📌 mock_fred_server.py - Local FRED API stand-in serving deterministic synthetic series
+#
+# Usage: python benchmarks/mock_fred_server.py [--port 8099] [--series 35] [--length 5000]
+#                                              [--latency-ms 50] [--jitter-ms 20]
+#                                              [--error-rate 0.02] [--throttle-rate 0.01]
+#
+# Point the bot's scripts at it with FRED_API_URL=http://127.0.0.1:8099/fred
+#
+# Series are named SYN00001 … SYNnnnnn. Every series has `length` daily observations
+# ending on END_DATE (plus `extra_points` more once the server is advanced), and the
+# value of a given (series, date) never changes between runs. Roughly 1% of the points
+# are "." (missing), as in real FRED data.
+import argparse
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+END_DATE = date(2024, 12, 31)
+SERIES_PREFIX = "SYN"
+RELEASE_ID_BASE = 9000  # Synthetic release IDs: one release per series
+
+
+def series_name(number):
+	return f"{SERIES_PREFIX}{number:05d}"
+
+
+# ✅ Deterministic value for one observation (same inputs → same output, on every run)
+def synthetic_value(series_id, index):
+	digest = hashlib.blake2b(f"{series_id}:{index}".encode(), digest_size=8).digest()
+	noise = int.from_bytes(digest, "big") / 2 ** 64
+	if noise < 0.01:
+		return "."
+	level = 50 + sum(series_id.encode()) % 200  # Each series gets its own level
+	trend = index * 0.01
+	season = 5 * math.sin(index / 30)
+	return f"{level + trend + season + noise:.4f}"
+
+
+class MockFred:
+	"""Synthetic FRED catalogue plus the fault-injection settings."""
+
+	def __init__(self, series=35, length=5000, latency_ms=0.0, jitter_ms=0.0,
+				 error_rate=0.0, throttle_rate=0.0, seed=0):
+		self.series = series
+		self.length = length
+		self.extra_points = 0  # Raise with `advance()` to simulate a new release
+		self.latency_ms = latency_ms
+		self.jitter_ms = jitter_ms
+		self.error_rate = error_rate
+		self.throttle_rate = throttle_rate
+		self._random = random.Random(seed)
+		self._lock = threading.Lock()
+		self.requests = 0
+		self.injected_errors = 0
+
+	def series_ids(self):
+		return [series_name(n) for n in range(1, self.series + 1)]
+
+	def advance(self, points=1):
+		with self._lock:
+			self.extra_points += points
+
+	def _series_number(self, series_id):
+		if not series_id or not series_id.startswith(SERIES_PREFIX):
+			return None
+		try:
+			number = int(series_id[len(SERIES_PREFIX):])
+		except ValueError:
+			return None
+		return number if 1 <= number <= self.series else None
+
+	# 🔹 Decide latency & whether this request fails (one shared seeded RNG → reproducible runs)
+	def fault(self):
+		with self._lock:
+			self.requests += 1
+			delay = max(0.0, self.latency_ms + self._random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+			roll = self._random.random()
+			if roll < self.throttle_rate:
+				self.injected_errors += 1
+				return delay, 429
+			if roll < self.throttle_rate + self.error_rate:
+				self.injected_errors += 1
+				return delay, 500
+			return delay, None
+
+	def observations(self, series_id, observation_start=None, observation_end=None):
+		first_day = END_DATE - timedelta(days=self.length - 1)
+		total = self.length + self.extra_points
+		start_index = 0
+		if observation_start:
+			start_index = max(0, (date.fromisoformat(observation_start) - first_day).days)
+		end_index = total - 1
+		if observation_end:
+			end_index = min(end_index, (date.fromisoformat(observation_end) - first_day).days)
+
+		return [
+			{
+				"realtime_start": END_DATE.isoformat(),
+				"realtime_end": "9999-12-31",
+				"date": (first_day + timedelta(days=index)).isoformat(),
+				"value": synthetic_value(series_id, index),
+			}
+			for index in range(start_index, end_index + 1)
+		]
+
+	def handle(self, path, params):
+		series_id = params.get("series_id")
+		if path == "series/observations":
+			if self._series_number(series_id) is None:
+				return 400, {"error_code": 400, "error_message": "Bad Request.  The series does not exist."}
+			rows = self.observations(series_id, params.get("observation_start"), params.get("observation_end"))
+			# 🔹 Paging like FRED (limit defaults to 100000; used by `auto_update.py backfill`)
+			offset = int(params.get("offset", 0))
+			limit = int(params.get("limit", 100000))
+			return 200, {"count": len(rows), "offset": offset, "limit": limit, "observations": rows[offset:offset + limit]}
+
+		if path == "series/release":
+			number = self._series_number(series_id)
+			if number is None:
+				return 400, {"error_code": 400, "error_message": "Bad Request.  The series does not exist."}
+			return 200, {"releases": [{"id": RELEASE_ID_BASE + number, "name": f"Synthetic Release {number}"}]}
+
+		if path == "release/dates":
+			# 🔹 Every synthetic release publishes on the first business day of each month
+			today = date.today()
+			dates = []
+			month = date(today.year, today.month, 1)
+			while len(dates) < int(params.get("limit", 10)):
+				day = month
+				while day.weekday() >= 5:
+					day += timedelta(days=1)
+				if day >= today - timedelta(days=1):
+					dates.append({"release_id": int(params.get("release_id", 0)), "date": day.isoformat()})
+				month = (month + timedelta(days=32)).replace(day=1)
+			return 200, {"release_dates": dates}
+
+		return 404, {"error_code": 404, "error_message": f"Not Found. Unknown endpoint {path}."}
+
+
+def make_handler(mock):
+	class Handler(BaseHTTPRequestHandler):
+		protocol_version = "HTTP/1.1"  # Keep-alive, like api.stlouisfed.org
+
+		def do_GET(self):
+			url = urlparse(self.path)
+			path = url.path.split("/fred/", 1)[-1].strip("/")
+			params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+			delay, injected = mock.fault()
+			if delay:
+				time.sleep(delay)
+			if injected == 429:
+				self._send(429, {"error_code": 429, "error_message": "Too Many Requests."}, {"Retry-After": "0"})
+			elif injected:
+				self._send(injected, {"error_code": injected, "error_message": "Injected server error."})
+			else:
+				self._send(*mock.handle(path, params))
+
+		def _send(self, status, payload, headers=None):
+			body = json.dumps(payload).encode()
+			self.send_response(status)
+			self.send_header("Content-Type", "application/json")
+			self.send_header("Content-Length", str(len(body)))
+			for key, value in (headers or {}).items():
+				self.send_header(key, value)
+			self.end_headers()
+			self.wfile.write(body)
+
+		def log_message(self, format, *args):
+			pass  # 🔹 Per-request access logs would dominate benchmark output
+
+	return Handler
+
+
+# ✅ Start the server on a background thread; returns (server, base_url)
+def start_server(mock, host="127.0.0.1", port=0):
+	server = ThreadingHTTPServer((host, port), make_handler(mock))
+	server.daemon_threads = True
+	thread = threading.Thread(target=server.serve_forever, name="mock-fred", daemon=True)
+	thread.start()
+	return server, f"http://{host}:{server.server_address[1]}/fred"
+
+
+def add_arguments(parser):
+	parser.add_argument("--series", type=int, default=35, help="Number of synthetic series")
+	parser.add_argument("--length", type=int, default=5000, help="Observations per series")
+	parser.add_argument("--latency-ms", type=float, default=0.0, help="Added latency per request")
+	parser.add_argument("--jitter-ms", type=float, default=0.0, help="Uniform ± jitter on the latency")
+	parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered 500")
+	parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of requests answered 429")
+	parser.add_argument("--seed", type=int, default=0, help="Seed for latency & fault injection")
+
+
+def mock_from_args(args):
+	return MockFred(args.series, args.length, args.latency_ms, args.jitter_ms,
+					args.error_rate, args.throttle_rate, args.seed)
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Local FRED API stand-in")
+	parser.add_argument("--host", default="127.0.0.1")
+	parser.add_argument("--port", type=int, default=8099)
+	add_arguments(parser)
+	args = parser.parse_args()
+
+	server, base_url = start_server(mock_from_args(args), args.host, args.port)
+	print(f"Mock FRED serving {args.series} series × {args.length} observations at {base_url}")
+	try:
+		threading.Event().wait()
+	except KeyboardInterrupt:
+		server.shutdown()
@@ -0,0 +1,56 @@
+# 📌 chart_renderer.py - Runs inside the chart process pool: draws one PNG (+ preview) with matplotlib's Agg backend
+#
+# Kept free of bot imports (DB pool, LINE SDK, registry), and matplotlib is imported on the
+# first render, so the bot process itself never loads it. Spawned workers also re-import the
+# parent's `__main__` module: under gunicorn that is gunicorn's own script, but under
+# `python app_v0_0_7.py` each worker re-runs the bot module's top level (not its
+# `if __name__ == "__main__"` block) before its first chart.
+import os
+import time
+
+IMAGE_SIZE = (10.24, 6.4)  # Inches at IMAGE_DPI → 1024×640 px
+IMAGE_DPI = 100
+PREVIEW_DPI = 24  # → 245×153 px (LINE shows the preview in the chat bubble)
+
+
+def _matplotlib():
+	import matplotlib
+	matplotlib.use("Agg")  # ✅ Headless: no display, no GUI toolkit
+	import matplotlib.dates as mdates
+	import matplotlib.pyplot as plt
+	return mdates, plt
+
+
+def _save(figure, path, dpi):
+	# 🔹 Write under a temporary name and rename, so the web route never serves half a file
+	tmp_path = f"{path}.{os.getpid()}.tmp"
+	figure.savefig(tmp_path, dpi=dpi, format="png")
+	os.replace(tmp_path, path)
+
+
+# ✅ `lines` are (label, dates datetime64[D], values float64); returns seconds spent rendering
+def render(path, preview_path, title, subtitle, y_label, lines):
+	mdates, plt = _matplotlib()
+	start = time.perf_counter()
+	figure, axes = plt.subplots(figsize=IMAGE_SIZE)
+	try:
+		for label, dates, values in lines:
+			axes.plot(dates, values, linewidth=1.6, label=label)
+		if len(lines) > 1:
+			axes.legend(loc="best", frameon=False)
+
+		axes.set_title(title, loc="left", fontsize=15, fontweight="bold", pad=22)  # Room for the subtitle below it
+		axes.text(0, 1.01, subtitle, transform=axes.transAxes, fontsize=10, color="#666666", va="bottom")
+		axes.set_ylabel(y_label)
+		axes.grid(True, color="#dddddd", linewidth=0.8)
+		axes.spines[["top", "right"]].set_visible(False)
+		locator = mdates.AutoDateLocator()
+		axes.xaxis.set_major_locator(locator)
+		axes.xaxis.set_major_formatter(mdates.ConciseDateFormatter(locator))
+		figure.tight_layout()
+
+		_save(figure, preview_path, PREVIEW_DPI)
+		_save(figure, path, IMAGE_DPI)  # 🔹 Last: its existence marks the chart as cached
+	finally:
+		plt.close(figure)
+	return time.perf_counter() - start
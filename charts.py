@@ -0,0 +1,216 @@
+# 📌 charts.py - "CPI 5Y" chart replies: rendered in a process pool, cached on disk by content address
+#
+# An image's file name is a hash of (reply key, window, data version, style), so each chart is
+# rendered once per auto_update.py publish and then served as a static file by the bot's
+# /charts/<name> route. LINE fetches images itself, so CHART_BASE_URL must be the public HTTPS
+# URL of the bot; chart commands are answered with a text notice while it is unset.
+import hashlib
+import logging
+import multiprocessing
+import os
+import re
+import threading
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from linebot.models import ImageSendMessage
+
+import chart_renderer
+import indicator_registry
+import metrics
+import reply_cache
+import series_store
+
+# ✅ Chart settings (override with environment variables)
+CHART_BASE_URL = os.environ.get("CHART_BASE_URL", "").rstrip("/")  # e.g. https://bot.example.com
+CHART_CACHE_DIR = os.environ.get(
+	"CHART_CACHE_DIR",
+	os.path.join(os.path.dirname(os.path.abspath(__file__)), "chart_cache")
+)
+CHART_WORKERS = int(os.environ.get("CHART_WORKERS", "2"))
+CHART_RENDER_TIMEOUT = float(os.environ.get("CHART_RENDER_TIMEOUT", "20"))  # Seconds a reply waits for a render
+CHART_CACHE_MAX_FILES = int(os.environ.get("CHART_CACHE_MAX_FILES", "2000"))  # Least recently used images pruned beyond this
+
+STYLE_VERSION = 1  # 🔹 Bump when the chart layout changes so cached images are re-rendered
+MAX_YEARS = 50
+
+NOT_ENABLED = "Charts are not enabled on this server."
+NO_DATA = "No data available to chart for {key}."
+RENDER_FAILED = "⚠️ Sorry, the chart could not be drawn right now. Please try again later."
+
+# ✅ "CPI 5Y", "UR 18M", "SP500 MAX"
+COMMAND_PATTERN = re.compile(r"^([A-Z0-9_]+)\s+(?:(\d{1,3})\s*([YM])|MAX)$")
+
+ChartRequest = namedtuple("ChartRequest", ["key", "months", "label"])  # months None = full history
+RenderJob = namedtuple("RenderJob", ["name", "path", "preview_path", "title", "subtitle", "y_label", "lines"])
+
+_pool = None
+_pool_lock = threading.Lock()
+_in_flight = {}  # name → Future, so concurrent requests for one chart render it once
+_in_flight_lock = threading.RLock()  # Re-entrant: a finished future runs its callback immediately
+
+
+def parse_command(user_message):
+	match = COMMAND_PATTERN.match(user_message)
+	if not match:
+		return None
+	key, count, unit = match.groups()
+	if count is None:
+		return ChartRequest(key, None, "MAX")
+	months = int(count) * (12 if unit == "Y" else 1)
+	if not 0 < months <= MAX_YEARS * 12:
+		return None
+	return ChartRequest(key, months, f"{count}{unit}")
+
+
+def _get_pool():
+	global _pool
+	with _pool_lock:
+		if _pool is None:
+			# 🔹 spawn: the bot is multi-threaded, and forking it with locks held is unsafe.
+			#    Workers re-import the parent's __main__, so they start slower under `python app_v0_0_7.py`
+			_pool = ProcessPoolExecutor(max_workers=CHART_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+	return _pool
+
+
+def image_name(key, label, version):
+	digest = hashlib.sha256(f"{key}|{label}|{version}|{STYLE_VERSION}".encode("utf-8")).hexdigest()
+	return digest[:32]
+
+
+# ✅ The chart's lines from the in-memory series store (YoY % for yoy_growth indicators, like the text reply)
+def chart_lines(info, months):
+	registry = indicator_registry.get_registry()
+	members = [registry.get(key) for key in info.components] if info.components else [info]
+	lines = []
+	for member in members:
+		series = series_store.series_store.get(member.indicator_id) if member else None
+		if series is None or not len(series.dates):
+			continue
+		dates, values = series
+		if member.format_type == "yoy_growth":
+			dates, values = series_store.yoy_growth(series, len(dates))
+			dates, values = dates[::-1], values[::-1]  # Oldest first
+		if months is not None and len(dates):
+			keep = dates >= series_store.months_earlier(dates[-1:], months)[0]
+			dates, values = dates[keep], values[keep]
+		if len(dates):
+			lines.append((member.name if info.components else info.abbreviation, dates, values))
+	return lines
+
+
+def _message(name):
+	return ImageSendMessage(
+		original_content_url=f"{CHART_BASE_URL}/charts/{name}.png",
+		preview_image_url=f"{CHART_BASE_URL}/charts/{name}_preview.png",
+	)
+
+
+def plan(request):
+	"""
+	Returns (reply, job). `reply` is the ImageSendMessage (or a text reply when the chart
+	cannot be made); `job` is None when the image is already cached, otherwise it must be
+	rendered with `submit(job)` before the reply is sent.
+	"""
+	if not CHART_BASE_URL:
+		metrics.inc("chart_requests_total", outcome="disabled")
+		return NOT_ENABLED, None
+
+	info = indicator_registry.get_registry().get(request.key)
+	version = reply_cache.current_version(request.key, info.components)
+	name = image_name(request.key, request.label, version)
+	path = os.path.join(CHART_CACHE_DIR, f"{name}.png")
+	preview_path = os.path.join(CHART_CACHE_DIR, f"{name}_preview.png")
+	if _touch(path, preview_path):
+		metrics.inc("chart_requests_total", outcome="cached")
+		return _message(name), None
+
+	lines = chart_lines(info, request.months) if series_store.series_store.loaded else []
+	if not lines:
+		metrics.inc("chart_requests_total", outcome="no_data")
+		return NO_DATA.format(key=request.key), None
+
+	last_date = max(line[1][-1] for line in lines).item()
+	y_label = "YoY %" if info.format_type == "yoy_growth" else info.unit
+	job = RenderJob(
+		name, path, preview_path,
+		title=f"{info.name} ({request.label})",
+		subtitle=f"Latest: {last_date:%Y-%m-%d} · Source: FRED",
+		y_label=y_label,
+		lines=lines,
+	)
+	return _message(name), job
+
+
+# ✅ Render in the process pool (deduplicated by image name); returns a concurrent.futures.Future
+def submit(job):
+	with _in_flight_lock:
+		future = _in_flight.get(job.name)
+		if future is None:
+			os.makedirs(CHART_CACHE_DIR, exist_ok=True)
+			future = _get_pool().submit(
+				chart_renderer.render, job.path, job.preview_path, job.title, job.subtitle, job.y_label, job.lines
+			)
+			_in_flight[job.name] = future
+			future.add_done_callback(lambda done: _finished(job.name, done))
+	return future
+
+
+def _finished(name, future):
+	with _in_flight_lock:
+		_in_flight.pop(name, None)
+	if future.exception() is not None:
+		metrics.inc("chart_requests_total", outcome="failed")
+		metrics.log_event("chart_render_failed", level=logging.ERROR, image=name, error=repr(future.exception()))
+		return
+	metrics.inc("chart_requests_total", outcome="rendered")
+	metrics.observe("chart_render_seconds", future.result())
+	prune()
+
+
+# ✅ Cache hit: both files exist; their mtime is bumped so prune() drops least recently used images
+def _touch(*paths):
+	try:
+		for path in paths:
+			os.utime(path)
+	except OSError:
+		return False  # 🔹 A missing preview (or image) is re-rendered
+	return True
+
+
+# 🔹 Superseded data versions leave old images behind: keep the CHART_CACHE_MAX_FILES most
+#    recently used images, removing each image together with its preview
+def prune():
+	try:
+		entries = [entry for entry in os.scandir(CHART_CACHE_DIR) if entry.name.endswith(".png")]
+	except OSError:
+		return
+	images = {}
+	for entry in entries:
+		try:
+			used = entry.stat().st_mtime
+		except OSError:
+			continue
+		name = entry.name[:-len(".png")].removesuffix("_preview")
+		paths, last_used = images.get(name, ([], 0.0))
+		images[name] = (paths + [entry.path], max(last_used, used))
+	if len(images) <= CHART_CACHE_MAX_FILES:
+		return
+	by_use = sorted(images.values(), key=lambda image: image[1])
+	for paths, _ in by_use[:len(images) - CHART_CACHE_MAX_FILES]:
+		for path in paths:
+			try:
+				os.remove(path)
+			except OSError:
+				pass
+
+
+# ✅ Blocking version for the threaded server: the reply to send (waits for the render if needed)
+def chart_reply(request):
+	reply, job = plan(request)
+	if job is not None:
+		try:
+			submit(job).result(timeout=CHART_RENDER_TIMEOUT)
+		except Exception:  # Timeout or render error (already logged by _finished)
+			return RENDER_FAILED
+	return reply
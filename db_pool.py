@@ -0,0 +1,215 @@
+# 📌 db_pool.py - Shared MySQL connection pool for the bot, auto_update & notifier
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+
+import mysql.connector
+from mysql.connector import pooling
+from credentials import DB_CONFIG  # ✅ Import DB_CONFIG
+import metrics  # ✅ Checkout & per-query latency histograms
+
+# ✅ Pool settings (override with environment variables)
+POOL_NAME = os.environ.get("DB_POOL_NAME", "macro_line_bot")
+POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "5"))
+POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "5"))  # Seconds to wait for a free connection
+DATA_WRITE_LOCK_TIMEOUT = int(os.environ.get("DATA_WRITE_LOCK_TIMEOUT", "30"))  # Seconds a writer waits for its turn
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# 🔹 Pool statistics (read with `pool_stats()`)
+_stats = {
+	"checkouts": 0,
+	"returns": 0,
+	"in_use": 0,
+	"waits": 0,
+	"timeouts": 0,
+	"health_check_failures": 0,
+	"reconnects": 0,
+	"total_wait_seconds": 0.0,
+}
+_stats_lock = threading.Lock()
+
+
+def _bump(key, amount=1):
+	with _stats_lock:
+		_stats[key] += amount
+
+
+# ✅ Create the pool once per process (safe to call repeatedly)
+def init_pool(pool_size=None):
+	global _pool
+	with _pool_lock:
+		if _pool is None:
+			_pool = pooling.MySQLConnectionPool(
+				pool_name=POOL_NAME,
+				pool_size=pool_size or POOL_SIZE,
+				pool_reset_session=True,
+				**DB_CONFIG
+			)
+	return _pool
+
+
+# ✅ Close idle connections & forget the pool; the next checkout opens a new one.
+#    gunicorn.conf.py calls this in the master before forking so workers never share sockets.
+def close_pool():
+	global _pool
+	with _pool_lock:
+		if _pool is not None:
+			_pool._remove_connections()
+			_pool = None
+
+
+# 🔹 Low-cardinality label for a statement: verb + first table ("SELECT indicator_snapshots")
+_TABLE_PATTERN = re.compile(r"\b(?:FROM|INTO|UPDATE|TABLE)\s+`?(\w+)", re.IGNORECASE)
+
+
+@lru_cache(maxsize=512)
+def statement_label(sql):
+	words = sql.split(None, 1)
+	verb = words[0].upper() if words else "?"
+	table = _TABLE_PATTERN.search(sql)
+	return f"{verb} {table.group(1)}" if table else verb
+
+
+class InstrumentedCursor:
+	"""Cursor wrapper that records every execute() in the `db_query_seconds` histogram."""
+
+	def __init__(self, cursor):
+		self._cursor = cursor
+
+	def __getattr__(self, name):
+		return getattr(self._cursor, name)
+
+	def __iter__(self):
+		return iter(self._cursor)
+
+	def execute(self, operation, params=None, *args, **kwargs):
+		with metrics.timer("db_query_seconds", query=statement_label(operation)):
+			return self._cursor.execute(operation, params, *args, **kwargs)
+
+	def executemany(self, operation, seq_params, *args, **kwargs):
+		with metrics.timer("db_query_seconds", query=statement_label(operation)):
+			return self._cursor.executemany(operation, seq_params, *args, **kwargs)
+
+
+class PooledConnection:
+	"""
+	Thin wrapper around a pooled MySQL connection.
+
+	Behaves like the connection returned by `mysql.connector.connect()`, but
+	`close()` hands the connection back to the pool instead of closing the socket.
+	"""
+
+	def __init__(self, conn):
+		self._conn = conn
+		self._returned = False
+
+	def __getattr__(self, name):
+		return getattr(self._conn, name)
+
+	def cursor(self, *args, **kwargs):
+		return InstrumentedCursor(self._conn.cursor(*args, **kwargs))
+
+	def close(self):
+		if self._returned:
+			return
+		self._returned = True
+		try:
+			self._conn.close()  # ✅ Returns the connection to the pool
+		finally:
+			_bump("returns")
+			_bump("in_use", -1)
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, exc, tb):
+		self.close()
+
+
+# ✅ Check a connection out of the pool, waiting up to `timeout` seconds
+def get_connection(timeout=None):
+	pool = init_pool()
+	timeout = POOL_TIMEOUT if timeout is None else timeout
+	start = time.monotonic()
+	waited = False
+
+	while True:
+		try:
+			conn = pool.get_connection()
+			break
+		except pooling.PoolError:
+			# 🔹 Pool exhausted: back off briefly and retry until the timeout
+			if time.monotonic() - start >= timeout:
+				_bump("timeouts")
+				raise
+			waited = True
+			time.sleep(0.01)
+
+	if waited:
+		_bump("waits")
+	_bump("total_wait_seconds", time.monotonic() - start)
+
+	# ✅ Health check on checkout: ping the server & reconnect once if the socket died
+	try:
+		conn.ping(reconnect=False)
+	except mysql.connector.Error:
+		_bump("health_check_failures")
+		try:
+			conn.reconnect(attempts=2, delay=0.1)
+			_bump("reconnects")
+		except mysql.connector.Error:
+			conn.close()
+			raise
+
+	_bump("checkouts")
+	_bump("in_use")
+	metrics.observe("db_checkout_seconds", time.monotonic() - start)
+	return PooledConnection(conn)
+
+
+# ✅ Context manager for short-lived checkouts
+@contextmanager
+def connection(timeout=None):
+	conn = get_connection(timeout)
+	try:
+		yield conn
+	finally:
+		conn.close()
+
+
+# ✅ Serializes writers of indicator_data / indicator_changes (auto_update, scheduler, backfill,
+#    storage_layout rollup) with a named lock per database, held from the first INSERT to the commit.
+#    AUTO_INCREMENT change ids are allocated at insert time: without the lock a transaction holding
+#    id N could commit after N+1, and a consumer that already moved past N+1 would never see N.
+@contextmanager
+def data_write_lock(db, cursor, timeout=None):
+	timeout = DATA_WRITE_LOCK_TIMEOUT if timeout is None else timeout
+	cursor.execute("SELECT GET_LOCK(CONCAT(DATABASE(), ':indicator_data_writes'), %s)", (timeout,))
+	if not cursor.fetchone()[0]:
+		raise mysql.connector.errors.OperationalError(msg="Timed out waiting for the indicator_data write lock")
+	try:
+		yield
+	except BaseException:
+		db.rollback()  # 🔹 Never leave allocated change ids uncommitted once the lock is released
+		raise
+	finally:
+		try:
+			cursor.execute("SELECT RELEASE_LOCK(CONCAT(DATABASE(), ':indicator_data_writes'))")
+			cursor.fetchone()
+		except mysql.connector.Error:
+			pass  # The server releases it when the session ends
+
+
+# ✅ Snapshot of pool statistics
+def pool_stats():
+	with _stats_lock:
+		stats = dict(_stats)
+	stats["pool_name"] = POOL_NAME
+	stats["pool_size"] = _pool.pool_size if _pool is not None else POOL_SIZE
+	stats["initialized"] = _pool is not None
+	return stats
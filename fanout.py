@@ -0,0 +1,117 @@
+# 📌 fanout.py - Multicast push notifications to many subscribers (batched, concurrent, retried)
+import logging
+import os
+import random
+import time
+import uuid
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from linebot.exceptions import LineBotApiError
+
+import metrics
+from rate_limiter import RateLimiter
+
+# ✅ Fan-out settings (override with environment variables)
+MULTICAST_BATCH_SIZE = 500  # LINE's maximum recipients per multicast call
+FANOUT_MAX_WORKERS = int(os.environ.get("FANOUT_MAX_WORKERS", "8"))
+FANOUT_RATE_LIMIT = float(os.environ.get("FANOUT_RATE_LIMIT", "100"))  # Multicast calls per second
+FANOUT_MAX_RETRIES = int(os.environ.get("FANOUT_MAX_RETRIES", "4"))
+FANOUT_BACKOFF_BASE = float(os.environ.get("FANOUT_BACKOFF_BASE", "0.5"))
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+RETRY_KEY_NAMESPACE = uuid.UUID("6f1f4c52-2a57-4a8e-9a53-6d0c3c6c7d1e")
+
+FanoutReport = namedtuple("FanoutReport", [
+	"recipients", "delivered", "batches", "failed_batches", "retries", "seconds",
+])
+
+
+# ✅ Active subscriber IDs
+def load_subscribers(cursor):
+	cursor.execute("SELECT user_id FROM subscribers WHERE active = 1 ORDER BY user_id")
+	return [row[0] for row in cursor.fetchall()]
+
+
+def chunked(items, size):
+	return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+# ✅ Stable retry key per batch: LINE drops a repeated key, so a retry never double-sends.
+#    Only safe when a retry sends the same users in the same batch (auto_send_if_updated.py
+#    stores its planned batches instead of re-deriving them)
+def batch_retry_key(seed, index):
+	if seed is None:
+		return str(uuid.uuid4())
+	return str(uuid.uuid5(RETRY_KEY_NAMESPACE, f"{seed}:{index}"))
+
+
+def _send_batch(line_bot_api, limiter, user_ids, messages, retry_key):
+	retries = 0
+	for attempt in range(FANOUT_MAX_RETRIES + 1):
+		limiter.acquire()
+		try:
+			with metrics.timer("line_api_seconds", call="multicast"):
+				line_bot_api.multicast(user_ids, messages, retry_key=retry_key)
+			return True, retries
+		except LineBotApiError as e:
+			if e.status_code == 409:
+				return True, retries  # 🔹 Same retry key already accepted by LINE
+			metrics.inc("line_api_errors_total", call="multicast", status=e.status_code)
+			if e.status_code not in RETRY_STATUS_CODES or attempt == FANOUT_MAX_RETRIES:
+				metrics.log_event("multicast_batch_failed", level=logging.ERROR, status=e.status_code,
+					error=e.error.message if e.error else str(e))
+				return False, retries
+		except Exception as e:  # Connection errors, timeouts
+			if attempt == FANOUT_MAX_RETRIES:
+				metrics.log_event("multicast_batch_failed", level=logging.ERROR, error=str(e))
+				return False, retries
+
+		retries += 1
+		time.sleep(FANOUT_BACKOFF_BASE * (2 ** attempt) * (1 + random.random()))
+	return False, retries
+
+
+# ✅ Send pre-planned (retry_key, user_ids, messages) batches in parallel; [(ok, retries)] in batch order
+def send_batches(line_bot_api, batches, max_workers=None, rate_limit=None):
+	limiter = RateLimiter(rate_limit or FANOUT_RATE_LIMIT, per=1.0)
+	with ThreadPoolExecutor(max_workers=max_workers or FANOUT_MAX_WORKERS,
+							thread_name_prefix="fanout") as executor:
+		futures = [
+			executor.submit(_send_batch, line_bot_api, limiter, user_ids, messages, retry_key)
+			for retry_key, user_ids, messages in batches
+		]
+		return [future.result() for future in futures]
+
+
+def build_report(batch_user_ids, outcomes, seconds):
+	return FanoutReport(
+		recipients=sum(len(user_ids) for user_ids in batch_user_ids),
+		delivered=sum(len(user_ids) for user_ids, (ok, _) in zip(batch_user_ids, outcomes) if ok),
+		batches=len(batch_user_ids),
+		failed_batches=sum(1 for ok, _ in outcomes if not ok),
+		retries=sum(retries for _, retries in outcomes),
+		seconds=seconds,
+	)
+
+
+# ✅ Send `messages` to every user ID, up to 500 per multicast, batches in parallel
+def multicast_all(line_bot_api, user_ids, messages, retry_key_seed=None,
+				  max_workers=None, rate_limit=None, batch_size=MULTICAST_BATCH_SIZE):
+	start = time.perf_counter()
+	batches = chunked(list(user_ids), batch_size)
+	outcomes = send_batches(
+		line_bot_api,
+		[(batch_retry_key(retry_key_seed, index), batch, messages) for index, batch in enumerate(batches)],
+		max_workers=max_workers, rate_limit=rate_limit,
+	)
+	return build_report(batches, outcomes, time.perf_counter() - start)
+
+
+def format_report(report):
+	rate = report.delivered / report.seconds if report.seconds > 0 else 0.0
+	return (
+		f"📨 Fan-out: {report.delivered}/{report.recipients} recipients in {report.batches} batches "
+		f"({report.failed_batches} failed, {report.retries} retries) in {report.seconds:.2f}s "
+		f"→ {rate:,.0f} recipients/s"
+	)
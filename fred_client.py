@@ -0,0 +1,112 @@
+# 📌 fred_client.py - Shared FRED API client (keep-alive session, rate limit, retries, parallel fetch)
+import os
+import random
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from rate_limiter import RateLimiter
+
+# ✅ Client settings (override with environment variables)
+FRED_API_URL = os.environ.get("FRED_API_URL", "https://api.stlouisfed.org/fred")
+FRED_MAX_WORKERS = int(os.environ.get("FRED_MAX_WORKERS", "8"))
+FRED_RATE_LIMIT = float(os.environ.get("FRED_RATE_LIMIT", "120"))  # Requests per minute (FRED's per-key quota)
+FRED_MAX_RETRIES = int(os.environ.get("FRED_MAX_RETRIES", "4"))
+FRED_BACKOFF_BASE = float(os.environ.get("FRED_BACKOFF_BASE", "0.5"))  # Seconds, doubled per retry
+FRED_TIMEOUT = float(os.environ.get("FRED_TIMEOUT", "30"))
+
+# 🔹 Responses worth retrying (rate limited or transient server errors)
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# ✅ Result of fetching one series in `fetch_many()`
+FetchResult = namedtuple("FetchResult", ["key", "data", "seconds", "error"])
+
+_session = None
+_session_lock = threading.Lock()
+_rate_limiter = RateLimiter(FRED_RATE_LIMIT, per=60.0, burst=max(1, FRED_MAX_WORKERS))
+
+
+class FredAPIError(Exception):
+	pass
+
+
+# ✅ One keep-alive session per process, sized for the worker pool
+def get_session():
+	global _session
+	with _session_lock:
+		if _session is None:
+			session = requests.Session()
+			adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(FRED_MAX_WORKERS, 1))
+			session.mount("https://", adapter)
+			session.mount("http://", adapter)
+			_session = session
+	return _session
+
+
+# ✅ GET a FRED endpoint as JSON, with rate limiting and exponential backoff
+def get_json(path, params):
+	url = f"{FRED_API_URL.rstrip('/')}/{path.lstrip('/')}"
+	params = dict(params, file_type="json")
+	session = get_session()
+
+	for attempt in range(FRED_MAX_RETRIES + 1):
+		_rate_limiter.acquire()
+		try:
+			response = session.get(url, params=params, timeout=FRED_TIMEOUT)
+		except (requests.ConnectionError, requests.Timeout) as err:
+			error = err
+			retry_after = None
+		else:
+			if response.status_code not in RETRY_STATUS_CODES:
+				if response.status_code >= 400:
+					raise FredAPIError(f"{response.status_code} for {path}: {response.text[:200]}")
+				return response.json()
+			error = FredAPIError(f"{response.status_code} for {path}")
+			retry_after = response.headers.get("Retry-After")
+
+		if attempt == FRED_MAX_RETRIES:
+			raise error
+
+		# 🔹 Honor Retry-After when FRED sends it, otherwise back off with jitter
+		try:
+			delay = float(retry_after)
+		except (TypeError, ValueError):
+			delay = FRED_BACKOFF_BASE * (2 ** attempt) * (1 + random.random())
+		time.sleep(delay)
+
+
+# ✅ Run `fetch(*args)` for every job concurrently; jobs are (key, args) pairs
+def fetch_many(jobs, fetch, max_workers=None):
+	max_workers = max_workers or FRED_MAX_WORKERS
+
+	def run(job):
+		key, args = job
+		start = time.perf_counter()
+		try:
+			data = fetch(*args)
+			error = None
+		except Exception as err:  # ✅ One failing series must not abort the whole run
+			data = None
+			error = err
+		return FetchResult(key, data, time.perf_counter() - start, error)
+
+	with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fred") as executor:
+		return list(executor.map(run, jobs))
+
+
+# ✅ Per-series timing report, slowest first
+def format_timing_report(results):
+	lines = ["⏱️ FRED fetch timing (slowest first):"]
+	for result in sorted(results, key=lambda r: r.seconds, reverse=True):
+		if result.error is not None:
+			status = f"ERROR {result.error}"
+		else:
+			status = f"{len(result.data)} obs"
+		lines.append(f"  {result.key:<12} {result.seconds:7.2f}s  {status}")
+	total = sum(r.seconds for r in results)
+	lines.append(f"  {'(sum)':<12} {total:7.2f}s across {len(results)} series")
+	return "\n".join(lines)
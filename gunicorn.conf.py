@@ -0,0 +1,109 @@
+# 📌 gunicorn.conf.py - Multi-process serving: pre-forked workers sharing one preloaded series store
+#
+# Run: gunicorn                       (Flask app, app_v0_0_7.py, on threaded workers)
+#      BOT_SERVER=async gunicorn      (app_async.py on uvicorn workers)
+#
+# The master imports the bot, loads the indicator registry and every series into memory
+# once, then forks WEB_CONCURRENCY workers. The NumPy arrays are never mutated after they
+# are published, so workers share those pages copy-on-write instead of each one reading
+# indicator_data. Set REPLY_CACHE_URL to share formatted replies between workers too.
+#
+# When auto_update.py publishes (DATA_VERSION_FILE changes), the master applies the change
+# log to its own copy and sends itself SIGHUP: gunicorn forks fresh workers from the updated
+# state and lets the old ones finish their requests and queued replies (graceful reload).
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+import time
+
+import mysql.connector
+
+import db_pool
+import metrics
+import reply_cache
+import series_store
+import startup
+
+# ✅ Deployment settings (override with environment variables)
+BOT_SERVER = os.environ.get("BOT_SERVER", "sync")  # sync = app_v0_0_7.py, async = app_async.py
+RELOAD_ON_PUBLISH = os.environ.get("RELOAD_ON_PUBLISH", "1") == "1"
+RELOAD_MIN_INTERVAL = float(os.environ.get("RELOAD_MIN_INTERVAL", "30"))  # Seconds between publish-triggered reloads
+
+# 🔹 gunicorn settings
+bind = f"0.0.0.0:{os.environ.get('PORT', '8080')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+graceful_timeout = int(os.environ.get("GRACEFUL_TIMEOUT", "30"))
+preload_app = True  # ✅ Import (and warm up) once in the master; workers inherit it
+if BOT_SERVER == "async":
+	wsgi_app = "app_async:app"
+	worker_class = "uvicorn.workers.UvicornWorker"
+else:
+	wsgi_app = "app_v0_0_7:app"
+	worker_class = "gthread"
+	threads = int(os.environ.get("GUNICORN_THREADS", "4"))
+
+
+def _data_version_mtime():
+	try:
+		return os.stat(reply_cache.DATA_VERSION_FILE).st_mtime_ns
+	except OSError:
+		return None
+
+
+# 🔹 Runs in a master thread: only stat() & kill(), so it never holds a lock a fork could copy
+def _watch_data_version():
+	last_mtime = _data_version_mtime()
+	last_reload = time.monotonic()
+	while True:
+		time.sleep(1)
+		mtime = _data_version_mtime()
+		if mtime == last_mtime or time.monotonic() - last_reload < RELOAD_MIN_INTERVAL:
+			continue  # Publishes inside the interval are picked up by the next check after it
+		last_mtime, last_reload = mtime, time.monotonic()
+		os.kill(os.getpid(), signal.SIGHUP)
+
+
+# ----------------------------------------------------------------------------
+# Server hooks
+
+def on_starting(server):
+	metrics.configure_logging()
+	startup.warm_up()  # ✅ Registry, series store & formatted replies: loaded once, inherited by every worker
+	db_pool.close_pool()  # 🔹 Workers open their own connections
+	metrics.log_event("master_warm", sample=False, server=BOT_SERVER, workers=workers,
+					  load_seconds=series_store.series_store.load_seconds)
+
+
+def when_ready(server):
+	if RELOAD_ON_PUBLISH:
+		threading.Thread(target=_watch_data_version, name="data-version-watch", daemon=True).start()
+
+
+# ✅ Called in the master on SIGHUP, before the new workers are forked
+def on_reload(server):
+	try:
+		changes = series_store.series_store.catch_up()
+	except mysql.connector.Error as err:
+		# 🔹 Reload anyway: new workers catch up from the change log on their own
+		changes = None
+		metrics.log_event("series_store_refresh_error", level=logging.ERROR, error=str(err))
+	db_pool.close_pool()
+	metrics.log_event("workers_reloading", level=logging.WARNING, changes=changes)
+
+
+def pre_fork(server, worker):
+	db_pool.close_pool()  # No-op unless something in the master checked out a connection since
+
+
+# ✅ Runs in each worker before it accepts connections: open its DB pool (the rest is inherited)
+def post_worker_init(worker):
+	if BOT_SERVER != "async":  # (app_async.py warms up in its lifespan)
+		startup.warm_up_or_retry()
+
+
+def worker_exit(server, worker):
+	if BOT_SERVER != "async":  # (app_async.py waits for its in-flight tasks in its lifespan)
+		import app_v0_0_7
+		app_v0_0_7.event_queue.drain(graceful_timeout / 2)  # ✅ Send replies already acknowledged to LINE
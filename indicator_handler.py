@@ -1,342 +1,297 @@
-# 📌 indicator_handler.py - Handles SQL queries for macroeconomic indicators
+# 📌 indicator_handler.py - Builds indicator replies from raw MySQL rows
+import logging
+import time
 import mysql.connector
 from linebot.models import TextSendMessage
-
-# ✅ Define reusable SQL query templates for different data formats
-query_templates = {
-	"yoy_growth": """
-		SELECT i.indicator_name, i.category, i.note, 
-		recent.record_date AS recent_date,
-		CONCAT(ROUND(((recent.value - past.value) / past.value) * 100, 2), '%') AS formatted_value
-		FROM indicator_data recent
-		JOIN indicator_data past
-			ON recent.indicator_id = past.indicator_id
-			AND DATE_SUB(recent.record_date, INTERVAL 12 MONTH) = past.record_date
-		JOIN indicators i ON recent.indicator_id = i.indicator_id
-		WHERE i.abbreviation = %s
-		ORDER BY recent.record_date DESC
-		LIMIT 15;
-	""",
-	"percentage": """
-		SELECT i.indicator_name, i.category, i.note, d.record_date, 
-		CONCAT(ROUND(d.value, 2), '%') AS formatted_value
-		FROM indicator_data d
-		JOIN indicators i ON d.indicator_id = i.indicator_id
-		WHERE i.abbreviation = %s
-		ORDER BY d.record_date DESC
-		LIMIT 15;
-	""",
-	"monetary": """
-		SELECT i.indicator_name, i.category, i.note, d.record_date, 
-		CONCAT('$', ROUND(d.value, 2)) AS formatted_value
-		FROM indicator_data d
-		JOIN indicators i ON d.indicator_id = i.indicator_id
-		WHERE i.abbreviation = %s
-		ORDER BY d.record_date DESC
-		LIMIT 15;
-	""",
-	"large_numbers": """
-		SELECT i.indicator_name, i.category, i.note, d.record_date, 
-		FORMAT(d.value, 0) AS formatted_value
-		FROM indicator_data d
-		JOIN indicators i ON d.indicator_id = i.indicator_id
-		WHERE i.abbreviation = %s
-		ORDER BY d.record_date DESC
-		LIMIT 15;
-	""",
-	"hours": """
-		SELECT i.indicator_name, i.category, i.note, d.record_date, 
-		CONCAT(ROUND(d.value, 1), ' hrs') AS formatted_value
-		FROM indicator_data d
-		JOIN indicators i ON d.indicator_id = i.indicator_id
-		WHERE i.abbreviation = %s
-		ORDER BY d.record_date DESC
-		LIMIT 15;
-	""",
-	"decimal_2": """
-		SELECT i.indicator_name, i.category, i.note, d.record_date, 
-		ROUND(d.value, 2) AS formatted_value
-		FROM indicator_data d
-		JOIN indicators i ON d.indicator_id = i.indicator_id
-		WHERE i.abbreviation = %s
-		ORDER BY d.record_date DESC
-		LIMIT 15;
-	""",
-	"no_decimals": """
-		SELECT i.indicator_name, i.category, i.note, d.record_date, 
-		FORMAT(d.value * 1000, 0) AS formatted_value
-		FROM indicator_data d
-		JOIN indicators i ON d.indicator_id = i.indicator_id
-		WHERE i.abbreviation = %s
-		ORDER BY d.record_date DESC
-		LIMIT 15;
-	""",
-	"billions": """
-		SELECT i.indicator_name, i.category, i.note, d.record_date, 
-		CONCAT('$', ROUND(d.value / 1000, 2), ' B') AS formatted_value
-		FROM indicator_data d
-		JOIN indicators i ON d.indicator_id = i.indicator_id
-		WHERE i.abbreviation = %s
-		ORDER BY d.record_date DESC
-		LIMIT 15;
+import db_pool  # ✅ Shared connection pool
+import reply_cache  # ✅ Formatted-reply cache (invalidated by auto_update.py)
+import snapshots  # ✅ Replies precomputed by auto_update.py
+import indicator_registry  # ✅ Abbreviation → format type / reply handler
+import value_formatter  # ✅ Shared Python-side formatting rules
+import metrics  # ✅ Hot-path timers & counters
+import series_store  # ✅ In-memory arrays for every indicator (replies without a DB round-trip)
+import storage_layout  # ✅ Archive rows for rolled-up indicator_data partitions
+
+# ✅ One raw-data query for every indicator; formatting happens in value_formatter
+RAW_SERIES_QUERY = """
+	SELECT record_date, value
+	FROM indicator_data
+	WHERE indicator_id = %s
+	ORDER BY record_date DESC
+	LIMIT %s;
+"""
+
+# 🔹 Observations per year by `indicators.frequency` (extra rows needed for YoY & 52-week stats)
+ROWS_PER_YEAR = {"D": 366, "W": 53, "M": 12, "Q": 4, "Y": 1}
+
+
+JOLTS_HISTORY_POINTS = 24  # Months shown per JOLTS component
+
+
+# ✅ Composite pivot: the latest dates any member has, one value column per member (NULL where missing);
+#    params are the member ids twice (columns, then the IN list) and the row limit
+def composite_query(member_count):
+	columns = ", ".join(["MAX(CASE WHEN indicator_id = %s THEN value END)"] * member_count)
+	return f"""
+		SELECT record_date, {columns}
+		FROM indicator_data
+		WHERE indicator_id IN ({', '.join(['%s'] * member_count)})
+		GROUP BY record_date
+		ORDER BY record_date DESC
+		LIMIT %s;
 	"""
-}
 
 
-# Function to Fetch Indicator Info and Historical Data
+# ✅ Latest raw (record_date, DECIMAL value) rows for one indicator, newest first
+def fetch_series(cursor, indicator_id, limit):
+	cursor.execute(RAW_SERIES_QUERY, (indicator_id, limit))
+	rows = cursor.fetchall()
+	if len(rows) < limit:
+		# 🔹 Short of `limit`: older points may sit in archive rows (live rows win on shared dates)
+		live = {record_date for record_date, _ in rows}
+		archived = storage_layout.read_archive(cursor, [indicator_id]).get(indicator_id, [])
+		rows = sorted(rows + [point for point in archived if point[0] not in live], reverse=True)[:limit]
+	return rows
+
+
+# ✅ Shared reply header
+def format_header(info):
+	note = info.note if info.note else "No description available."
+	return f"📊 {info.name}\n📌 Category: {info.category}\n📝 {note}\n\n"
+
+
+# Function to Fetch Indicator Info and Historical Data (served from the reply cache when possible)
 def get_indicator_info_and_history(user_input):
+	response, version = reply_from_memory(user_input)
+	if response is not None:
+		return response
+
+	# ✅ Then the snapshot row (single primary-key lookup), then the live queries
+	texts = snapshots.read_reply(user_input)
+	if texts is not None:
+		metrics.inc("reply_source_total", source="snapshot")
+		response = messages_from_texts(texts)
+	else:
+		metrics.inc("reply_source_total", source="live")
+		response = build_reply(user_input)
+
+	remember_reply(user_input, response, version)
+	return response
+
+
+# ✅ Reply cache → in-memory series store, without I/O; returns (reply or None, data version)
+def reply_from_memory(user_input):
+	# 🔹 Capture the data version *before* reading so a concurrent publish can't be masked
+	info = indicator_registry.get_registry().get(user_input)
+	version = reply_cache.current_version(user_input, info.components if info else None)
+	cached = reply_cache.reply_cache.get(user_input, version)
+	if cached is not None:
+		metrics.inc("reply_source_total", source="cache")
+		return cached, version
+
+	response = build_reply_from_store(info)
+	if response is not None:
+		metrics.inc("reply_source_total", source="store")
+		reply_cache.reply_cache.put(user_input, response, version)
+	return response, version
+
+
+def remember_reply(user_input, response, version):
+	# 🔹 Never cache transient database errors
+	if not is_error_reply(response):
+		reply_cache.reply_cache.put(user_input, response, version)
+
+
+# ✅ Stored message texts → reply (one text stays a plain string, like build_reply's result)
+def messages_from_texts(texts):
+	return [TextSendMessage(text=text) for text in texts] if len(texts) > 1 else texts[0]
+
+
+def is_error_reply(response):
+	return isinstance(response, str) and response.startswith("⚠️")
+
+
+# ✅ Reply as a list of message texts for snapshot storage (None on database errors)
+def build_reply_texts(user_input):
+	response = build_reply(user_input)
+	if is_error_reply(response):
+		return None
+	if isinstance(response, list):
+		return [message.text for message in response]
+	return [response]
+
+
+# ----------------------------------------------------------------------------
+# Reply layouts (shared by the live queries and the in-memory series store)
+
+# ✅ JOLTS: explanation + one table per component; rows are (date, openings, quits, layoffs) newest first
+def format_jolts_reply(indicator_name, category, note, rows):
+	if not rows:
+		return [TextSendMessage(text="No JOLTS data available.")]
+
+	note = note if note else "No description available."
+
+	# 📊 First Message: JOLTS Explanation
+	messages = [
+		TextSendMessage(text=(
+			f"📊 {indicator_name}\n📌 Category: {category}\n📝 {note}\n\n"
+			"🔹 Openings high = Strong labor demand\n"
+			"🔹 Quits high & Layoffs low = Strong labor market\n"
+			"🔹 Layoffs high & Openings low = Weak labor market"
+		))
+	]
+
+	# 📈 Second Message: Job Openings
+	job_openings_msg = "📈 **Job Openings (Unit: Thousands of persons)**\n\nDate            | Job Openings\n----------|------------\n"
+	for date, job_open, _, _ in rows:
+		job_openings_msg += f"{date} | {int(job_open):,}\n" if job_open is not None else f"{date} | N/A\n"
+	messages.append(TextSendMessage(text=job_openings_msg))
+
+	# 📉 Third Message: Job Quits
+	job_quits_msg = "📉 **Job Quits (Unit: Thousands of persons)**\n\nDate            | Job Quits\n----------|---------\n"
+	for date, _, job_quit, _ in rows:
+		job_quits_msg += f"{date} | {int(job_quit):,}\n" if job_quit is not None else f"{date} | N/A\n"
+	messages.append(TextSendMessage(text=job_quits_msg))
+
+	# 🔻 Fourth Message: Job Layoffs
+	job_layoffs_msg = "🔻 **Job Layoffs (Unit: Thousands of persons)**\n\nDate            | Job Layoffs\n----------|---------\n"
+	for date, _, _, job_lay in rows:
+		job_layoffs_msg += f"{date} | {int(job_lay):,}\n" if job_lay is not None else f"{date} | N/A\n"
+	messages.append(TextSendMessage(text=job_layoffs_msg))
+
+	return messages
+
+
+# ✅ Market (SP500) & rate (10YY, YCURV, BSPRD): 52-week high/low (+ distance from the high for markets)
+def format_market_reply(info, high_52w, low_52w, percent_drop, history):
+	high_text, low_text = value_formatter.format_values(info.format_type, [high_52w, low_52w])
+
+	response = format_header(info)
+	response += f"🔹 52W Highs and Lows: [H] {high_text} / [L] {low_text}\n"
+	if info.handler == "market":
+		# ✅ Percentage drop from the 52-week high
+		response += f"🔹 Current position: -{percent_drop if percent_drop is not None else 'N/A'}% from 52-week High\n"
+	response += "\n🔹 Last 15 Data Points:\n"
+	response += "\n".join(value_formatter.format_points(info.format_type, history))
+	return response
+
+
+# ✅ Standard indicators: the last 15 points (YoY percentages for `yoy_growth` indicators)
+def format_standard_reply(info, points):
+	response = format_header(info) + "🔹 Last 15 Data Points:\n"
+	response += "\n".join(value_formatter.format_points(info.format_type, points))
+	return response
+
+
+def no_data_reply(user_input):
+	return f"Not enough historical data available for {user_input}."
+
+
+# ----------------------------------------------------------------------------
+# Reply from the in-memory series store (no database round-trip)
+
+def build_reply_from_store(info):
+	store = series_store.series_store
+	if not store.loaded or info is None:
+		return None
+
+	start = time.perf_counter()
+	if info.handler == "jolts":
+		members = [store.get(indicator_registry.get_registry().get(key).indicator_id) for key in info.components]
+		if any(member is None for member in members):
+			return None
+		rows = series_store.pivot_latest(members, JOLTS_HISTORY_POINTS)
+		response = format_jolts_reply(info.name, info.category, info.note, rows)
+	elif info.handler in ("market", "rate", "standard"):
+		series = store.get(info.indicator_id)
+		if series is None:
+			return None
+		stats = series_store.compute_metrics(series, value_formatter.HISTORY_POINTS)
+		if stats is None:
+			response = no_data_reply(info.abbreviation)
+		elif info.handler == "standard":
+			points = stats.yoy if info.format_type == "yoy_growth" else stats.history
+			response = format_standard_reply(info, points) if points else no_data_reply(info.abbreviation)
+		else:
+			response = format_market_reply(info, stats.high_52w, stats.low_52w, stats.pct_from_high, stats.history)
+	else:
+		return None
+
+	metrics.observe("reply_format_seconds", time.perf_counter() - start, handler=info.handler, source="store")
+	return response
+
+
+# ----------------------------------------------------------------------------
+# Query MySQL & format the reply for a single indicator
+def build_reply(user_input):
+	build_start = time.perf_counter()
+	handler = None
 	try:
-		db = mysql.connector.connect(
-			host="localhost",
-			user="root",
-			password="@Ri2aoei9ie",
-			database="macroeconomic_db"
-		)
+		db = db_pool.get_connection()  # ✅ Pooled, already health-checked
 		cursor = db.cursor()
 	except mysql.connector.Error as err:
-		print(f"❌ Database Connection Error: {err}")
+		metrics.log_event("db_connection_error", level=logging.ERROR, error=str(err))
 		return "⚠️ Error: Unable to connect to the database. Please try again later."
 
 	try:
-		# ✅ Define indicator categories
-		format_types = {
-			"yoy_growth": ["CPI", "HPI", "PPI", "PCE"],
-			"percentage": ["GDP", "FFR", "MORTG", "UR", "LFPR", "V"],
-			"monetary": ["WAGE"],
-			"large_numbers": ["NFP", "RTSAL", "XHOME", "TBLNC", "M2"],
-			"hours": ["AWH"],
-			"decimal_2": ["IP", "AUTO", "MCSI"],
-			"no_decimals": ["NHOME", "HSTART", "BPERM"],
-			"billions": ["FDEF", "USDEBT"]
-		}
-
-		# ✅ Special Handling for JOLTS (3 Messages)
-		if user_input == "JOLTS":
-			# ✅ Special handling for JOLTS (Multiple Messages)
-			query = """
-			SELECT 
-				ANY_VALUE(i.indicator_name) AS indicator_name,
-				ANY_VALUE(i.category) AS category,
-				ANY_VALUE(i.note) AS note,
-				d.record_date,
-				MAX(CASE WHEN i.abbreviation = 'JOLTS_OPN' THEN d.value END) AS Job_Openings,
-				MAX(CASE WHEN i.abbreviation = 'JOLTS_QUT' THEN d.value END) AS Job_Quits,
-				MAX(CASE WHEN i.abbreviation = 'JOLTS_LAY' THEN d.value END) AS Job_Layoffs
-			FROM indicator_data d
-			JOIN indicators i ON d.indicator_id = i.indicator_id
-			WHERE i.abbreviation IN ('JOLTS_OPN', 'JOLTS_QUT', 'JOLTS_LAY')
-			GROUP BY d.record_date 
-			ORDER BY d.record_date DESC
-			LIMIT 24;
-			"""
-			
-			cursor.execute(query)
+		# ✅ O(1) dispatch through the indicator registry
+		info = indicator_registry.get_registry().get(user_input)
+		handler = info.handler if info else None
+
+		# ✅ Composite replies (JOLTS): one pivot column per registry component, in registry order
+		if handler == "jolts":
+			registry = indicator_registry.get_registry()
+			member_ids = [registry.get(key).indicator_id for key in info.components]
+			cursor.execute(composite_query(len(member_ids)), (*member_ids, *member_ids, JOLTS_HISTORY_POINTS))
 			results = cursor.fetchall()
 
-			if results:
-				indicator_name = results[0][0]  
-				category = results[0][1]  
-				note = results[0][2] if results[0][2] else "No description available."
-
-				# 📊 First Message: JOLTS Explanation
-				messages = [
-					TextSendMessage(text=(
-						f"📊 {indicator_name}\n📌 Category: {category}\n📝 {note}\n\n"
-						"🔹 Openings high = Strong labor demand\n"
-						"🔹 Quits high & Layoffs low = Strong labor market\n"
-						"🔹 Layoffs high & Openings low = Weak labor market"
-					))
-				]
-
-				# 📈 Second Message: Job Openings
-				job_openings_msg = "📈 **Job Openings (Unit: Thousands of persons)**\n\nDate            | Job Openings\n----------|------------\n"
-				for row in results:
-					_, _, _, date, job_open, _, _ = row
-					job_openings_msg += f"{date} | {int(job_open):,}\n" if job_open is not None else f"{date} | N/A\n"
-				messages.append(TextSendMessage(text=job_openings_msg))
-
-				# 📉 Third Message: Job Quits
-				job_quits_msg = "📉 **Job Quits (Unit: Thousands of persons)**\n\nDate            | Job Quits\n----------|---------\n"
-				for row in results:
-					_, _, _, date, _, job_quit, _ = row
-					job_quits_msg += f"{date} | {int(job_quit):,}\n" if job_quit is not None else f"{date} | N/A\n"
-				messages.append(TextSendMessage(text=job_quits_msg))
-
-				# 🔻 Fourth Message: Job Layoffs
-				job_layoffs_msg = "🔻 **Job Layoffs (Unit: Thousands of persons)**\n\nDate            | Job Layoffs\n----------|---------\n"
-				for row in results:
-					_, _, _, date, _, _, job_lay = row
-					job_layoffs_msg += f"{date} | {int(job_lay):,}\n" if job_lay is not None else f"{date} | N/A\n"
-				messages.append(TextSendMessage(text=job_layoffs_msg))
-
-				# ✅ Return JOLTS Messages Instead of Standard Response
-				return messages  
-
+			with metrics.timer("reply_format_seconds", handler=handler, source="live"):
+				# 🔹 Name, category & note from the registry, as in build_reply_from_store
+				response = format_jolts_reply(info.name, info.category, info.note, results)
+
+		# ✅ Market (SP500) & rate (10YY, YCURV, BSPRD) replies add 52-week highs and lows
+		elif handler in ("market", "rate"):
+			rows = fetch_series(cursor, info.indicator_id,
+								value_formatter.HISTORY_POINTS + ROWS_PER_YEAR.get(info.frequency, 366))
+
+			if rows:
+				with metrics.timer("reply_format_seconds", handler=handler, source="live"):
+					high_52w, low_52w = value_formatter.high_low_52w(rows)
+					percent_drop = value_formatter.percent_below(high_52w, rows[0][1])
+					response = format_market_reply(info, high_52w, low_52w, percent_drop,
+												   rows[:value_formatter.HISTORY_POINTS])
 			else:
-				return [TextSendMessage(text="No JOLTS data available.")]
-
-
-		# ✅ Special Handling for SP500 (Requires Current Position Calculation)
-		elif user_input == "SP500":
-			query_recent = """
-			SELECT 
-				i.indicator_name,
-				i.category,
-				i.note,
-				d.record_date,
-				FORMAT(d.value, 2) AS formatted_value  -- ✅ SP500 should NOT have '%'
-			FROM indicator_data d
-			JOIN indicators i
-				ON d.indicator_id = i.indicator_id
-			WHERE i.abbreviation = %s
-			ORDER BY d.record_date DESC
-			LIMIT 15;
-			"""
-
-			cursor.execute(query_recent, (user_input,))
-			results = cursor.fetchall()
-
-			# ✅ Fetch the 52-week high and low separately
-			query_high_low = """
-			SELECT 
-				FORMAT(MAX(d.value), 2) AS high_52w,
-				FORMAT(MIN(d.value), 2) AS low_52w
-			FROM indicator_data d
-			JOIN indicators i
-				ON d.indicator_id = i.indicator_id
-			WHERE i.abbreviation = %s
-			AND d.record_date >= DATE_SUB(CURDATE(), INTERVAL 52 WEEK);
-			"""
-
-			cursor.execute(query_high_low, (user_input,))
-			high_low_result = cursor.fetchone()
-			high_52w, low_52w = high_low_result if high_low_result else ("N/A", "N/A")
-
-			if results:
-				indicator_name, category, note = results[0][:3]
-				note = note if note else "No description available."
-				
-				latest_date, latest_value = results[0][3], results[0][4]
-
-				# ✅ Calculate percentage drop from 52-week high
-				try:
-					high_52w_float = float(high_52w.replace(',', '')) if high_52w != "N/A" else None
-					latest_value_float = float(latest_value.replace(',', ''))
-					percent_drop = round(((high_52w_float - latest_value_float) / high_52w_float) * 100, 2) if high_52w_float else "N/A"
-				except Exception:
-					percent_drop = "N/A"
-
-				response = f"📊 {indicator_name}\n📌 Category: {category}\n📝 {note}\n\n"
-				response += f"🔹 52W Highs and Lows: [H] {high_52w} / [L] {low_52w}\n"
-				response += f"🔹 Current position: -{percent_drop}% from 52-week High\n\n"
-				response += "🔹 Last 15 Data Points:\n"
-				response += "\n".join(f"{date}: {formatted_value}" for _, _, _, date, formatted_value in results)
+				response = no_data_reply(user_input)
+
+		# ✅ Standard indicators: raw rows formatted by the registry's format type
+		elif handler == "standard":
+			if info.format_type == "yoy_growth":
+				rows = fetch_series(cursor, info.indicator_id,
+									value_formatter.HISTORY_POINTS + ROWS_PER_YEAR.get(info.frequency, 12))
+				points = value_formatter.yoy_growth(rows)
 			else:
-				response = f"Not enough historical data available for {user_input}."
-
-		# ✅ Special Handling for Interest Rate Indicators (10YY, YCURV, BSPRD) - Adds "%"
-		elif user_input in ["10YY", "YCURV", "BSPRD"]:
-			query_recent = """
-			SELECT 
-				i.indicator_name,
-				i.category,
-				i.note,
-				d.record_date,
-				CONCAT(FORMAT(d.value, 2), '%') AS formatted_value  -- ✅ Adds '%' for interest rates
-			FROM indicator_data d
-			JOIN indicators i
-				ON d.indicator_id = i.indicator_id
-			WHERE i.abbreviation = %s
-			ORDER BY d.record_date DESC
-			LIMIT 15;
-			"""
-
-			cursor.execute(query_recent, (user_input,))
-			results = cursor.fetchall()
+				points = fetch_series(cursor, info.indicator_id, value_formatter.HISTORY_POINTS)
 
-			# ✅ Fetch the 52-week high and low separately
-			query_high_low = """
-			SELECT 
-				CONCAT(FORMAT(MAX(d.value), 2), '%') AS high_52w,  -- ✅ Adds '%' to high
-				CONCAT(FORMAT(MIN(d.value), 2), '%') AS low_52w  -- ✅ Adds '%' to low
-			FROM indicator_data d
-			JOIN indicators i
-				ON d.indicator_id = i.indicator_id
-			WHERE i.abbreviation = %s
-			AND d.record_date >= DATE_SUB(CURDATE(), INTERVAL 52 WEEK);
-			"""
-
-			cursor.execute(query_high_low, (user_input,))
-			high_low_result = cursor.fetchone()
-			high_52w, low_52w = high_low_result if high_low_result else ("N/A", "N/A")
-
-			if results:
-				indicator_name, category, note = results[0][:3]
-				note = note if note else "No description available."
-
-				response = f"📊 {indicator_name}\n📌 Category: {category}\n📝 {note}\n\n"
-				response += f"🔹 52W Highs and Lows: [H] {high_52w} / [L] {low_52w}\n\n"
-				response += "🔹 Last 15 Data Points:\n"
-				response += "\n".join(f"{date}: {formatted_value}" for _, _, _, date, formatted_value in results)
-			else:
-				response = f"Not enough historical data available for {user_input}."
-
-		# ✅ Add this elif to ensure general inputs are handled in the same if-elif structure
-		elif any(user_input in values for values in format_types.values()): 
-			# ✅ Dynamically select the query type
-			query = None
-			if user_input in format_types["yoy_growth"]:
-				query = query_templates["yoy_growth"]
-			elif user_input in format_types["percentage"]:
-				query = query_templates["percentage"]
-			elif user_input in format_types["monetary"]:
-				query = query_templates["monetary"]
-			elif user_input in format_types["large_numbers"]:
-				query = query_templates["large_numbers"]
-			elif user_input in format_types["hours"]:
-				query = query_templates["hours"]
-			elif user_input in format_types["decimal_2"]:
-				query = query_templates["decimal_2"]
-			elif user_input in format_types["no_decimals"]:
-				query = query_templates["no_decimals"]
-			elif user_input in format_types["billions"]:
-				query = query_templates["billions"]
-
-			# ✅ If a query is found, execute it
-			if query:
-				try: # ✅ Catch SQL errors when executing the query
-					cursor.execute(query, (user_input,))
-					results = cursor.fetchall()
-				except mysql.connector.Error as err:
-					print(f"❌ SQL Query Error: {err}")
-					return f"⚠️ Error: Unable to fetch data for {user_input}. Please try again later."
-
-				if results:
-					indicator_name, category, note = results[0][:3]
-					note = note if note else "No description available."
-
-					response = f"📊 {indicator_name}\n📌 Category: {category}\n📝 {note}\n\n🔹 Last 15 Data Points:\n"
-					response += "\n".join(f"{date}: {formatted_value}" for _, _, _, date, formatted_value in results)
-				else:
-					response = f"Not enough historical data available for {user_input}."
+			if points:
+				with metrics.timer("reply_format_seconds", handler=handler, source="live"):
+					response = format_standard_reply(info, points)
 			else:
-				response = f"Invalid input: {user_input} is not recognized."
+				response = no_data_reply(user_input)
 		else:
 			response = f"Invalid input: {user_input} is not recognized.(Final)"
 
 	except mysql.connector.Error as err:
-		print(f"❌ SQL Execution Error: {err}")
+		metrics.log_event("sql_error", level=logging.ERROR, input=user_input, error=str(err))
 		return f"⚠️ Database error: Unable to process your request at this time. Please try again later."
 
 	finally:
 		# ✅ Check if `cursor` exists before closing
 		if 'cursor' in locals() and cursor is not None:
 			cursor.close()
-			print("✅ Cursor closed successfully.")
 
-		# ✅ Check if `db` exists before closing
-		if 'db' in locals() and 'is_connected' in dir(db) and db.is_connected():
+		# ✅ Return the connection to the pool
+		if 'db' in locals() and db is not None:
 			db.close()
-			print("✅ Database connection closed successfully.")
+		metrics.observe("reply_build_seconds", time.perf_counter() - build_start, handler=handler or "unknown")
 
 	return response
@@ -0,0 +1,154 @@
+# 📌 indicator_registry.py - Immutable abbreviation → indicator map loaded from MySQL
+import logging
+import os
+import threading
+import time
+from collections import namedtuple
+from types import MappingProxyType
+
+import mysql.connector
+import db_pool  # ✅ Shared connection pool
+import metrics
+
+# ✅ Seconds between checks for edits to `indicators` / `indicator_metadata`
+REGISTRY_CHECK_INTERVAL = float(os.environ.get("REGISTRY_CHECK_INTERVAL", "60"))
+
+IndicatorInfo = namedtuple("IndicatorInfo", [
+	"abbreviation",
+	"indicator_id",     # None for composite replies such as JOLTS
+	"name",
+	"category",
+	"note",
+	"unit",
+	"frequency",
+	"format_type",      # Value formatting rule (see format types in migrations/003)
+	"handler",          # Reply layout: standard | market | rate | jolts
+	"fred_series_id",
+	"importance_tier",
+	"sub_category",
+	"components",       # Abbreviations a composite reply is built from (empty otherwise)
+])
+
+REGISTRY_QUERY = """
+	SELECT i.indicator_id, i.abbreviation, i.indicator_name, i.category, i.note, i.unit,
+		   i.frequency, i.format_type, i.reply_handler, i.reply_group, i.fred_series_id,
+		   m.importance_tier, m.sub_category
+	FROM indicators i
+	LEFT JOIN indicator_metadata m ON m.indicator_id = i.indicator_id
+	ORDER BY i.indicator_id;
+"""
+
+
+class Registry:
+	"""
+	Read-only view of every indicator and composite reply.
+
+	`indicators` holds all rows (including composite members such as JOLTS_OPN);
+	`reply_keys` is the set of inputs the bot answers directly.
+	"""
+
+	def __init__(self, rows, checksum=None):
+		indicators = {}
+		groups = {}
+
+		for (indicator_id, abbreviation, name, category, note, unit, frequency, format_type,
+			 handler, reply_group, fred_series_id, importance_tier, sub_category) in rows:
+			indicators[abbreviation] = IndicatorInfo(
+				abbreviation, indicator_id, name, category, note, unit, frequency, format_type,
+				handler, fred_series_id, importance_tier, sub_category, ()
+			)
+			if reply_group:
+				groups.setdefault(reply_group, []).append(indicators[abbreviation])
+
+		# 🔹 Composite replies take their metadata from the first member
+		for group, members in groups.items():
+			first = members[0]
+			indicators[group] = first._replace(
+				abbreviation=group,
+				indicator_id=None,
+				fred_series_id=None,
+				components=tuple(member.abbreviation for member in members),
+			)
+
+		grouped = {member.abbreviation for members in groups.values() for member in members}
+		self.indicators = MappingProxyType(indicators)
+		self.reply_keys = frozenset(key for key in indicators if key not in grouped)
+		self.composite_replies = MappingProxyType({
+			group: indicators[group].components for group in groups
+		})
+		self._reply_key_of = MappingProxyType({
+			member.abbreviation: group for group, members in groups.items() for member in members
+		})
+		self.checksum = checksum
+
+	def get(self, abbreviation):
+		return self.indicators.get(abbreviation)
+
+	def is_reply_key(self, abbreviation):
+		return abbreviation in self.reply_keys
+
+	def reply_key_of(self, abbreviation):
+		# ✅ The key users ask for: composite members map to their group (JOLTS_OPN → JOLTS)
+		return self._reply_key_of.get(abbreviation, abbreviation)
+
+	def format_type(self, abbreviation, default="decimal_2"):
+		info = self.indicators.get(abbreviation)
+		return info.format_type if info else default
+
+	def __len__(self):
+		return len(self.indicators)
+
+
+_registry = None
+_last_check = 0.0
+_reload_lock = threading.Lock()
+
+
+def _table_checksum(cursor):
+	cursor.execute("CHECKSUM TABLE indicators, indicator_metadata")
+	return tuple(row[1] for row in cursor.fetchall())
+
+
+# ✅ Read both tables and build a fresh Registry
+def load_registry():
+	with db_pool.connection() as db:
+		cursor = db.cursor()
+		try:
+			checksum = _table_checksum(cursor)
+			cursor.execute(REGISTRY_QUERY)
+			rows = cursor.fetchall()
+		finally:
+			cursor.close()
+	return Registry(rows, checksum)
+
+
+# ✅ Current registry; loads on first use and hot-reloads when the tables change
+def get_registry():
+	global _registry, _last_check
+
+	if _registry is not None and time.monotonic() - _last_check < REGISTRY_CHECK_INTERVAL:
+		return _registry
+
+	with _reload_lock:
+		if _registry is not None and time.monotonic() - _last_check < REGISTRY_CHECK_INTERVAL:
+			return _registry
+		try:
+			if _registry is None:
+				_registry = load_registry()
+			else:
+				with db_pool.connection() as db:
+					cursor = db.cursor()
+					try:
+						changed = _table_checksum(cursor) != _registry.checksum
+					finally:
+						cursor.close()
+				if changed:
+					_registry = load_registry()  # 🔹 Atomic swap; readers keep their old reference
+					metrics.log_event("registry_reloaded", entries=len(_registry))
+			_last_check = time.monotonic()
+		except mysql.connector.Error as err:
+			metrics.log_event("registry_load_error", level=logging.ERROR, error=str(err))
+			if _registry is None:
+				return Registry([])  # Nothing loaded yet; retry on the next call
+
+	return _registry
@@ -0,0 +1,193 @@
+# 📌 metrics.py - In-process counters & latency histograms (Prometheus text format) and sampled JSON logs
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# ✅ Logging settings (override with environment variables)
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_SAMPLE_RATE = float(os.environ.get("LOG_SAMPLE_RATE", "0.1"))  # Fraction of routine (INFO/DEBUG) events logged
+LOG_WEBHOOK_BODIES = os.environ.get("LOG_WEBHOOK_BODIES", "0") == "1"  # Verbose: log full webhook bodies
+
+# 🔹 Histogram buckets in seconds (0.5ms … 10s covers a cache hit up to a slow LINE call)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# 🔹 Metric descriptions shown in /metrics
+DESCRIPTIONS = {
+	"webhook_requests_total": "Webhook requests by outcome",
+	"webhook_signature_seconds": "Time to verify the signature & parse a webhook body",
+	"db_checkout_seconds": "Time to check a connection out of the pool (including the health-check ping)",
+	"db_query_seconds": "Time per SQL statement, labelled by verb & table",
+	"reply_build_seconds": "Time to build a reply from the database, by reply handler",
+	"reply_format_seconds": "Time spent formatting values into reply text, by reply handler",
+	"reply_source_total": "Where replies were served from (cache, snapshot, live)",
+	"line_api_seconds": "Time per LINE Messaging API call",
+	"line_api_errors_total": "Failed LINE Messaging API calls",
+	"notifier_read_seconds": "Time for the notifier to read pending changes",
+	"query_requests_total": "Multi-indicator, range & compare queries by kind",
+	"chart_requests_total": "Chart commands by outcome (cached, rendered, no_data, failed, disabled)",
+	"chart_render_seconds": "Time to render one chart image (inside the chart process pool)",
+}
+
+logger = logging.getLogger("macro_bot")
+
+
+class _Histogram:
+	__slots__ = ("counts", "total", "count")
+
+	def __init__(self):
+		self.counts = [0] * len(LATENCY_BUCKETS)
+		self.total = 0.0
+		self.count = 0
+
+	def observe(self, value):
+		for i, bound in enumerate(LATENCY_BUCKETS):
+			if value <= bound:
+				self.counts[i] += 1
+				break
+		self.total += value
+		self.count += 1
+
+
+_counters = {}    # (name, labels) → value
+_histograms = {}  # (name, labels) → _Histogram
+_gauge_sources = []  # (prefix, callable returning {key: number})
+_lock = threading.Lock()
+
+
+def _key(name, labels):
+	return name, tuple(sorted(labels.items()))
+
+
+def inc(name, amount=1, **labels):
+	key = _key(name, labels)
+	with _lock:
+		_counters[key] = _counters.get(key, 0) + amount
+
+
+def observe(name, seconds, **labels):
+	key = _key(name, labels)
+	with _lock:
+		histogram = _histograms.get(key)
+		if histogram is None:
+			histogram = _histograms[key] = _Histogram()
+		histogram.observe(seconds)
+
+
+class _Timer:
+	__slots__ = ("seconds",)
+
+	def __init__(self):
+		self.seconds = None
+
+
+# ✅ `with metrics.timer("db_query_seconds", query="SELECT indicators"):` (elapsed time in `.seconds`)
+@contextmanager
+def timer(name, **labels):
+	result = _Timer()
+	start = time.perf_counter()
+	try:
+		yield result
+	finally:
+		result.seconds = time.perf_counter() - start
+		observe(name, result.seconds, **labels)
+
+
+# ✅ Export an existing stats dict (pool_stats(), reply cache, webhook queue) as gauges
+def register_gauges(prefix, source):
+	with _lock:
+		_gauge_sources.append((prefix, source))
+
+
+def _escape(value):
+	return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels, extra=None):
+	pairs = list(labels) + ([extra] if extra else [])
+	if not pairs:
+		return ""
+	return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _header(lines, name, kind, seen):
+	if name in seen:
+		return
+	seen.add(name)
+	if name in DESCRIPTIONS:
+		lines.append(f"# HELP {name} {DESCRIPTIONS[name]}")
+	lines.append(f"# TYPE {name} {kind}")
+
+
+# ✅ Everything in the Prometheus text exposition format (served by the bot's /metrics)
+def render():
+	with _lock:
+		counters = sorted(_counters.items())
+		histograms = sorted((key, (list(h.counts), h.total, h.count)) for key, h in _histograms.items())
+		gauge_sources = list(_gauge_sources)
+
+	lines = []
+	seen = set()
+	for (name, labels), value in counters:
+		_header(lines, name, "counter", seen)
+		lines.append(f"{name}{_format_labels(labels)} {value}")
+
+	for (name, labels), (counts, total, count) in histograms:
+		_header(lines, name, "histogram", seen)
+		cumulative = 0
+		for bound, bucket_count in zip(LATENCY_BUCKETS, counts):
+			cumulative += bucket_count
+			lines.append(f"{name}_bucket{_format_labels(labels, ('le', bound))} {cumulative}")
+		lines.append(f"{name}_bucket{_format_labels(labels, ('le', '+Inf'))} {count}")
+		lines.append(f"{name}_sum{_format_labels(labels)} {total:.6f}")
+		lines.append(f"{name}_count{_format_labels(labels)} {count}")
+
+	for prefix, source in gauge_sources:
+		try:
+			values = source()
+		except Exception as e:  # A broken stats source must not break /metrics
+			log_event("metrics_source_error", level=logging.WARNING, source=prefix, error=str(e))
+			continue
+		for key, value in sorted(values.items()):
+			if isinstance(value, bool) or not isinstance(value, (int, float)):
+				continue
+			name = f"{prefix}_{key}"
+			_header(lines, name, "gauge", seen)
+			lines.append(f"{name} {value}")
+
+	return "\n".join(lines) + "\n"
+
+
+def reset():
+	with _lock:
+		_counters.clear()
+		_histograms.clear()
+
+
+# ----------------------------------------------------------------------------
+# Structured logging
+
+# ✅ One JSON line per event; routine events are sampled, warnings & errors never are
+def log_event(event, level=logging.INFO, sample=True, **fields):
+	if sample and level < logging.WARNING and LOG_SAMPLE_RATE < 1.0 and random.random() >= LOG_SAMPLE_RATE:
+		return
+	if not logger.isEnabledFor(level):
+		return
+	record = {"ts": datetime.now().isoformat(), "level": logging.getLevelName(level).lower(), "event": event}
+	record.update(fields)
+	logger.log(level, json.dumps(record, default=str, ensure_ascii=False))
+
+
+def configure_logging(stream=None):
+	if logger.handlers:
+		return
+	handler = logging.StreamHandler(stream or sys.stdout)
+	handler.setFormatter(logging.Formatter("%(message)s"))
+	logger.addHandler(handler)
+	logger.setLevel(LOG_LEVEL)
+	logger.propagate = False
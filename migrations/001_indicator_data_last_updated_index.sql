@@ -0,0 +1,9 @@
+-- 001: Index indicator_data.last_updated for auto_send_if_updated.check_new_updates
+--
+-- The notifier filters on `last_updated >= NOW() - INTERVAL 1 DAY`; without this index
+-- MySQL scans the whole table. `indicator_id` is included so the "which indicators
+-- changed" step is answered from the index alone.
+
+ALTER TABLE `indicator_data`
+  ADD KEY `idx_last_updated` (`last_updated`,`indicator_id`),
+  ALGORITHM=INPLACE, LOCK=NONE;
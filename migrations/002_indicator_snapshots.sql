@@ -0,0 +1,22 @@
+-- 002: Precomputed per-indicator snapshots
+--
+-- auto_update.py rewrites one row per reply key (indicator abbreviation, or a composite
+-- reply such as JOLTS) at the end of every run; the bot reads `reply_json` by primary key.
+
+CREATE TABLE IF NOT EXISTS `indicator_snapshots` (
+  `reply_key` varchar(10) NOT NULL,
+  `indicator_id` int DEFAULT NULL,
+  `latest_date` date DEFAULT NULL,
+  `latest_value` decimal(18,6) DEFAULT NULL,
+  `previous_value` decimal(18,6) DEFAULT NULL,
+  `delta` decimal(18,6) DEFAULT NULL,
+  `yoy_pct` decimal(12,4) DEFAULT NULL,
+  `high_52w` decimal(18,6) DEFAULT NULL,
+  `low_52w` decimal(18,6) DEFAULT NULL,
+  `pct_from_high` decimal(12,4) DEFAULT NULL,
+  `reply_json` json DEFAULT NULL,
+  `refreshed_at` timestamp NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`reply_key`),
+  KEY `indicator_id` (`indicator_id`),
+  CONSTRAINT `indicator_snapshots_ibfk_1` FOREIGN KEY (`indicator_id`) REFERENCES `indicators` (`indicator_id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
@@ -0,0 +1,26 @@
+-- 003: Move reply formatting rules out of the code and into `indicators`
+--
+-- format_type   how a value is printed: yoy_growth | percentage | monetary | large_numbers |
+--               hours | decimal_2 | no_decimals | billions
+-- reply_handler reply layout: standard | market (52W high/low + distance from high) |
+--               rate (52W high/low in %) | jolts (multi-message pivot)
+-- reply_group   composite reply the row belongs to (the bot answers the group, not the row)
+
+ALTER TABLE `indicators`
+  ADD COLUMN `format_type` varchar(20) NOT NULL DEFAULT 'decimal_2',
+  ADD COLUMN `reply_handler` varchar(20) NOT NULL DEFAULT 'standard',
+  ADD COLUMN `reply_group` varchar(10) DEFAULT NULL;
+
+UPDATE `indicators` SET `format_type` = 'yoy_growth'    WHERE `abbreviation` IN ('CPI', 'HPI', 'PPI', 'PCE');
+UPDATE `indicators` SET `format_type` = 'percentage'    WHERE `abbreviation` IN ('GDP', 'FFR', 'MORTG', 'UR', 'LFPR', 'V', '10YY', 'YCURV', 'BSPRD');
+UPDATE `indicators` SET `format_type` = 'monetary'      WHERE `abbreviation` IN ('WAGE');
+UPDATE `indicators` SET `format_type` = 'large_numbers' WHERE `abbreviation` IN ('NFP', 'RTSAL', 'XHOME', 'TBLNC', 'M2');
+UPDATE `indicators` SET `format_type` = 'hours'         WHERE `abbreviation` IN ('AWH');
+UPDATE `indicators` SET `format_type` = 'decimal_2'     WHERE `abbreviation` IN ('IP', 'AUTO', 'MCSI', 'SP500');
+UPDATE `indicators` SET `format_type` = 'no_decimals'   WHERE `abbreviation` IN ('NHOME', 'HSTART', 'BPERM', 'JOLTS_OPN', 'JOLTS_QUT', 'JOLTS_LAY');
+UPDATE `indicators` SET `format_type` = 'billions'      WHERE `abbreviation` IN ('FDEF', 'USDEBT');
+
+UPDATE `indicators` SET `reply_handler` = 'market' WHERE `abbreviation` = 'SP500';
+UPDATE `indicators` SET `reply_handler` = 'rate'   WHERE `abbreviation` IN ('10YY', 'YCURV', 'BSPRD');
+UPDATE `indicators` SET `reply_handler` = 'jolts', `reply_group` = 'JOLTS'
+  WHERE `abbreviation` IN ('JOLTS_OPN', 'JOLTS_QUT', 'JOLTS_LAY');
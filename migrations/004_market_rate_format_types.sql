@@ -0,0 +1,7 @@
+-- 004: Dedicated format types for replies that used FORMAT() in SQL
+--
+-- thousands_2  FORMAT(value, 2)            e.g. SP500 → 5,123.45
+-- rate         CONCAT(FORMAT(value, 2), '%') e.g. 10YY → 4.25%
+
+UPDATE `indicators` SET `format_type` = 'thousands_2' WHERE `abbreviation` = 'SP500';
+UPDATE `indicators` SET `format_type` = 'rate'        WHERE `abbreviation` IN ('10YY', 'YCURV', 'BSPRD');
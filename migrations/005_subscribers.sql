@@ -0,0 +1,13 @@
+-- 005: Push-notification subscribers
+--
+-- The bot inserts a row on FollowEvent and sets active = 0 on UnfollowEvent;
+-- auto_send_if_updated.py multicasts to every active row.
+
+CREATE TABLE IF NOT EXISTS `subscribers` (
+  `user_id` varchar(64) NOT NULL,
+  `active` tinyint(1) NOT NULL DEFAULT '1',
+  `created_at` timestamp NULL DEFAULT CURRENT_TIMESTAMP,
+  `updated_at` timestamp NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`user_id`),
+  KEY `idx_active` (`active`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
@@ -0,0 +1,16 @@
+-- 006: Per-user indicator watchlists
+--
+-- One row per (user, reply key). Unwatching sets active = 0 instead of deleting, so
+-- watchlist.WatchlistIndex can refresh incrementally from `updated_at`.
+
+CREATE TABLE IF NOT EXISTS `subscriptions` (
+  `subscription_id` int NOT NULL AUTO_INCREMENT,
+  `user_id` varchar(64) NOT NULL,
+  `reply_key` varchar(10) NOT NULL,
+  `active` tinyint(1) NOT NULL DEFAULT '1',
+  `created_at` timestamp NULL DEFAULT CURRENT_TIMESTAMP,
+  `updated_at` timestamp(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+  PRIMARY KEY (`subscription_id`),
+  UNIQUE KEY `user_reply_key` (`user_id`,`reply_key`),
+  KEY `idx_updated_at` (`updated_at`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
@@ -0,0 +1,27 @@
+-- 007: Durable change log (outbox) for the notifier
+--
+-- auto_update.py appends one row per inserted or revised observation in the same
+-- transaction as the indicator_data write. Consumers remember the last change_id
+-- they have fully processed in `notifier_cursors`.
+
+CREATE TABLE IF NOT EXISTS `indicator_changes` (
+  `change_id` bigint NOT NULL AUTO_INCREMENT,
+  `indicator_id` int NOT NULL,
+  `record_date` date NOT NULL,
+  `old_value` decimal(18,6) DEFAULT NULL,
+  `new_value` decimal(18,6) NOT NULL,
+  `changed_at` timestamp NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`change_id`),
+  KEY `indicator_id` (`indicator_id`,`record_date`),
+  CONSTRAINT `indicator_changes_ibfk_1` FOREIGN KEY (`indicator_id`) REFERENCES `indicators` (`indicator_id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+CREATE TABLE IF NOT EXISTS `notifier_cursors` (
+  `consumer` varchar(64) NOT NULL,
+  `last_change_id` bigint NOT NULL DEFAULT '0',
+  `updated_at` timestamp NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`consumer`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+-- The log starts empty, so the default consumer starts at change 0
+INSERT IGNORE INTO `notifier_cursors` (`consumer`, `last_change_id`) VALUES ('line_push', 0);
@@ -0,0 +1,27 @@
+-- 008: Resumable backfills & ALFRED vintages
+--
+-- `python auto_update.py backfill` records, per (series, mode), the first observation
+-- date it has not written yet; an interrupted run resumes there. `completed_at` is set
+-- once the last page is written. `indicator_vintages` holds every real-time vintage of an
+-- observation (`--vintages`); indicator_data keeps only the current values.
+
+CREATE TABLE IF NOT EXISTS `backfill_checkpoints` (
+  `series_id` varchar(50) NOT NULL,
+  `mode` enum('observations','vintages') NOT NULL,
+  `next_start` date DEFAULT NULL,
+  `rows_written` bigint NOT NULL DEFAULT '0',
+  `completed_at` timestamp NULL DEFAULT NULL,
+  `updated_at` timestamp NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`series_id`,`mode`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+CREATE TABLE IF NOT EXISTS `indicator_vintages` (
+  `indicator_id` int NOT NULL,
+  `record_date` date NOT NULL,
+  `realtime_start` date NOT NULL,
+  `realtime_end` date NOT NULL,
+  `value` decimal(18,6) DEFAULT NULL,
+  PRIMARY KEY (`indicator_id`,`record_date`,`realtime_start`),
+  KEY `idx_realtime` (`indicator_id`,`realtime_start`,`realtime_end`),
+  CONSTRAINT `indicator_vintages_ibfk_1` FOREIGN KEY (`indicator_id`) REFERENCES `indicators` (`indicator_id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
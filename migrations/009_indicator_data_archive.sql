@@ -0,0 +1,19 @@
+-- 009: Compact archive rows for rolled-up indicator_data partitions
+--
+-- `python storage_layout.py rollup --before YYYY-MM-DD` packs each indicator's rows in
+-- date partitions ending on or before that date into one row per (indicator, partition):
+-- `payload` is zlib-compressed JSON (first date, day offsets, exact decimal values).
+-- `period_end` is the partition's exclusive upper bound. The bot's series store merges
+-- these rows back in at startup. The partitioned layout itself is created by
+-- `python storage_layout.py migrate` (its boundaries depend on the data).
+
+CREATE TABLE IF NOT EXISTS `indicator_data_archive` (
+  `indicator_id` int NOT NULL,
+  `period_end` date NOT NULL,
+  `first_date` date NOT NULL,
+  `last_date` date NOT NULL,
+  `points` int NOT NULL,
+  `payload` mediumblob NOT NULL,
+  `archived_at` timestamp NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`indicator_id`,`period_end`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
@@ -0,0 +1,20 @@
+-- 010: Planned notifier deliveries (exactly-once multicast across runs)
+--
+-- Before its first send, auto_send_if_updated.py stores one row per multicast batch:
+-- the change range it announces, the exact recipients, the message and a random retry
+-- key. A failed run retries exactly these rows (same users, same key, so LINE drops
+-- batches it already accepted); the cursor advances and the rows are deleted only once
+-- every batch is delivered.
+
+CREATE TABLE IF NOT EXISTS `notifier_deliveries` (
+  `consumer` varchar(64) NOT NULL,
+  `batch_no` int NOT NULL,
+  `start_change_id` bigint NOT NULL,
+  `end_change_id` bigint NOT NULL,
+  `retry_key` char(36) NOT NULL,
+  `user_ids` json NOT NULL,
+  `message` text NOT NULL,
+  `delivered_at` timestamp NULL DEFAULT NULL,
+  `created_at` timestamp NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`consumer`,`batch_no`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
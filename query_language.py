@@ -0,0 +1,347 @@
+# 📌 query_language.py - "CPI PCE", "UR 2020-01..2021-12", "10YY VS FFR": parsed once, read in one batch
+#
+# A query is answered from the reply cache / series store where possible; whatever they
+# cannot serve is read with ONE batched statement (`WHERE reply_key IN (...)` for replies,
+# `WHERE abbreviation IN (...)` for series), and the answer goes out as a single
+# reply_message of at most MAX_MESSAGES messages. Both servers share the planning and
+# formatting here; each runs the batched statement with its own driver.
+import calendar
+import logging
+import re
+from collections import namedtuple
+from datetime import date
+
+import mysql.connector
+import numpy as np
+from linebot.models import TextSendMessage
+
+import db_pool  # ✅ Shared connection pool
+import indicator_handler
+import indicator_registry
+import metrics
+import series_store
+import snapshots
+import storage_layout  # ✅ Archive rows for rolled-up indicator_data partitions
+import value_formatter
+
+MAX_MESSAGES = 5  # 🔹 LINE's limit per reply_message
+RANGE_MAX_POINTS = 120  # Lines per range message (LINE texts are capped at 5000 characters)
+COMPARE_POINTS = value_formatter.HISTORY_POINTS
+COMPARE_YEARS = 5  # History read for a comparison when the series store is not loaded
+
+MULTI = "multi"
+RANGE = "range"
+COMPARE = "compare"
+USAGE = "usage"
+
+COMPARE_WORD = "VS"
+USAGE_TEXT = "Try 'CPI PCE', 'UR 2020-01..2021-12' or '10YY VS FFR'."
+DATA_ERROR = "⚠️ Error: Unable to read {key} right now. Please try again later."
+
+# ✅ "2020..2021", "2020-01..2021-12", "2020-01-15..", "..2019-06"
+RANGE_PATTERN = re.compile(r"^(\d{4}(?:-\d{1,2}){0,2})?\.\.(\d{4}(?:-\d{1,2}){0,2})?$")
+
+# 🔹 Display formats whose values are percentages: a comparison of two of them shows the spread
+PERCENT_FORMATS = {"yoy_growth", "percentage", "rate"}
+
+Query = namedtuple("Query", ["kind", "keys", "unknown", "skipped", "start", "end"])  # start/end None = open
+
+# ✅ `found`: key → reply (multi) or Series (range/compare); `missing`: keys for the batched read
+Plan = namedtuple("Plan", ["found", "versions", "missing"])
+
+
+# ----------------------------------------------------------------------------
+# Parsing
+
+def _parse_date(text, end):
+	parts = [int(part) for part in text.split("-")]
+	year = parts[0]
+	month = parts[1] if len(parts) > 1 else (12 if end else 1)
+	day = parts[2] if len(parts) > 2 else (calendar.monthrange(year, month)[1] if end else 1)
+	return date(year, month, day)  # Raises ValueError for dates such as 2021-13
+
+
+# ✅ Returns a Query, or None when the text is not one: it names no known indicator, or it is
+#    free text (a list is a query only when every token is a key or two or more are)
+def parse(text, registry):
+	tokens = [token for token in re.split(r"[\s,]+", text) if token]
+	if len(tokens) < 2:
+		return None  # 🔹 A single abbreviation keeps its own reply path
+
+	kind, start, end = MULTI, None, None
+	if COMPARE_WORD in tokens:
+		if len(tokens) != 3 or tokens[1] != COMPARE_WORD:
+			return None
+		kind, keys = COMPARE, [tokens[0], tokens[2]]
+	else:
+		match = RANGE_PATTERN.match(tokens[-1])
+		keys = tokens
+		if match and (match.group(1) or match.group(2)):
+			kind, keys = RANGE, tokens[:-1]
+			try:
+				start = _parse_date(match.group(1), end=False) if match.group(1) else None
+				end = _parse_date(match.group(2), end=True) if match.group(2) else None
+			except ValueError:
+				kind = USAGE
+			if start and end and start > end:
+				kind = USAGE
+
+	known = list(dict.fromkeys(key for key in keys if registry.is_reply_key(key)))
+	unknown = list(dict.fromkeys(key for key in keys if not registry.is_reply_key(key)))
+	if not known:
+		return None
+	if kind == MULTI and unknown and len(known) < 2:
+		return None  # 🔹 Free text such as "WHAT IS CPI" gets the usual help reply, not a lookup
+	return Query(kind, tuple(known[:MAX_MESSAGES]), tuple(unknown), tuple(known[MAX_MESSAGES:]), start, end)
+
+
+# ----------------------------------------------------------------------------
+# Planning: memory first, then one batched statement for the rest
+
+def plan(query):
+	registry = indicator_registry.get_registry()
+	found, versions, missing = {}, {}, []
+	if query.kind == MULTI:
+		for key in query.keys:
+			response, versions[key] = indicator_handler.reply_from_memory(key)
+			if response is None:
+				missing.append(key)
+			else:
+				found[key] = response
+	elif query.kind in (RANGE, COMPARE):
+		store = series_store.series_store
+		for key in query.keys:
+			info = registry.get(key)
+			if info.components:
+				continue  # 🔹 Composite replies (JOLTS) have no single series
+			if store.loaded:
+				found[key] = store.get(info.indicator_id) or _series([])  # The store holds every stored row
+			else:
+				missing.append(key)
+	return Plan(found, versions, missing)
+
+
+# ✅ Dates the batched series read covers
+def _read_window(query):
+	start, end = query.start, query.end
+	if query.kind == COMPARE:
+		start = value_formatter.subtract_months(date.today(), COMPARE_YEARS * 12)
+	if start is not None:
+		start = value_formatter.subtract_months(start, 12)  # 🔹 A year more for YoY indicators
+	return start or date(1000, 1, 1), end or date(9999, 12, 31)
+
+
+# ✅ The batched read for `plan.missing`: (SQL, params)
+def batch_query(query, keys):
+	if query.kind == MULTI:
+		return snapshots.read_replies_query(len(keys)), tuple(keys)
+
+	# 🔹 Live rows and archive payloads (record_date NULL) overlapping the window, archive first
+	placeholders = ', '.join(['%s'] * len(keys))
+	sql = f"""
+		SELECT i.abbreviation, d.record_date, d.value, NULL AS payload
+		FROM indicator_data d
+		JOIN indicators i ON i.indicator_id = d.indicator_id
+		WHERE i.abbreviation IN ({placeholders})
+		AND d.record_date BETWEEN %s AND %s
+		UNION ALL
+		SELECT i.abbreviation, NULL, NULL, a.payload
+		FROM indicator_data_archive a
+		JOIN indicators i ON i.indicator_id = a.indicator_id
+		WHERE i.abbreviation IN ({placeholders})
+		AND a.last_date >= %s AND a.first_date <= %s
+		ORDER BY 1, 2
+	"""
+	start, end = _read_window(query)
+	return sql, (*keys, start, end, *keys, start, end)
+
+
+# ✅ Apply the batched rows (None after a database error); returns the keys that still need a live reply
+def add_rows(query, query_plan, rows):
+	if query.kind == MULTI:
+		for key, texts in snapshots.decode_replies(rows or []).items():
+			metrics.inc("reply_source_total", source="snapshot")
+			query_plan.found[key] = indicator_handler.messages_from_texts(texts)
+			indicator_handler.remember_reply(key, query_plan.found[key], query_plan.versions[key])
+		return [key for key in query_plan.missing if key not in query_plan.found]
+
+	if rows is not None:
+		start, end = _read_window(query)
+		by_key = {key: {} for key in query_plan.missing}
+		for key, record_date, value, payload in rows:
+			if payload is None:
+				by_key[key][record_date] = value  # Live rows come last and win
+			else:
+				by_key[key].update(point for point in storage_layout.unpack_archive(payload) if start <= point[0] <= end)
+		for key, points in by_key.items():
+			query_plan.found[key] = _series(sorted(points.items()))
+	return []
+
+
+def add_live_reply(query_plan, key, response):
+	metrics.inc("reply_source_total", source="live")
+	query_plan.found[key] = response
+	indicator_handler.remember_reply(key, response, query_plan.versions[key])
+
+
+# ✅ Sync execution (app_v0_0_7 worker threads): the messages for one reply_message
+def answer(query):
+	metrics.inc("query_requests_total", kind=query.kind)
+	query_plan = plan(query)
+	if query_plan.missing:
+		sql, params = batch_query(query, query_plan.missing)
+		try:
+			with db_pool.connection() as db:
+				cursor = db.cursor()
+				try:
+					cursor.execute(sql, params)
+					rows = cursor.fetchall()
+				finally:
+					cursor.close()
+		except mysql.connector.Error as err:
+			metrics.log_event("query_read_error", level=logging.ERROR, keys=",".join(query_plan.missing), error=str(err))
+			rows = None
+		for key in add_rows(query, query_plan, rows):
+			add_live_reply(query_plan, key, indicator_handler.build_reply(key))
+	return build_messages(query, query_plan.found)
+
+
+# ----------------------------------------------------------------------------
+# Formatting
+
+def _series(points):
+	return series_store.Series(
+		np.array([record_date for record_date, _ in points], dtype="datetime64[D]"),
+		np.array([float(value) for _, value in points], dtype=np.float64),
+	)
+
+
+# ✅ What the indicator's reply shows, oldest first: YoY % for yoy_growth indicators, levels otherwise
+def display_series(info, series):
+	if info.format_type != "yoy_growth":
+		return series
+	dates, values = series_store.yoy_growth(series, len(series.dates))
+	return series_store.Series(dates[::-1], values[::-1])
+
+
+def _window(series, start, end):
+	dates, values = series
+	low = np.searchsorted(dates, np.datetime64(start, "D")) if start else 0
+	high = np.searchsorted(dates, np.datetime64(end, "D"), side="right") if end else len(dates)
+	return dates[low:high], values[low:high]
+
+
+def _points(info, dates, values):
+	# 🔹 Newest first, like the indicator replies
+	return value_formatter.format_points(info.format_type, list(zip(
+		(day.item() for day in dates[::-1]), values[::-1].tolist()
+	)))
+
+
+def format_range(info, series, start, end):
+	label = f"{start or 'first'} → {end or 'latest'}"
+	dates, values = _window(display_series(info, series), start, end)
+	if not len(dates):
+		return f"No data for {info.abbreviation} in {label}."
+
+	notes = ""
+	if len(dates) > RANGE_MAX_POINTS:
+		# 🔹 Daily & weekly series: one value per month (the month's last observation)
+		months = dates.astype("datetime64[M]")
+		month_end = np.append(months[1:] != months[:-1], True)
+		dates, values = dates[month_end], values[month_end]
+		notes += "🔹 Month-end values\n"
+	if len(dates) > RANGE_MAX_POINTS:
+		notes += f"🔹 Latest {RANGE_MAX_POINTS} of {len(dates)} points (narrow the range to see the rest)\n"
+		dates, values = dates[-RANGE_MAX_POINTS:], values[-RANGE_MAX_POINTS:]
+
+	response = f"📊 {info.name}\n🗓 {label}\n{notes}\n"
+	response += "\n".join(_points(info, dates, values))
+	return response
+
+
+def format_compare(info_a, series_a, info_b, series_b):
+	a, b = display_series(info_a, series_a), display_series(info_b, series_b)
+	if not len(a.dates) or not len(b.dates):
+		empty = info_a if not len(a.dates) else info_b
+		return f"Not enough historical data available for {empty.abbreviation}."
+
+	# 🔹 Rows follow the sparser series; the other contributes its latest value on or before each date.
+	#    Dates past either series' last observation are dropped, so no value is carried forward past its end
+	since = max(a.dates[0], b.dates[0])
+	until = min(a.dates[-1], b.dates[-1])
+	a_is_base = len(a.dates) - np.searchsorted(a.dates, since) <= len(b.dates) - np.searchsorted(b.dates, since)
+	base, other = (a, b) if a_is_base else (b, a)
+	index = np.searchsorted(other.dates, base.dates, side="right") - 1
+	valid = (index >= 0) & (base.dates <= until)
+	dates = base.dates[valid][-COMPARE_POINTS:]
+	base_values = base.values[valid][-COMPARE_POINTS:]
+	other_values = other.values[index[valid]][-COMPARE_POINTS:]
+	values_a, values_b = (base_values, other_values) if a_is_base else (other_values, base_values)
+
+	texts_a = value_formatter.format_values(info_a.format_type, values_a.tolist())
+	texts_b = value_formatter.format_values(info_b.format_type, values_b.tolist())
+	spread = info_a.format_type in PERCENT_FORMATS and info_b.format_type in PERCENT_FORMATS
+
+	response = f"📊 {info_a.abbreviation} vs {info_b.abbreviation}\n🔹 {info_a.name} | {info_b.name}\n"
+	if spread:
+		response += f"🔹 Spread = {info_a.abbreviation} − {info_b.abbreviation} (percentage points)\n"
+	response += f"\n🔹 Last {len(dates)} Data Points:\n"
+	lines = []
+	for i in range(len(dates) - 1, -1, -1):
+		line = f"{dates[i].item()}: {texts_a[i]} | {texts_b[i]}"
+		if spread:
+			line += f" ({values_a[i] - values_b[i]:+.2f})"
+		lines.append(line)
+	return response + "\n".join(lines)
+
+
+# ✅ One reply_message worth of messages (≤ MAX_MESSAGES); notes about the query go last
+def build_messages(query, found):
+	registry = indicator_registry.get_registry()
+	parts, notes = [], []
+	if query.kind == USAGE:
+		notes.append(f"❓ Could not read that date range. {USAGE_TEXT}")
+
+	elif query.kind == MULTI:
+		for key in query.keys:
+			response = found.get(key, DATA_ERROR.format(key=key))
+			parts.append((key, response if isinstance(response, list) else [TextSendMessage(text=response)]))
+
+	else:
+		composites = [key for key in query.keys if registry.get(key).components]
+		keys = [key for key in query.keys if key not in composites]
+		if composites:
+			notes.append(f"🔹 {', '.join(composites)} has several series: send it on its own.")
+		if query.kind == RANGE:
+			for key in keys:
+				text = format_range(registry.get(key), found[key], query.start, query.end) if key in found \
+					else DATA_ERROR.format(key=key)
+				parts.append((key, [TextSendMessage(text=text)]))
+		elif len(keys) == 2:
+			if all(key in found for key in keys):
+				text = format_compare(registry.get(keys[0]), found[keys[0]], registry.get(keys[1]), found[keys[1]])
+			else:
+				text = DATA_ERROR.format(key=" & ".join(keys))
+			parts.append((" vs ".join(keys), [TextSendMessage(text=text)]))
+		elif not composites:
+			notes.append(f"❓ Compare two indicators, e.g. '10YY {COMPARE_WORD} FFR'.")
+
+	if query.unknown:
+		notes.append(f"❓ Not recognized: {', '.join(query.unknown)}")
+
+	# 🔹 Keep whole answers together; keys that do not fit are listed instead of cut mid-reply
+	total = sum(len(messages) for _, messages in parts)
+	limit = MAX_MESSAGES - (1 if notes or query.skipped or total > MAX_MESSAGES else 0)
+	messages, skipped = [], []
+	for key, part in parts:
+		if skipped or len(messages) + len(part) > limit:
+			skipped.append(key)
+		else:
+			messages.extend(part)
+	skipped.extend(query.skipped)
+	if skipped:
+		notes.append(f"➕ Not shown ({MAX_MESSAGES} messages per reply): {', '.join(skipped)}. Send them separately.")
+	if notes:
+		messages.append(TextSendMessage(text="\n".join(notes)))
+	return messages
@@ -0,0 +1,36 @@
+# 📌 rate_limiter.py - Thread-safe token bucket for outbound API quotas
+import threading
+import time
+
+
+class RateLimiter:
+	"""
+	Token bucket allowing `rate` calls per `per` seconds, with bursts up to `burst`.
+
+	`acquire()` blocks the calling thread until a token is available, so a pool
+	of workers sharing one limiter stays within the quota as a group.
+	"""
+
+	def __init__(self, rate, per=1.0, burst=None):
+		self.rate = float(rate)
+		self.per = float(per)
+		self.capacity = float(burst if burst is not None else rate)
+		self._tokens = self.capacity
+		self._updated = time.monotonic()
+		self._lock = threading.Lock()
+
+	def _refill(self, now):
+		elapsed = now - self._updated
+		self._tokens = min(self.capacity, self._tokens + elapsed * self.rate / self.per)
+		self._updated = now
+
+	def acquire(self, tokens=1):
+		while True:
+			with self._lock:
+				now = time.monotonic()
+				self._refill(now)
+				if self._tokens >= tokens:
+					self._tokens -= tokens
+					return
+				wait = (tokens - self._tokens) * self.per / self.rate
+			time.sleep(wait)
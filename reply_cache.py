@@ -0,0 +1,242 @@
+# 📌 reply_cache.py - TTL/LRU cache for formatted indicator replies (in-process, or shared via Redis)
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import metrics
+
+# ✅ Cache settings (override with environment variables)
+CACHE_MAX_ENTRIES = int(os.environ.get("REPLY_CACHE_MAX_ENTRIES", "256"))
+CACHE_TTL = float(os.environ.get("REPLY_CACHE_TTL", "3600"))  # Seconds; backstop if no signal arrives
+REPLY_CACHE_URL = os.environ.get("REPLY_CACHE_URL")  # e.g. redis://127.0.0.1:6379/0 (shared by every worker)
+REPLY_CACHE_TIMEOUT = float(os.environ.get("REPLY_CACHE_TIMEOUT", "0.1"))  # Seconds per shared-cache call
+REPLY_CACHE_PREFIX = os.environ.get("REPLY_CACHE_PREFIX", "macro_bot:reply:")
+DATA_VERSION_FILE = os.environ.get(
+	"DATA_VERSION_FILE",
+	os.path.join(os.path.dirname(os.path.abspath(__file__)), "data_version.json")
+)
+
+
+class ReplyCache:
+	"""
+	Thread-safe LRU cache with a per-entry TTL.
+
+	Each entry remembers the data version it was built from; `get()` treats an
+	entry as a miss once the published version for that key has moved on.
+	"""
+
+	def __init__(self, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL):
+		self.max_entries = max_entries
+		self.ttl = ttl
+		self._entries = OrderedDict()  # key → (value, version, expires_at)
+		self._lock = threading.Lock()
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+
+	def get(self, key, version):
+		with self._lock:
+			entry = self._entries.get(key)
+			if entry is None:
+				self.misses += 1
+				return None
+
+			value, entry_version, expires_at = entry
+			if entry_version != version or time.monotonic() >= expires_at:
+				# 🔹 Stale: data was republished or the TTL ran out
+				del self._entries[key]
+				self.misses += 1
+				return None
+
+			self._entries.move_to_end(key)
+			self.hits += 1
+			return value
+
+	def put(self, key, value, version):
+		with self._lock:
+			self._entries[key] = (value, version, time.monotonic() + self.ttl)
+			self._entries.move_to_end(key)
+			while len(self._entries) > self.max_entries:
+				self._entries.popitem(last=False)
+				self.evictions += 1
+
+	def invalidate(self, key):
+		with self._lock:
+			self._entries.pop(key, None)
+
+	def clear(self):
+		with self._lock:
+			self._entries.clear()
+
+	def stats(self):
+		with self._lock:
+			return {
+				"entries": len(self._entries),
+				"max_entries": self.max_entries,
+				"ttl": self.ttl,
+				"hits": self.hits,
+				"misses": self.misses,
+				"evictions": self.evictions,
+			}
+
+
+class SharedReplyCache:
+	"""
+	Same interface as ReplyCache, backed by a Redis-compatible server so every
+	worker process (gunicorn.conf.py) reuses replies built by the others.
+
+	Entries are JSON (message texts + data version) written with the TTL; size is
+	bounded by the server's own eviction policy (e.g. `maxmemory-policy allkeys-lru`).
+	A cache that is down or slow counts as a miss; replies are then built locally.
+	"""
+
+	def __init__(self, url, ttl=CACHE_TTL, timeout=REPLY_CACHE_TIMEOUT, prefix=REPLY_CACHE_PREFIX):
+		import redis  # 🔹 Optional dependency: only needed when REPLY_CACHE_URL is set
+
+		self._errors_type = redis.RedisError
+		self._client = redis.Redis.from_url(url, socket_timeout=timeout, socket_connect_timeout=timeout)
+		self.ttl = ttl
+		self.prefix = prefix
+		self._lock = threading.Lock()
+		self.hits = 0
+		self.misses = 0
+		self.errors = 0
+
+	def _count(self, key):
+		with self._lock:
+			setattr(self, key, getattr(self, key) + 1)
+
+	def _failed(self, action, err):
+		self._count("errors")
+		metrics.log_event("reply_cache_error", level=logging.WARNING, action=action, error=str(err))
+
+	def get(self, key, version):
+		try:
+			raw = self._client.get(self.prefix + key)
+		except self._errors_type as err:
+			self._failed("get", err)
+			raw = None
+
+		entry = json.loads(raw) if raw else None
+		if entry is None or tuple(entry["version"]) != tuple(version):
+			self._count("misses")
+			return None
+
+		self._count("hits")
+		if "messages" in entry:
+			from linebot.models import TextSendMessage
+			return [TextSendMessage(text=text) for text in entry["messages"]]
+		return entry["text"]
+
+	def put(self, key, value, version):
+		entry = {"version": list(version)}
+		if isinstance(value, list):
+			entry["messages"] = [message.text for message in value]
+		else:
+			entry["text"] = value
+		try:
+			self._client.set(self.prefix + key, json.dumps(entry, ensure_ascii=False), ex=max(1, int(self.ttl)))
+		except self._errors_type as err:
+			self._failed("put", err)
+
+	def invalidate(self, key):
+		try:
+			self._client.delete(self.prefix + key)
+		except self._errors_type as err:
+			self._failed("invalidate", err)
+
+	def clear(self):
+		try:
+			keys = list(self._client.scan_iter(match=self.prefix + "*", count=500))
+			if keys:
+				self._client.delete(*keys)
+		except self._errors_type as err:
+			self._failed("clear", err)
+
+	def stats(self):
+		with self._lock:
+			stats = {"shared": True, "ttl": self.ttl, "hits": self.hits, "misses": self.misses, "errors": self.errors}
+		try:
+			stats["server_keys"] = self._client.dbsize()
+		except self._errors_type:
+			pass
+		return stats
+
+
+# ----------------------------------------------------------------------------
+# Data-version signal shared with auto_update.py
+#
+# auto_update.py calls `publish_updates()` after it commits; it bumps the version
+# of every indicator that received new rows in DATA_VERSION_FILE. Bot processes
+# re-read the file only when its mtime changes, so a cache hit costs one stat().
+# HISTORY_VERSION_KEY moves when rows were written without change-log entries
+# (backfilled history); series stores reload instead of applying the change log.
+
+HISTORY_VERSION_KEY = "*history"
+
+_versions = {}
+_versions_mtime = None
+_versions_lock = threading.Lock()
+
+
+def _read_version_file():
+	try:
+		with open(DATA_VERSION_FILE, "r", encoding="utf-8") as f:
+			return json.load(f)
+	except (OSError, ValueError):
+		return {}
+
+
+def _refresh_versions():
+	global _versions, _versions_mtime
+	try:
+		mtime = os.stat(DATA_VERSION_FILE).st_mtime_ns
+	except OSError:
+		mtime = None
+
+	if mtime == _versions_mtime:
+		return _versions
+
+	with _versions_lock:
+		if mtime != _versions_mtime:
+			_versions = _read_version_file() if mtime is not None else {}
+			_versions_mtime = mtime
+	return _versions
+
+
+# ✅ The whole version map; the same object is returned until auto_update.py publishes again
+def current_versions():
+	return _refresh_versions()
+
+
+# ✅ Current data version for a cache key (composite replies pass the abbreviations they combine)
+def current_version(key, parts=None):
+	versions = _refresh_versions()
+	return tuple(versions.get(part, 0) for part in (parts or (key,)))
+
+
+# ✅ Called by auto_update.py after a successful commit
+def publish_updates(abbreviations, history=False):
+	abbreviations = [a for a in abbreviations if a]
+	if not abbreviations:
+		return
+
+	versions = _read_version_file()
+	stamp = time.time_ns()
+	for abbreviation in abbreviations:
+		versions[abbreviation] = stamp
+	if history:
+		versions[HISTORY_VERSION_KEY] = stamp
+
+	# 🔹 Write atomically so readers never see a half-written file
+	tmp_path = f"{DATA_VERSION_FILE}.{os.getpid()}.tmp"
+	with open(tmp_path, "w", encoding="utf-8") as f:
+		json.dump(versions, f, sort_keys=True)
+	os.replace(tmp_path, DATA_VERSION_FILE)
+
+
+# ✅ Process-wide cache used by indicator_handler (shared by all workers when REPLY_CACHE_URL is set)
+reply_cache = SharedReplyCache(REPLY_CACHE_URL) if REPLY_CACHE_URL else ReplyCache()
@@ -0,0 +1,302 @@
+# 📌 scheduler.py - Resident FRED polling daemon driven by each series' release calendar
+#
+# Usage:
+#   python scheduler.py run [--notify]   # Long-running daemon (keeps one HTTP session & DB pool warm)
+#   python scheduler.py show             # Print the current polling plan
+import argparse
+import heapq
+import json
+import os
+import signal
+import time
+from datetime import datetime, date, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import mysql.connector
+import db_pool  # ✅ Shared connection pool
+import fred_client  # ✅ Shared keep-alive FRED session
+from auto_update import log, update_database
+
+# ✅ Scheduler settings (override with environment variables)
+RELEASE_TIMEZONE = ZoneInfo("America/New_York")
+DEFAULT_RELEASE_TIME = os.environ.get("SCHEDULER_RELEASE_TIME", "08:30")  # Most BLS/BEA releases
+HOT_WINDOW_HOURS = float(os.environ.get("SCHEDULER_HOT_WINDOW_HOURS", "8"))
+HOT_INTERVAL_MINUTES = float(os.environ.get("SCHEDULER_HOT_INTERVAL_MINUTES", "15"))
+CALENDAR_REFRESH_HOURS = float(os.environ.get("SCHEDULER_CALENDAR_REFRESH_HOURS", "24"))
+STATE_FILE = os.environ.get(
+	"SCHEDULER_STATE_FILE",
+	os.path.join(os.path.dirname(os.path.abspath(__file__)), "scheduler_state.json")
+)
+
+# 🔹 Known release times (FRED release_id → local New York time) that differ from the default
+RELEASE_TIMES = {
+	18: "16:15",   # H.15 Selected Interest Rates
+	21: "16:30",   # H.6 Money Stock Measures
+	53: "08:30",   # Gross Domestic Product
+	54: "10:00",   # Personal Income and Outlays
+	192: "10:00",  # Job Openings and Labor Turnover Survey
+}
+
+# 🔹 Fallback poll interval between releases, by `indicators.frequency`
+IDLE_INTERVALS = {
+	"D": timedelta(hours=12),
+	"W": timedelta(days=2),
+	"M": timedelta(days=7),
+	"Q": timedelta(days=14),
+	"Y": timedelta(days=30),
+}
+
+
+class SeriesPlan:
+	"""Polling state for one FRED series."""
+
+	def __init__(self, indicator_id, series_id, abbreviation, frequency):
+		self.indicator_id = indicator_id
+		self.series_id = series_id
+		self.abbreviation = abbreviation
+		self.frequency = frequency
+		self.release_id = None
+		self.release_name = None
+		self.upcoming_releases = []  # Aware datetimes (UTC), soonest first
+		self.next_poll = None
+		self.hot_until = None  # While set, poll every HOT_INTERVAL_MINUTES until data lands
+		self.last_poll = None
+		self.last_change = None
+
+	def next_release(self, now):
+		return next((release for release in self.upcoming_releases if release + hot_window() > now), None)
+
+	def to_dict(self, now):
+		release = self.next_release(now)
+		return {
+			"series_id": self.series_id,
+			"abbreviation": self.abbreviation,
+			"frequency": self.frequency,
+			"release": self.release_name,
+			"next_release": release.isoformat() if release else None,
+			"next_poll": self.next_poll.isoformat() if self.next_poll else None,
+			"mode": "hot" if self.hot_until and self.hot_until > now else "idle",
+			"last_poll": self.last_poll.isoformat() if self.last_poll else None,
+			"last_change": self.last_change.isoformat() if self.last_change else None,
+		}
+
+
+def hot_window():
+	return timedelta(hours=HOT_WINDOW_HOURS)
+
+
+def utcnow():
+	return datetime.now(timezone.utc)
+
+
+# ✅ Release date (YYYY-MM-DD) → aware UTC datetime at the release's publication time
+def release_datetime(release_date, release_id):
+	hour, minute = (int(part) for part in RELEASE_TIMES.get(release_id, DEFAULT_RELEASE_TIME).split(":"))
+	day = date.fromisoformat(release_date)
+	local = datetime(day.year, day.month, day.day, hour, minute, tzinfo=RELEASE_TIMEZONE)
+	return local.astimezone(timezone.utc)
+
+
+# ✅ Load every FRED series with its frequency
+def load_series(cursor):
+	cursor.execute("""
+		SELECT indicator_id, fred_series_id, abbreviation, frequency
+		FROM indicators
+		WHERE source = 'FRED' AND fred_series_id IS NOT NULL
+		ORDER BY indicator_id
+	""")
+	return [SeriesPlan(*row) for row in cursor.fetchall()]
+
+
+def load_api_key(cursor):
+	cursor.execute("SELECT api_key FROM data_sources WHERE source_name = 'FRED'")
+	return cursor.fetchone()[0]
+
+
+# ✅ Ask FRED which release each series belongs to and when that release is next published
+def refresh_calendar(plan, api_key, today=None):
+	today = today or date.today()
+	try:
+		if plan.release_id is None:
+			data = fred_client.get_json("series/release", {"series_id": plan.series_id, "api_key": api_key})
+			releases = data.get("releases") or []
+			if releases:
+				plan.release_id = releases[0]["id"]
+				plan.release_name = releases[0].get("name")
+		if plan.release_id is None:
+			return
+
+		data = fred_client.get_json("release/dates", {
+			"release_id": plan.release_id,
+			"api_key": api_key,
+			"realtime_start": (today - timedelta(days=1)).isoformat(),
+			"include_release_dates_with_no_data": "true",
+			"sort_order": "asc",
+			"limit": 10,
+		})
+		plan.upcoming_releases = sorted(
+			release_datetime(entry["date"], plan.release_id) for entry in data.get("release_dates", [])
+		)
+	except Exception as e:  # ✅ No calendar → fall back to the frequency-based interval
+		log(f"⚠️ Release calendar unavailable for {plan.series_id}: {e}")
+
+
+# ✅ Decide when a series should be polled next
+#    `landed`: the last poll stored an observation newer than any before it (revisions don't count)
+def plan_next_poll(plan, now, landed=False):
+	if landed:
+		plan.last_change = now
+		plan.hot_until = None  # Data for this release has landed
+
+	# 🔹 Inside a release's hot window: keep polling frequently until the data shows up
+	if plan.hot_until and now < plan.hot_until:
+		plan.next_poll = now + timedelta(minutes=HOT_INTERVAL_MINUTES)
+		return plan.next_poll
+
+	idle_poll = now + IDLE_INTERVALS.get(plan.frequency, IDLE_INTERVALS["M"])
+	release = plan.next_release(now)
+	if release is not None and (plan.last_change is None or plan.last_change < release):
+		if release <= now:
+			plan.hot_until = release + hot_window()
+			plan.next_poll = now
+			return plan.next_poll
+		plan.next_poll = min(release, idle_poll)
+		plan.hot_until = None
+		return plan.next_poll
+
+	plan.hot_until = None
+	plan.next_poll = idle_poll
+	return plan.next_poll
+
+
+def write_state(plans, now):
+	state = {"generated_at": now.isoformat(), "series": [p.to_dict(now) for p in sorted(plans, key=lambda p: p.next_poll)]}
+	tmp_path = f"{STATE_FILE}.{os.getpid()}.tmp"
+	with open(tmp_path, "w", encoding="utf-8") as f:
+		json.dump(state, f, indent=2)
+	os.replace(tmp_path, STATE_FILE)
+
+
+# ✅ Build plans for every series (calendar lookups included)
+def build_plans():
+	with db_pool.connection() as db:
+		cursor = db.cursor()
+		try:
+			plans = load_series(cursor)
+			api_key = load_api_key(cursor)
+		finally:
+			cursor.close()
+
+	for plan in plans:
+		refresh_calendar(plan, api_key)
+	now = utcnow()
+	for plan in plans:
+		plan_next_poll(plan, now)
+	return plans, api_key
+
+
+# ----------------------------------------------------------------------------
+# Daemon
+
+_running = True
+
+
+def _stop(signum, frame):
+	global _running
+	log(f"Received signal {signum}; stopping after the current poll.")
+	_running = False
+
+
+def run(notify=False):
+	signal.signal(signal.SIGTERM, _stop)
+	signal.signal(signal.SIGINT, _stop)
+
+	db_pool.init_pool()
+	plans, api_key = build_plans()
+	by_series = {plan.series_id: plan for plan in plans}
+	queue = [(plan.next_poll, plan.series_id) for plan in plans]
+	heapq.heapify(queue)
+	calendar_refreshed = utcnow()
+	write_state(plans, calendar_refreshed)
+	log(f"📅 Scheduler started with {len(plans)} series; state in {STATE_FILE}")
+
+	while _running:
+		now = utcnow()
+
+		# 🔹 Refresh release calendars once a day
+		if now - calendar_refreshed >= timedelta(hours=CALENDAR_REFRESH_HOURS):
+			for plan in plans:
+				refresh_calendar(plan, api_key)
+				plan_next_poll(plan, now)
+			queue = [(plan.next_poll, plan.series_id) for plan in plans]
+			heapq.heapify(queue)
+			calendar_refreshed = now
+
+		# 🔹 Collect everything that is due and poll it in one batched update
+		due = []
+		while queue and queue[0][0] <= now:
+			_, series_id = heapq.heappop(queue)
+			due.append(by_series[series_id])
+
+		if due:
+			log(f"🔄 Polling {len(due)} due series: {', '.join(p.series_id for p in due)}")
+			landed = set()
+			try:
+				changed = update_database(series_ids=[plan.series_id for plan in due], landed=landed)
+			except mysql.connector.Error as err:
+				log(f"❌ Poll failed: {err}")
+				changed = set()
+
+			now = utcnow()
+			for plan in due:
+				plan.last_poll = now
+				heapq.heappush(queue, (plan_next_poll(plan, now, plan.abbreviation in landed), plan.series_id))
+
+			if changed and notify:
+				import auto_send_if_updated  # Imported lazily: only needed with --notify
+				auto_send_if_updated.process_change_log()
+			write_state(plans, now)
+
+		# 🔹 Sleep until the next due poll (wake up at least once a minute to honor signals)
+		sleep_for = (queue[0][0] - utcnow()).total_seconds() if queue else 60
+		time.sleep(min(max(sleep_for, 1), 60))
+
+	log("Scheduler stopped.")
+
+
+# ----------------------------------------------------------------------------
+# Introspection
+
+def show(live=False):
+	if not live and os.path.exists(STATE_FILE):
+		with open(STATE_FILE, "r", encoding="utf-8") as f:
+			state = json.load(f)
+		print(f"Schedule written by the running daemon at {state['generated_at']}:")
+		rows = state["series"]
+	else:
+		plans, _ = build_plans()
+		now = utcnow()
+		print(f"Schedule computed now ({now.isoformat()}):")
+		rows = [plan.to_dict(now) for plan in sorted(plans, key=lambda p: p.next_poll)]
+
+	print(f"{'series':<16} {'abbr':<10} {'freq':<4} {'mode':<5} {'next poll (UTC)':<26} {'next release (UTC)':<26} release")
+	for row in rows:
+		print(
+			f"{row['series_id']:<16} {row['abbreviation']:<10} {row['frequency'] or '-':<4} {row['mode']:<5} "
+			f"{(row['next_poll'] or '-')[:25]:<26} {(row['next_release'] or '-')[:25]:<26} {row['release'] or '-'}"
+		)
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="FRED release-calendar scheduler")
+	subcommands = parser.add_subparsers(dest="command", required=True)
+	run_parser = subcommands.add_parser("run", help="Run the polling daemon")
+	run_parser.add_argument("--notify", action="store_true", help="Run the notifier after each change")
+	show_parser = subcommands.add_parser("show", help="Print the polling schedule")
+	show_parser.add_argument("--live", action="store_true", help="Recompute instead of reading the daemon's state file")
+	args = parser.parse_args()
+
+	if args.command == "run":
+		run(notify=args.notify)
+	else:
+		show(live=args.live)
@@ -15,6 +15,24 @@
 /*!40101 SET @OLD_SQL_MODE=@@SQL_MODE, SQL_MODE='NO_AUTO_VALUE_ON_ZERO' */;
 /*!40111 SET @OLD_SQL_NOTES=@@SQL_NOTES, SQL_NOTES=0 */;
 
+--
+-- Table structure for table `backfill_checkpoints`
+--
+
+DROP TABLE IF EXISTS `backfill_checkpoints`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!40101 SET character_set_client = utf8 */;
+CREATE TABLE `backfill_checkpoints` (
+  `series_id` varchar(50) NOT NULL,
+  `mode` enum('observations','vintages') NOT NULL,
+  `next_start` date DEFAULT NULL,
+  `rows_written` bigint NOT NULL DEFAULT '0',
+  `completed_at` timestamp NULL DEFAULT NULL,
+  `updated_at` timestamp NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`series_id`,`mode`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
 --
 -- Table structure for table `data_sources`
 --
@@ -36,6 +54,26 @@ CREATE TABLE `data_sources` (
 ) ENGINE=InnoDB AUTO_INCREMENT=2 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 /*!40101 SET character_set_client = @saved_cs_client */;
 
+--
+-- Table structure for table `indicator_changes`
+--
+
+DROP TABLE IF EXISTS `indicator_changes`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!40101 SET character_set_client = utf8 */;
+CREATE TABLE `indicator_changes` (
+  `change_id` bigint NOT NULL AUTO_INCREMENT,
+  `indicator_id` int NOT NULL,
+  `record_date` date NOT NULL,
+  `old_value` decimal(18,6) DEFAULT NULL,
+  `new_value` decimal(18,6) NOT NULL,
+  `changed_at` timestamp NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`change_id`),
+  KEY `indicator_id` (`indicator_id`,`record_date`),
+  CONSTRAINT `indicator_changes_ibfk_1` FOREIGN KEY (`indicator_id`) REFERENCES `indicators` (`indicator_id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
 --
 -- Table structure for table `indicator_data`
 --
@@ -51,10 +89,30 @@ CREATE TABLE `indicator_data` (
   `last_updated` timestamp NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
   PRIMARY KEY (`data_id`),
   UNIQUE KEY `indicator_id` (`indicator_id`,`record_date`),
+  KEY `idx_last_updated` (`last_updated`,`indicator_id`),
   CONSTRAINT `indicator_data_ibfk_1` FOREIGN KEY (`indicator_id`) REFERENCES `indicators` (`indicator_id`) ON DELETE CASCADE
 ) ENGINE=InnoDB AUTO_INCREMENT=357967 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 /*!40101 SET character_set_client = @saved_cs_client */;
 
+--
+-- Table structure for table `indicator_data_archive`
+--
+
+DROP TABLE IF EXISTS `indicator_data_archive`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!40101 SET character_set_client = utf8 */;
+CREATE TABLE `indicator_data_archive` (
+  `indicator_id` int NOT NULL,
+  `period_end` date NOT NULL,
+  `first_date` date NOT NULL,
+  `last_date` date NOT NULL,
+  `points` int NOT NULL,
+  `payload` mediumblob NOT NULL,
+  `archived_at` timestamp NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`indicator_id`,`period_end`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
 --
 -- Table structure for table `indicator_metadata`
 --
@@ -75,6 +133,51 @@ CREATE TABLE `indicator_metadata` (
 ) ENGINE=InnoDB AUTO_INCREMENT=32 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 /*!40101 SET character_set_client = @saved_cs_client */;
 
+--
+-- Table structure for table `indicator_snapshots`
+--
+
+DROP TABLE IF EXISTS `indicator_snapshots`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!40101 SET character_set_client = utf8 */;
+CREATE TABLE `indicator_snapshots` (
+  `reply_key` varchar(10) NOT NULL,
+  `indicator_id` int DEFAULT NULL,
+  `latest_date` date DEFAULT NULL,
+  `latest_value` decimal(18,6) DEFAULT NULL,
+  `previous_value` decimal(18,6) DEFAULT NULL,
+  `delta` decimal(18,6) DEFAULT NULL,
+  `yoy_pct` decimal(12,4) DEFAULT NULL,
+  `high_52w` decimal(18,6) DEFAULT NULL,
+  `low_52w` decimal(18,6) DEFAULT NULL,
+  `pct_from_high` decimal(12,4) DEFAULT NULL,
+  `reply_json` json DEFAULT NULL,
+  `refreshed_at` timestamp NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`reply_key`),
+  KEY `indicator_id` (`indicator_id`),
+  CONSTRAINT `indicator_snapshots_ibfk_1` FOREIGN KEY (`indicator_id`) REFERENCES `indicators` (`indicator_id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
+--
+-- Table structure for table `indicator_vintages`
+--
+
+DROP TABLE IF EXISTS `indicator_vintages`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!40101 SET character_set_client = utf8 */;
+CREATE TABLE `indicator_vintages` (
+  `indicator_id` int NOT NULL,
+  `record_date` date NOT NULL,
+  `realtime_start` date NOT NULL,
+  `realtime_end` date NOT NULL,
+  `value` decimal(18,6) DEFAULT NULL,
+  PRIMARY KEY (`indicator_id`,`record_date`,`realtime_start`),
+  KEY `idx_realtime` (`indicator_id`,`realtime_start`,`realtime_end`),
+  CONSTRAINT `indicator_vintages_ibfk_1` FOREIGN KEY (`indicator_id`) REFERENCES `indicators` (`indicator_id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
 --
 -- Table structure for table `indicators`
 --
@@ -94,11 +197,87 @@ CREATE TABLE `indicators` (
   `updated_at` timestamp NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
   `abbreviation` varchar(10) NOT NULL,
   `note` text,
+  `format_type` varchar(20) NOT NULL DEFAULT 'decimal_2',
+  `reply_handler` varchar(20) NOT NULL DEFAULT 'standard',
+  `reply_group` varchar(10) DEFAULT NULL,
   PRIMARY KEY (`indicator_id`),
   UNIQUE KEY `indicator_name` (`indicator_name`),
   UNIQUE KEY `abbreviation` (`abbreviation`)
 ) ENGINE=InnoDB AUTO_INCREMENT=35 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 /*!40101 SET character_set_client = @saved_cs_client */;
+
+--
+-- Table structure for table `notifier_deliveries`
+--
+
+DROP TABLE IF EXISTS `notifier_deliveries`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!40101 SET character_set_client = utf8 */;
+CREATE TABLE `notifier_deliveries` (
+  `consumer` varchar(64) NOT NULL,
+  `batch_no` int NOT NULL,
+  `start_change_id` bigint NOT NULL,
+  `end_change_id` bigint NOT NULL,
+  `retry_key` char(36) NOT NULL,
+  `user_ids` json NOT NULL,
+  `message` text NOT NULL,
+  `delivered_at` timestamp NULL DEFAULT NULL,
+  `created_at` timestamp NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`consumer`,`batch_no`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
+--
+-- Table structure for table `notifier_cursors`
+--
+
+DROP TABLE IF EXISTS `notifier_cursors`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!40101 SET character_set_client = utf8 */;
+CREATE TABLE `notifier_cursors` (
+  `consumer` varchar(64) NOT NULL,
+  `last_change_id` bigint NOT NULL DEFAULT '0',
+  `updated_at` timestamp NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`consumer`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
+--
+-- Table structure for table `subscribers`
+--
+
+DROP TABLE IF EXISTS `subscribers`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!40101 SET character_set_client = utf8 */;
+CREATE TABLE `subscribers` (
+  `user_id` varchar(64) NOT NULL,
+  `active` tinyint(1) NOT NULL DEFAULT '1',
+  `created_at` timestamp NULL DEFAULT CURRENT_TIMESTAMP,
+  `updated_at` timestamp NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`user_id`),
+  KEY `idx_active` (`active`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
+--
+-- Table structure for table `subscriptions`
+--
+
+DROP TABLE IF EXISTS `subscriptions`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!40101 SET character_set_client = utf8 */;
+CREATE TABLE `subscriptions` (
+  `subscription_id` int NOT NULL AUTO_INCREMENT,
+  `user_id` varchar(64) NOT NULL,
+  `reply_key` varchar(10) NOT NULL,
+  `active` tinyint(1) NOT NULL DEFAULT '1',
+  `created_at` timestamp NULL DEFAULT CURRENT_TIMESTAMP,
+  `updated_at` timestamp(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+  PRIMARY KEY (`subscription_id`),
+  UNIQUE KEY `user_reply_key` (`user_id`,`reply_key`),
+  KEY `idx_updated_at` (`updated_at`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
 /*!40103 SET TIME_ZONE=@OLD_TIME_ZONE */;
 
 /*!40101 SET SQL_MODE=@OLD_SQL_MODE */;
@@ -0,0 +1,326 @@
+# 📌 series_store.py - Columnar in-memory copy of indicator_data with vectorized NumPy metrics
+import logging
+import os
+import threading
+import time
+from collections import namedtuple
+from datetime import date, timedelta
+from decimal import Decimal
+
+import mysql.connector
+import numpy as np
+
+import db_pool  # ✅ Shared connection pool
+import metrics
+import reply_cache  # ✅ Data-version signal published by auto_update.py
+import storage_layout  # ✅ Archive rows for rolled-up indicator_data partitions
+import value_formatter
+
+# ✅ Seconds between change-log polls when no data-version signal arrives (backstop)
+SERIES_STORE_REFRESH_INTERVAL = float(os.environ.get("SERIES_STORE_REFRESH_INTERVAL", "300"))
+# ✅ Seconds a missing change id is re-polled for before it is taken as rolled back
+SERIES_STORE_GAP_GRACE = float(os.environ.get("SERIES_STORE_GAP_GRACE", "60"))
+
+# ✅ One indicator's history, oldest first (arrays are never mutated once published)
+Series = namedtuple("Series", ["dates", "values"])  # datetime64[D], float64
+
+# ✅ Everything a reply needs about one indicator
+SeriesMetrics = namedtuple("SeriesMetrics", [
+	"latest_date", "latest", "previous",
+	"high_52w", "low_52w", "pct_from_high",
+	"history",     # [(date, Decimal)] newest first
+	"yoy",         # [(date, Decimal percent)] newest first
+])
+
+ALL_ROWS_QUERY = """
+	SELECT indicator_id, record_date, value
+	FROM indicator_data
+	ORDER BY indicator_id, record_date;
+"""
+
+ARCHIVE_QUERY = """
+	SELECT indicator_id, payload
+	FROM indicator_data_archive
+	ORDER BY indicator_id, period_end;
+"""
+
+CHANGES_QUERY = """
+	SELECT change_id, indicator_id, record_date, new_value
+	FROM indicator_changes
+	WHERE change_id > %s
+	ORDER BY change_id;
+"""
+
+
+def _to_arrays(rows):
+	dates = np.array([record_date for record_date, _ in rows], dtype="datetime64[D]")
+	values = np.array([float(value) for _, value in rows], dtype=np.float64)
+	return dates, values
+
+
+def _decimal(value):
+	# 🔹 repr() of a float64 read from DECIMAL(18,6) round-trips to the stored digits
+	return Decimal(repr(float(value)))
+
+
+# ✅ Insert/replace points by date; the newest value for a date wins
+def merge(series, dates, values):
+	if series is None:
+		all_dates, all_values = dates, values
+	else:
+		all_dates = np.concatenate([series.dates, dates])
+		all_values = np.concatenate([series.values, values])
+	order = np.argsort(all_dates, kind="stable")
+	all_dates, all_values = all_dates[order], all_values[order]
+	keep = np.append(all_dates[1:] != all_dates[:-1], True)  # Last occurrence of each date
+	return Series(all_dates[keep], all_values[keep])
+
+
+# ----------------------------------------------------------------------------
+# Vectorized metrics (same definitions as value_formatter / snapshots.SNAPSHOT_METRICS_QUERY)
+
+def months_earlier(dates, months):
+	# ✅ DATE_SUB(d, INTERVAL n MONTH) for a whole array: clamps to the month end (Mar 31 → Feb 28/29)
+	month_start = dates.astype("datetime64[M]")
+	day_offset = (dates - month_start.astype("datetime64[D]")).astype(np.int64)
+	target_month = month_start - months
+	target_start = target_month.astype("datetime64[D]")
+	month_length = ((target_month + 1).astype("datetime64[D]") - target_start).astype(np.int64)
+	return target_start + np.minimum(day_offset, month_length - 1)
+
+
+def yoy_growth(series, limit):
+	# ✅ Percent change vs. the observation exactly 12 months earlier, newest first
+	dates, values = series
+	if not len(dates):
+		return np.array([], dtype="datetime64[D]"), np.array([], dtype=np.float64)
+	target = months_earlier(dates, 12)
+	index = np.searchsorted(dates, target)
+	clipped = np.minimum(index, len(dates) - 1)
+	past = values[clipped]
+	valid = (index < len(dates)) & (dates[clipped] == target) & (past != 0)
+	selected = np.flatnonzero(valid)[::-1][:limit]
+	return dates[selected], (values[selected] - past[selected]) / past[selected] * 100
+
+
+def high_low_52w(series, today=None):
+	dates, values = series
+	start = np.datetime64((today or date.today()) - timedelta(weeks=52), "D")
+	window = values[np.searchsorted(dates, start):]
+	if not len(window):
+		return None, None
+	return window.max(), window.min()
+
+
+def compute_metrics(series, history=15, today=None):
+	dates, values = series
+	if not len(dates):
+		return None
+
+	high, low = high_low_52w(series, today)
+	high = _decimal(high) if high is not None else None
+	latest = _decimal(values[-1])
+	yoy_dates, yoy_values = yoy_growth(series, history)
+
+	return SeriesMetrics(
+		latest_date=dates[-1].item(),
+		latest=latest,
+		previous=_decimal(values[-2]) if len(values) > 1 else None,
+		high_52w=high,
+		low_52w=_decimal(low) if low is not None else None,
+		pct_from_high=value_formatter.percent_below(high, latest),  # 🔹 Scalar: exact Decimal rounding
+		history=[(d.item(), _decimal(v)) for d, v in zip(dates[::-1][:history], values[::-1][:history])],
+		yoy=[(d.item(), _decimal(v)) for d, v in zip(yoy_dates, yoy_values)],
+	)
+
+
+# ✅ Composite replies (JOLTS): the latest `limit` dates any member has, one value per member
+#    (None where a member has no observation), newest first
+def pivot_latest(members, limit):
+	dates = np.unique(np.concatenate([member.dates for member in members]))[::-1][:limit]
+	columns = []
+	for member in members:  # 🔹 Stored series always hold at least one point
+		index = np.minimum(np.searchsorted(member.dates, dates), len(member.dates) - 1)
+		found = member.dates[index] == dates
+		columns.append([_decimal(value) if ok else None for value, ok in zip(member.values[index], found)])
+	return [(day.item(), *values) for day, values in zip(dates, zip(*columns))]
+
+
+# ----------------------------------------------------------------------------
+# Store
+
+class SeriesStore:
+	"""
+	indicator_id → Series for every indicator, held by the bot process.
+
+	`load()` reads indicator_data once; `refresh()` applies only the
+	`indicator_changes` rows written since the last refresh, so keeping the
+	store current after an auto_update run costs one small range scan.
+
+	Writers commit change ids in id order (db_pool.data_write_lock), so a
+	missing id is normally a rolled-back transaction. Should one still commit
+	late, it is picked up: missing ids are re-read for SERIES_STORE_GAP_GRACE
+	seconds, re-applying the changes after them in id order (idempotent).
+
+	Refreshes are single-flight: one thread reads the change log while every
+	other request keeps serving the current arrays, and the database is read
+	outside the swap lock, so readers never wait on I/O.
+	"""
+
+	def __init__(self):
+		self._series = {}
+		self._last_change_id = 0
+		self._gaps = {}  # Missing change id → monotonic time it was first missed
+		self._versions_seen = None
+		self._history_seen = None
+		self._last_refresh = 0.0
+		self._lock = threading.Lock()  # Guards the swap of the published state only
+		self._refresh_lock = threading.RLock()  # One load/refresh at a time (catch_up may load inside a refresh)
+		self.loaded = False
+		self.load_seconds = None
+		self.auto_refresh = True  # The async server refreshes from a background task instead
+
+	def load(self):
+		with self._refresh_lock:
+			return self._load()
+
+	def _load(self):
+		start = time.perf_counter()
+		versions = reply_cache.current_versions()  # 🔹 Before reading: a later publish is not missed
+		with db_pool.connection() as db:
+			cursor = db.cursor()
+			try:
+				# 🔹 Take the change-log position first: later changes are re-applied, never missed.
+				#    Every id up to it is committed too: writers hold db_pool.data_write_lock until commit
+				cursor.execute("SELECT COALESCE(MAX(change_id), 0) FROM indicator_changes")
+				last_change_id = cursor.fetchone()[0]
+				cursor.execute(ALL_ROWS_QUERY)
+				rows = cursor.fetchall()
+				cursor.execute(ARCHIVE_QUERY)
+				archived = cursor.fetchall()
+			finally:
+				cursor.close()
+
+		series = {}
+		start_index = 0
+		for end_index in range(1, len(rows) + 1):
+			if end_index == len(rows) or rows[end_index][0] != rows[start_index][0]:
+				series[rows[start_index][0]] = Series(*_to_arrays(
+					[(record_date, value) for _, record_date, value in rows[start_index:end_index]]
+				))
+				start_index = end_index
+
+		# 🔹 History rolled up by storage_layout.py; live rows win where both hold a date
+		for indicator_id, payload in archived:
+			archive = Series(*_to_arrays(storage_layout.unpack_archive(payload)))
+			live = series.get(indicator_id)
+			series[indicator_id] = merge(archive, live.dates, live.values) if live is not None else archive
+
+		with self._lock:
+			self._series = series
+			self._last_change_id = last_change_id
+			self._gaps = {}
+			self._versions_seen = versions
+			self._history_seen = versions.get(reply_cache.HISTORY_VERSION_KEY)
+			self._last_refresh = time.monotonic()
+			self.loaded = True
+		self.load_seconds = time.perf_counter() - start
+		return len(rows)
+
+	def refresh(self):
+		with self._refresh_lock:
+			return self._refresh()
+
+	def _refresh(self):
+		# 🔹 Re-read from the oldest missing id: changes after it are re-applied in id order
+		floor = min(self._gaps, default=self._last_change_id + 1) - 1
+		with db_pool.connection() as db:
+			cursor = db.cursor()
+			try:
+				cursor.execute(CHANGES_QUERY, (floor,))
+				changes = cursor.fetchall()
+			finally:
+				cursor.close()
+
+		by_indicator = {}
+		seen = set()
+		for change_id, indicator_id, record_date, new_value in changes:
+			by_indicator.setdefault(indicator_id, []).append((record_date, new_value))
+			seen.add(change_id)
+
+		series = dict(self._series)  # 🔹 Only refreshes & loads replace it, and they hold _refresh_lock
+		for indicator_id, points in by_indicator.items():
+			series[indicator_id] = merge(series.get(indicator_id), *_to_arrays(points))
+		with self._lock:
+			self._series = series  # 🔹 Atomic swap; readers keep the arrays they already hold
+			self._track_gaps(floor, seen)
+			self._last_refresh = time.monotonic()
+		return len(changes)
+
+	def _track_gaps(self, floor, seen):
+		now = time.monotonic()
+		last_change_id = max(seen, default=self._last_change_id)
+		gaps = {}
+		for change_id in range(floor + 1, last_change_id):
+			if change_id in seen:
+				continue
+			if change_id <= self._last_change_id and change_id not in self._gaps:
+				continue  # Already given up on
+			first_missed = self._gaps.get(change_id, now)
+			if now - first_missed < SERIES_STORE_GAP_GRACE:
+				gaps[change_id] = first_missed
+		self._gaps = gaps
+		self._last_change_id = max(self._last_change_id, last_change_id)
+
+	# ✅ Apply the change log, or reload when history was written without one (backfill)
+	def catch_up(self):
+		with self._refresh_lock:
+			if reply_cache.current_versions().get(reply_cache.HISTORY_VERSION_KEY) != self._history_seen:
+				return self._load()
+			return self._refresh()
+
+	# ✅ Refresh when auto_update.py published a new data version (or the backstop interval passed)
+	def maybe_refresh(self):
+		if not self.loaded:
+			return
+		if not self._due():
+			return
+		if not self._refresh_lock.acquire(blocking=False):
+			return  # 🔹 Another thread is refreshing: serve the arrays we have
+		try:
+			if not self._due():
+				return  # It finished while we were checking
+			self._versions_seen = reply_cache.current_versions()
+			self.catch_up()
+		except mysql.connector.Error as err:
+			# 🔹 Keep serving the arrays we have; retry after the backstop interval
+			self._last_refresh = time.monotonic()
+			metrics.log_event("series_store_refresh_error", level=logging.ERROR, error=str(err))
+		finally:
+			self._refresh_lock.release()
+
+	def _due(self):
+		interval = 1.0 if self._gaps else SERIES_STORE_REFRESH_INTERVAL  # 🔹 Poll briefly while ids are missing
+		return (reply_cache.current_versions() is not self._versions_seen
+				or time.monotonic() - self._last_refresh >= interval)
+
+	def get(self, indicator_id):
+		if self.auto_refresh:
+			self.maybe_refresh()
+		return self._series.get(indicator_id)
+
+	def stats(self):
+		series = self._series
+		return {
+			"loaded": self.loaded,
+			"indicators": len(series),
+			"points": sum(len(s.dates) for s in series.values()),
+			"bytes": sum(s.dates.nbytes + s.values.nbytes for s in series.values()),
+			"last_change_id": self._last_change_id,
+			"pending_gaps": len(self._gaps),
+			"load_seconds": self.load_seconds,
+		}
+
+
+# ✅ Process-wide store (loaded by the bot at startup)
+series_store = SeriesStore()
@@ -0,0 +1,162 @@
+# 📌 snapshots.py - Precomputed per-indicator snapshot rows (written by auto_update, read by the bot)
+import json
+import logging
+from decimal import Decimal
+
+import mysql.connector
+import db_pool  # ✅ Shared connection pool
+import metrics
+
+# ✅ Everything a reply needs about one indicator, gathered with index lookups only
+SNAPSHOT_METRICS_QUERY = """
+	SELECT
+		latest.record_date,
+		latest.value,
+		(SELECT d.value FROM indicator_data d
+		 WHERE d.indicator_id = %(id)s AND d.record_date < latest.record_date
+		 ORDER BY d.record_date DESC LIMIT 1) AS previous_value,
+		(SELECT d.value FROM indicator_data d
+		 WHERE d.indicator_id = %(id)s
+		 AND d.record_date = DATE_SUB(latest.record_date, INTERVAL 12 MONTH)) AS year_ago_value,
+		(SELECT MAX(d.value) FROM indicator_data d
+		 WHERE d.indicator_id = %(id)s AND d.record_date >= DATE_SUB(CURDATE(), INTERVAL 52 WEEK)) AS high_52w,
+		(SELECT MIN(d.value) FROM indicator_data d
+		 WHERE d.indicator_id = %(id)s AND d.record_date >= DATE_SUB(CURDATE(), INTERVAL 52 WEEK)) AS low_52w
+	FROM (
+		SELECT record_date, value FROM indicator_data
+		WHERE indicator_id = %(id)s
+		ORDER BY record_date DESC LIMIT 1
+	) latest;
+"""
+
+UPSERT_SNAPSHOT_QUERY = """
+	INSERT INTO indicator_snapshots (
+		reply_key, indicator_id, latest_date, latest_value, previous_value, delta,
+		yoy_pct, high_52w, low_52w, pct_from_high, reply_json
+	) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+	ON DUPLICATE KEY UPDATE
+		indicator_id = VALUES(indicator_id),
+		latest_date = VALUES(latest_date),
+		latest_value = VALUES(latest_value),
+		previous_value = VALUES(previous_value),
+		delta = VALUES(delta),
+		yoy_pct = VALUES(yoy_pct),
+		high_52w = VALUES(high_52w),
+		low_52w = VALUES(low_52w),
+		pct_from_high = VALUES(pct_from_high),
+		reply_json = VALUES(reply_json),
+		refreshed_at = NOW();
+"""
+
+
+def _pct(numerator, denominator):
+	if numerator is None or not denominator:
+		return None
+	return round(Decimal(numerator) / Decimal(denominator) * 100, 4)
+
+
+# ✅ Derived metrics for one indicator (None values when there is not enough history)
+def compute_metrics(cursor, indicator_id):
+	cursor.execute(SNAPSHOT_METRICS_QUERY, {"id": indicator_id})
+	row = cursor.fetchone()
+	if not row:
+		return None
+
+	latest_date, latest, previous, year_ago, high_52w, low_52w = row
+	return {
+		"latest_date": latest_date,
+		"latest_value": latest,
+		"previous_value": previous,
+		"delta": latest - previous if previous is not None else None,
+		"yoy_pct": _pct(latest - year_ago, year_ago) if year_ago is not None else None,
+		"high_52w": high_52w,
+		"low_52w": low_52w,
+		"pct_from_high": _pct(high_52w - latest, high_52w) if high_52w is not None else None,
+	}
+
+
+# 🔹 Replies are stored as the list of message texts (JOLTS sends several)
+def encode_reply(texts):
+	return json.dumps({"messages": list(texts)}, ensure_ascii=False)
+
+
+def decode_reply(reply_json):
+	if isinstance(reply_json, (bytes, bytearray)):
+		reply_json = reply_json.decode("utf-8")
+	return json.loads(reply_json)["messages"]
+
+
+# ✅ Rebuild every snapshot row; `build_reply(key)` returns the reply's message texts or None
+def materialize_snapshots(db, cursor, reply_keys, build_reply):
+	"""
+	`reply_keys` is a list of (indicator_id, reply_key) pairs; composite replies
+	such as JOLTS have no single indicator and pass None (no metrics are stored).
+	"""
+	written = 0
+	for indicator_id, key in reply_keys:
+		stats = compute_metrics(cursor, indicator_id) if indicator_id is not None else None
+		stats = stats or {}
+		texts = build_reply(key)
+		cursor.execute(UPSERT_SNAPSHOT_QUERY, (
+			key,
+			indicator_id,
+			stats.get("latest_date"),
+			stats.get("latest_value"),
+			stats.get("previous_value"),
+			stats.get("delta"),
+			stats.get("yoy_pct"),
+			stats.get("high_52w"),
+			stats.get("low_52w"),
+			stats.get("pct_from_high"),
+			encode_reply(texts) if texts is not None else None,
+		))
+		written += 1
+
+	db.commit()
+	return written
+
+
+READ_REPLY_QUERY = "SELECT reply_json FROM indicator_snapshots WHERE reply_key = %s"
+
+
+# ✅ Request-time read: one primary-key lookup; returns message texts or None on a miss
+def read_reply(reply_key):
+	try:
+		with db_pool.connection() as db:
+			cursor = db.cursor()
+			try:
+				cursor.execute(READ_REPLY_QUERY, (reply_key,))
+				row = cursor.fetchone()
+			finally:
+				cursor.close()
+	except mysql.connector.Error as err:
+		metrics.log_event("snapshot_read_error", level=logging.ERROR, reply_key=reply_key, error=str(err))
+		return None
+
+	if not row or row[0] is None:
+		return None
+	return decode_reply(row[0])
+
+
+# ✅ Several replies in one round-trip (multi-indicator queries); returns {reply_key: message texts}
+def read_replies_query(count):
+	return f"SELECT reply_key, reply_json FROM indicator_snapshots WHERE reply_key IN ({', '.join(['%s'] * count)})"
+
+
+def decode_replies(rows):
+	return {reply_key: decode_reply(reply_json) for reply_key, reply_json in rows if reply_json is not None}
+
+
+def read_replies(reply_keys):
+	try:
+		with db_pool.connection() as db:
+			cursor = db.cursor()
+			try:
+				cursor.execute(read_replies_query(len(reply_keys)), tuple(reply_keys))
+				rows = cursor.fetchall()
+			finally:
+				cursor.close()
+	except mysql.connector.Error as err:
+		metrics.log_event("snapshot_read_error", level=logging.ERROR, reply_key=",".join(reply_keys), error=str(err))
+		return {}
+	return decode_replies(rows)
@@ -0,0 +1,122 @@
+# 📌 startup.py - Cold start: warm the process up before it takes traffic & report it on /ready
+#
+# `warm_up()` opens the DB pool, loads the indicator registry and series store, and formats
+# every reply into the reply cache, so the first webhook pays for none of it. Steps that are
+# already done (e.g. by the gunicorn master before forking) are skipped.
+#
+# STARTUP_MODE=blocking (default) warms up before the server listens. STARTUP_MODE=background
+# listens at once: `/` answers immediately (liveness), `/ready` answers 503 until the warm-up
+# is done (readiness), and webhook workers hold queued events until then.
+#
+# A failed warm-up is retried every STARTUP_RETRY_INTERVAL seconds until it succeeds: a
+# readiness probe only stops routing traffic here, it never restarts the process. Webhooks
+# are held only while the first attempt runs; after a failure they fall back to live queries.
+import logging
+import os
+import threading
+import time
+
+import db_pool  # ✅ Shared connection pool
+import indicator_handler
+import indicator_registry
+import metrics
+import series_store
+
+# ✅ Startup settings (override with environment variables)
+STARTUP_MODE = os.environ.get("STARTUP_MODE", "blocking")  # blocking | background
+STARTUP_WARM_REPLIES = os.environ.get("STARTUP_WARM_REPLIES", "1") == "1"
+STARTUP_READY_TIMEOUT = float(os.environ.get("STARTUP_READY_TIMEOUT", "60"))  # Seconds a webhook waits for warm-up
+STARTUP_RETRY_INTERVAL = float(os.environ.get("STARTUP_RETRY_INTERVAL", "10"))  # Seconds between failed warm-ups
+
+_ready = threading.Event()
+_attempted = threading.Event()  # 🔹 Set once the first warm-up has finished, successfully or not
+_lock = threading.Lock()
+_started = time.monotonic()
+_status = {"state": "starting", "attempts": 0, "steps": {}, "error": None, "ready_seconds": None}
+
+
+def _step(name, function):
+	start = time.perf_counter()
+	result = function()
+	_status["steps"][name] = round(time.perf_counter() - start, 4)
+	return result
+
+
+# ✅ Prebuild every reply the series store can serve (reply cache + formatting code paths)
+def warm_replies():
+	warmed = 0
+	for key in sorted(indicator_registry.get_registry().reply_keys):
+		response, _ = indicator_handler.reply_from_memory(key)
+		warmed += response is not None
+	return warmed
+
+
+def warm_up():
+	with _lock:  # 🔹 One warm-up at a time; a second call only redoes what is not loaded yet
+		_status["state"] = "warming"
+		_status["attempts"] += 1
+		try:
+			_step("db_pool", db_pool.init_pool)
+			_step("registry", indicator_registry.get_registry)
+			if not series_store.series_store.loaded:
+				_step("series_store", series_store.series_store.load)
+			warmed = _step("replies", warm_replies) if STARTUP_WARM_REPLIES else 0
+		except Exception as e:
+			# 🔹 Stay not-ready until a retry succeeds; meanwhile webhooks fall back to live queries
+			_status["state"] = "failed"
+			_status["error"] = repr(e)
+			metrics.log_event("startup_failed", level=logging.ERROR, error=repr(e),
+							  attempts=_status["attempts"], steps=dict(_status["steps"]))
+			return False
+		finally:
+			_attempted.set()
+
+		_status["state"] = "ready"
+		_status["error"] = None
+		_status["ready_seconds"] = round(time.monotonic() - _started, 4)
+		_ready.set()
+	metrics.log_event("startup_ready", sample=False, mode=STARTUP_MODE, replies=warmed, **_status)
+	return True
+
+
+def _retry():
+	while True:
+		time.sleep(STARTUP_RETRY_INTERVAL)
+		if warm_up():
+			return
+
+
+# ✅ warm_up(), then keep retrying on a background thread until it succeeds; returns the first result
+def warm_up_or_retry():
+	if warm_up():
+		return True
+	threading.Thread(target=_retry, name="startup-retry", daemon=True).start()
+	return False
+
+
+# ✅ Warm up in line (blocking) or on a thread (background) per STARTUP_MODE
+def start():
+	if STARTUP_MODE == "background":
+		threading.Thread(target=warm_up_or_retry, name="startup-warm-up", daemon=True).start()
+	else:
+		warm_up_or_retry()
+
+
+def is_ready():
+	return _ready.is_set()
+
+
+# ✅ Waits only while the first warm-up is running; True once warm
+def wait_ready(timeout=STARTUP_READY_TIMEOUT):
+	_attempted.wait(timeout)
+	return _ready.is_set()
+
+
+# ✅ Body of /ready
+def status():
+	return {
+		"ready": is_ready(),
+		"mode": STARTUP_MODE,
+		"uptime_seconds": round(time.monotonic() - _started, 4),
+		**_status,
+	}
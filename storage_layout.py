@@ -0,0 +1,362 @@
+# 📌 storage_layout.py - Move indicator_data to a clustered, range-partitioned layout & roll old partitions into archive rows
+#
+# Usage: python storage_layout.py status
+#        python storage_layout.py migrate --partition-by date [--years-per-partition 5]
+#        python storage_layout.py migrate --partition-by indicator [--indicators-per-partition 8]
+#        python storage_layout.py rollup --before 2000-01-01      (date partitioning only)
+#        python storage_layout.py drop-old                        (once the new layout is verified)
+#
+# Legacy layout: surrogate `data_id` primary key + UNIQUE (indicator_id, record_date), so every
+# read walks the secondary index and then the clustered index. Partitioned layout: the primary
+# key *is* (indicator_id, record_date), so one series' rows are stored together in date order,
+# and RANGE partitions on record_date (or indicator_id) keep each B-tree small. MySQL does not
+# allow foreign keys on partitioned tables: indicator_data loses its FK to `indicators` (nothing
+# deletes indicators at runtime; delete their rows by hand if you ever do).
+#
+# `migrate` copies the table in primary-key batches into `indicator_data_new`, re-copies rows
+# written meanwhile (by `last_updated`), and swaps the tables with one atomic RENAME. The old
+# table is kept as `indicator_data_old`. Stop auto_update.py / scheduler.py while it runs.
+#
+# `rollup` packs every indicator's rows in date partitions that end on or before `--before`
+# into one compressed `indicator_data_archive` row per (indicator, partition), then empties
+# those partitions. The bot's series store merges archive rows back in at startup; live rows
+# (e.g. late revisions inside an archived range) always win over archived ones.
+#
+# What stays live after a rollup: everything from ROLLUP_MIN_AGE_YEARS ago on, and every row
+# of an indicator whose history ends inside a rolled partition. So the fixed-window readers
+# (snapshots.SNAPSHOT_METRICS_QUERY, the live JOLTS pivot) never need the archive; readers of
+# arbitrary ranges (indicator_handler.fetch_series, query_language.batch_query and
+# auto_update.write_observations) merge it in through `read_archive()`. Each partition is
+# rolled under db_pool.data_write_lock, so no write can land between its SELECT and TRUNCATE.
+import argparse
+import json
+import zlib
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import mysql.connector
+import db_pool  # ✅ Shared connection pool
+
+COPY_BATCH_SIZE = 50000  # Rows per INSERT ... SELECT batch in `migrate`
+INDICATOR_HEADROOM_PARTITIONS = 4  # Empty indicator_id ranges created ahead for new indicators
+ROLLUP_MIN_AGE_YEARS = 5  # `rollup --before` may not be later than Jan 1 this many years ago
+
+
+def log(message):
+	print(f"[{datetime.now()}] {message}")
+
+
+# ----------------------------------------------------------------------------
+# Archive rows: one series' points as zlib-compressed JSON (first date, day offsets, exact values)
+
+def pack_archive(rows):
+	"""`rows` are (record_date, value) pairs in date order."""
+	first = rows[0][0]
+	body = {
+		"start": first.isoformat(),
+		"offsets": [(record_date - first).days for record_date, _ in rows],
+		"values": [str(value) for _, value in rows],
+	}
+	return zlib.compress(json.dumps(body, separators=(",", ":")).encode("utf-8"), 9)
+
+
+def unpack_archive(payload):
+	body = json.loads(zlib.decompress(payload))
+	start = date.fromisoformat(body["start"])
+	return [(start + timedelta(days=offset), Decimal(value)) for offset, value in zip(body["offsets"], body["values"])]
+
+
+# ✅ Archived (record_date, value) pairs in [start, end] (None = open) per indicator id, in date order
+def read_archive(cursor, indicator_ids, start=None, end=None):
+	start, end = start or date(1000, 1, 1), end or date(9999, 12, 31)
+	cursor.execute(f"""
+		SELECT indicator_id, payload FROM indicator_data_archive
+		WHERE indicator_id IN ({', '.join(['%s'] * len(indicator_ids))})
+		AND last_date >= %s AND first_date <= %s
+		ORDER BY indicator_id, period_end
+	""", (*indicator_ids, start, end))
+	points = {}
+	for indicator_id, payload in cursor.fetchall():
+		points.setdefault(indicator_id, []).extend(
+			(record_date, value) for record_date, value in unpack_archive(payload) if start <= record_date <= end
+		)
+	return points
+
+
+# ----------------------------------------------------------------------------
+# Layout inspection
+
+PARTITIONS_QUERY = """
+	SELECT PARTITION_NAME, PARTITION_METHOD, PARTITION_EXPRESSION, PARTITION_DESCRIPTION, TABLE_ROWS
+	FROM information_schema.PARTITIONS
+	WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+	ORDER BY PARTITION_ORDINAL_POSITION
+"""
+
+
+def partitions(cursor, table="indicator_data"):
+	cursor.execute(PARTITIONS_QUERY, (table,))
+	return [row for row in cursor.fetchall() if row[0] is not None]
+
+
+def table_exists(cursor, table):
+	cursor.execute("SELECT COUNT(*) FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s", (table,))
+	return cursor.fetchone()[0] > 0
+
+
+# ✅ Bytes on disk (data, index) for a table; stats are refreshed first
+def table_size(cursor, table):
+	cursor.execute("SET SESSION information_schema_stats_expiry = 0")
+	cursor.execute(f"ANALYZE TABLE `{table}`")
+	cursor.fetchall()
+	cursor.execute("""
+		SELECT DATA_LENGTH, INDEX_LENGTH FROM information_schema.TABLES
+		WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+	""", (table,))
+	row = cursor.fetchone()
+	return (row[0], row[1]) if row else (0, 0)
+
+
+def _bound(description):
+	# 🔹 RANGE COLUMNS(record_date) descriptions look like "'2000-01-01'"; the last one is MAXVALUE
+	if description is None or description == "MAXVALUE":
+		return None
+	return date.fromisoformat(description.strip("'"))
+
+
+# ----------------------------------------------------------------------------
+# Migration
+
+def _partition_clause(cursor, partition_by, years_per_partition, indicators_per_partition):
+	if partition_by == "date":
+		cursor.execute("SELECT MIN(record_date) FROM indicator_data")
+		first = cursor.fetchone()[0] or date.today()
+		year = first.year // years_per_partition * years_per_partition + years_per_partition
+		last_year = date.today().year + years_per_partition  # 🔹 Room for the coming years' releases
+		parts = []
+		while year <= last_year:
+			parts.append(f"PARTITION p{year - years_per_partition} VALUES LESS THAN ('{year}-01-01')")
+			year += years_per_partition
+		parts.append("PARTITION p_future VALUES LESS THAN (MAXVALUE)")
+		return "PARTITION BY RANGE COLUMNS(record_date) (\n\t" + ",\n\t".join(parts) + "\n)"
+
+	cursor.execute("SELECT COALESCE(MAX(indicator_id), 0) FROM indicators")
+	top = cursor.fetchone()[0] + indicators_per_partition * INDICATOR_HEADROOM_PARTITIONS
+	parts = [
+		f"PARTITION p_ind{bound - indicators_per_partition} VALUES LESS THAN ({bound})"
+		for bound in range(indicators_per_partition, top + 1, indicators_per_partition)
+	]
+	parts.append("PARTITION p_ind_rest VALUES LESS THAN (MAXVALUE)")
+	return "PARTITION BY RANGE (indicator_id) (\n\t" + ",\n\t".join(parts) + "\n)"
+
+
+CREATE_PARTITIONED_TABLE = """
+	CREATE TABLE `indicator_data_new` (
+	  `indicator_id` int NOT NULL,
+	  `record_date` date NOT NULL,
+	  `value` decimal(18,6) NOT NULL,
+	  `last_updated` timestamp NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+	  PRIMARY KEY (`indicator_id`,`record_date`),
+	  KEY `idx_last_updated` (`last_updated`,`indicator_id`)
+	) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci
+	{partitioning}
+"""
+
+CATCH_UP_QUERY = """
+	INSERT INTO indicator_data_new (indicator_id, record_date, value, last_updated)
+	SELECT indicator_id, record_date, value, last_updated FROM indicator_data
+	WHERE last_updated >= %s
+	ON DUPLICATE KEY UPDATE value = VALUES(value), last_updated = VALUES(last_updated)
+"""
+
+
+def migrate(db, cursor, partition_by="date", years_per_partition=5, indicators_per_partition=8, batch_size=COPY_BATCH_SIZE):
+	if partitions(cursor):
+		log("✅ indicator_data is already partitioned.")
+		return False
+	if table_exists(cursor, "indicator_data_old"):
+		raise RuntimeError("indicator_data_old exists from an earlier migration; run `drop-old` first")
+
+	partitioning = _partition_clause(cursor, partition_by, years_per_partition, indicators_per_partition)
+	cursor.execute("DROP TABLE IF EXISTS indicator_data_new")
+	cursor.execute(CREATE_PARTITIONED_TABLE.format(partitioning=partitioning))
+	log(f"✅ Created indicator_data_new ({partition_by} partitions)")
+
+	cursor.execute("SELECT NOW() - INTERVAL 1 SECOND")
+	copy_started = cursor.fetchone()[0]
+
+	# ✅ Keyset batches in primary-key order: each batch is one range scan & one commit
+	copied = 0
+	last_key = (0, date(1000, 1, 1))  # 🔹 Before every key (MySQL's smallest DATE)
+	while True:
+		cursor.execute("""
+			SELECT indicator_id, record_date FROM indicator_data
+			WHERE (indicator_id, record_date) > (%s, %s)
+			ORDER BY indicator_id, record_date
+			LIMIT 1 OFFSET %s
+		""", (*last_key, batch_size - 1))
+		end_key = cursor.fetchone()
+		end_clause = "AND (indicator_id, record_date) <= (%s, %s)" if end_key else ""
+		cursor.execute(f"""
+			INSERT INTO indicator_data_new (indicator_id, record_date, value, last_updated)
+			SELECT indicator_id, record_date, value, last_updated FROM indicator_data
+			WHERE (indicator_id, record_date) > (%s, %s) {end_clause}
+		""", (*last_key, *(end_key or ())))
+		copied += cursor.rowcount
+		db.commit()
+		if end_key is None:
+			break
+		last_key = tuple(end_key)
+		log(f"  copied {copied} rows (through indicator {last_key[0]}, {last_key[1]})")
+
+	# 🔹 Rows written during the copy, then swap atomically (a final catch-up right before the rename)
+	cursor.execute(CATCH_UP_QUERY, (copy_started,))
+	db.commit()
+	cursor.execute("SELECT NOW() - INTERVAL 1 SECOND")
+	swap_started = cursor.fetchone()[0]
+	cursor.execute(CATCH_UP_QUERY, (swap_started,))
+	db.commit()
+	cursor.execute("RENAME TABLE indicator_data TO indicator_data_old, indicator_data_new TO indicator_data")
+
+	cursor.execute("SELECT (SELECT COUNT(*) FROM indicator_data), (SELECT COUNT(*) FROM indicator_data_old)")
+	new_count, old_count = cursor.fetchone()
+	log(f"✅ Swapped tables: indicator_data has {new_count} rows, indicator_data_old {old_count}")
+	if new_count != old_count:
+		log("⚠️ Row counts differ: check for writes during the swap before dropping indicator_data_old")
+	return True
+
+
+# ----------------------------------------------------------------------------
+# Archive rollups
+
+UPSERT_ARCHIVE_QUERY = """
+	INSERT INTO indicator_data_archive (indicator_id, period_end, first_date, last_date, points, payload)
+	VALUES (%s, %s, %s, %s, %s, %s)
+	ON DUPLICATE KEY UPDATE
+		first_date = VALUES(first_date), last_date = VALUES(last_date),
+		points = VALUES(points), payload = VALUES(payload), archived_at = CURRENT_TIMESTAMP
+"""
+
+
+def rollup(db, cursor, before):
+	layout = partitions(cursor)
+	if not layout or layout[0][1] != "RANGE COLUMNS":
+		raise RuntimeError("rollup needs date partitions (`migrate --partition-by date`)")
+	latest_allowed = date(date.today().year - ROLLUP_MIN_AGE_YEARS, 1, 1)
+	if before > latest_allowed:
+		raise RuntimeError(f"--before must be on or before {latest_allowed} (the last {ROLLUP_MIN_AGE_YEARS} years stay live)")
+
+	rolled = []
+	for name, _, _, description, _ in layout:
+		period_end = _bound(description)
+		if period_end is None or period_end > before:
+			break
+		with db_pool.data_write_lock(db, cursor):  # 🔹 Writers wait until the partition is rolled
+			rolled += _rollup_partition(db, cursor, name, period_end)
+	return rolled
+
+
+def _rollup_partition(db, cursor, name, period_end):
+	cursor.execute(f"""
+		SELECT indicator_id, record_date, value, last_updated FROM indicator_data PARTITION (`{name}`)
+		ORDER BY indicator_id, record_date
+	""")
+	partition_rows = cursor.fetchall()
+	by_indicator = {}
+	for indicator_id, record_date, value, _ in partition_rows:
+		by_indicator.setdefault(indicator_id, []).append((record_date, value))
+	if not by_indicator:
+		return []
+
+	# 🔹 Indicators whose history ends in this partition keep their rows live too (latest value,
+	#    snapshots); they are archived all the same, so a failure after the TRUNCATE loses nothing
+	cursor.execute(f"""
+		SELECT DISTINCT indicator_id FROM indicator_data
+		WHERE record_date >= %s AND indicator_id IN ({', '.join(['%s'] * len(by_indicator))})
+	""", (period_end, *by_indicator))
+	continuing = {row[0] for row in cursor.fetchall()}
+	kept = [row for row in partition_rows if row[0] not in continuing]
+
+	# 🔹 Re-rolling a partition (late revisions landed in it) merges into the existing archive row
+	cursor.execute("SELECT indicator_id, payload FROM indicator_data_archive WHERE period_end = %s", (period_end,))
+	for indicator_id, payload in cursor.fetchall():
+		if indicator_id in by_indicator:
+			points = dict(unpack_archive(payload))
+			points.update(by_indicator[indicator_id])
+			by_indicator[indicator_id] = sorted(points.items())
+
+	cursor.executemany(UPSERT_ARCHIVE_QUERY, [
+		(indicator_id, period_end, rows[0][0], rows[-1][0], len(rows), pack_archive(rows))
+		for indicator_id, rows in by_indicator.items()
+	])
+	db.commit()  # ✅ Archive rows are durable before the partition is emptied
+	cursor.execute(f"ALTER TABLE indicator_data TRUNCATE PARTITION `{name}`")
+	if kept:
+		cursor.executemany("""
+			INSERT INTO indicator_data (indicator_id, record_date, value, last_updated) VALUES (%s, %s, %s, %s)
+		""", kept)
+		db.commit()
+
+	points = sum(len(rows) for rows in by_indicator.values())
+	log(f"✅ {name}: {points} rows from {len(by_indicator)} indicators → archive (period ending {period_end}); "
+		f"{len(kept)} rows of ended series kept live")
+	return [(name, len(by_indicator), points)]
+
+
+# ----------------------------------------------------------------------------
+# Commands
+
+def status(cursor):
+	layout = partitions(cursor)
+	data_bytes, index_bytes = table_size(cursor, "indicator_data")
+	if layout:
+		log(f"indicator_data: partitioned by {layout[0][1]} ({layout[0][2]}), {len(layout)} partitions")
+		for name, _, _, description, rows in layout:
+			log(f"  {name:<14} < {description:<14} ~{rows} rows")
+	else:
+		log("indicator_data: legacy layout (data_id primary key, not partitioned)")
+	log(f"  data {data_bytes / 1e6:.1f} MB, indexes {index_bytes / 1e6:.1f} MB")
+
+	if table_exists(cursor, "indicator_data_archive"):
+		cursor.execute("SELECT COUNT(*), COALESCE(SUM(points), 0), COALESCE(SUM(LENGTH(payload)), 0) FROM indicator_data_archive")
+		archive_rows, points, payload_bytes = cursor.fetchone()
+		log(f"indicator_data_archive: {archive_rows} rows holding {points} points ({payload_bytes / 1e6:.2f} MB payload)")
+	if table_exists(cursor, "indicator_data_old"):
+		log("indicator_data_old: kept from the last migration (`drop-old` removes it)")
+
+
+def main():
+	parser = argparse.ArgumentParser(description="indicator_data storage layout tool")
+	subcommands = parser.add_subparsers(dest="command", required=True)
+	subcommands.add_parser("status", help="Show the current layout, partitions & sizes")
+	migrate_parser = subcommands.add_parser("migrate", help="Copy indicator_data into the clustered, partitioned layout")
+	migrate_parser.add_argument("--partition-by", choices=["date", "indicator"], default="date")
+	migrate_parser.add_argument("--years-per-partition", type=int, default=5)
+	migrate_parser.add_argument("--indicators-per-partition", type=int, default=8)
+	migrate_parser.add_argument("--batch-size", type=int, default=COPY_BATCH_SIZE)
+	rollup_parser = subcommands.add_parser("rollup", help="Archive date partitions that end on or before --before")
+	rollup_parser.add_argument("--before", required=True, type=date.fromisoformat, help="YYYY-MM-DD")
+	subcommands.add_parser("drop-old", help="Drop indicator_data_old left by migrate")
+	args = parser.parse_args()
+
+	with db_pool.connection() as db:
+		cursor = db.cursor()
+		try:
+			if args.command == "status":
+				status(cursor)
+			elif args.command == "migrate":
+				migrate(db, cursor, args.partition_by, args.years_per_partition, args.indicators_per_partition, args.batch_size)
+			elif args.command == "rollup":
+				rollup(db, cursor, args.before)
+			else:
+				cursor.execute("DROP TABLE IF EXISTS indicator_data_old")
+				log("✅ Dropped indicator_data_old")
+		except (mysql.connector.Error, RuntimeError) as err:
+			db.rollback()
+			log(f"❌ {args.command} failed: {err}")
+		finally:
+			cursor.close()
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,7 @@
+# 📌 conftest.py - Run the tests from the repository root modules (no package install needed)
+import os
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_DIR not in sys.path:
+	sys.path.insert(0, REPO_DIR)
@@ -0,0 +1,41 @@
+# 📌 test_query_language.py - Which messages parse() turns into queries
+import query_language
+
+
+class Registry:
+	def __init__(self, *keys):
+		self.reply_keys = set(keys)
+
+	def is_reply_key(self, abbreviation):
+		return abbreviation in self.reply_keys
+
+
+REGISTRY = Registry("CPI", "PCE", "UR", "10YY", "FFR")
+
+
+def test_every_token_a_key_is_multi():
+	query = query_language.parse("CPI PCE", REGISTRY)
+	assert query.kind == query_language.MULTI
+	assert query.keys == ("CPI", "PCE")
+	assert query.unknown == ()
+
+
+def test_two_known_keys_report_the_unknown_ones():
+	query = query_language.parse("CPI PCE XYZ", REGISTRY)
+	assert query.kind == query_language.MULTI
+	assert query.keys == ("CPI", "PCE")
+	assert query.unknown == ("XYZ",)
+
+
+def test_free_text_with_one_key_is_not_a_query():
+	assert query_language.parse("WHAT IS CPI", REGISTRY) is None
+	assert query_language.parse("CPI PLEASE", REGISTRY) is None
+
+
+def test_free_text_without_keys_is_not_a_query():
+	assert query_language.parse("HELLO THERE", REGISTRY) is None
+
+
+def test_range_and_compare_still_parse():
+	assert query_language.parse("UR 2020-01..2021-12", REGISTRY).kind == query_language.RANGE
+	assert query_language.parse("10YY VS FFR", REGISTRY).kind == query_language.COMPARE
@@ -0,0 +1,81 @@
+# 📌 test_write_observations.py - auto_update.write_observations keeps last_updated in step with revisions
+#
+# The database test needs a scratch MySQL database: TEST_DATABASE=macro_test python -m pytest tests
+# (credentials from credentials.DB_CONFIG; schema.sql is loaded into it, dropping existing tables).
+import os
+import time
+from datetime import date
+
+import pytest
+
+import auto_update
+
+TEST_DATABASE = os.environ.get("TEST_DATABASE")
+
+
+class RecordingCursor:
+	def __init__(self):
+		self.statements = []
+
+	def execute(self, sql, params=None):
+		self.statements.append(sql)
+
+	def fetchone(self):
+		return (1,)  # GET_LOCK / RELEASE_LOCK
+
+	def fetchall(self):
+		return []  # Nothing stored yet, nothing archived
+
+
+class NullConnection:
+	def commit(self):
+		pass
+
+	def rollback(self):
+		pass
+
+
+def test_last_updated_is_assigned_before_value():
+	# 🔹 MySQL assigns left to right: after `value = VALUES(value)` the IF would compare equal values
+	cursor = RecordingCursor()
+	auto_update.write_observations(NullConnection(), cursor, 1, [(date(2024, 1, 1), 1.5)])
+	upsert = next(sql for sql in cursor.statements if "INSERT INTO indicator_data" in sql)
+	assert upsert.index("last_updated = IF(value <> VALUES(value)") < upsert.index("value = VALUES(value)")
+
+
+@pytest.mark.skipif(not TEST_DATABASE, reason="TEST_DATABASE is not set")
+def test_revision_moves_last_updated():
+	import mysql.connector
+	from benchmarks.bench_common import load_schema
+	from credentials import DB_CONFIG
+
+	db = mysql.connector.connect(**dict(DB_CONFIG, database=TEST_DATABASE))
+	cursor = db.cursor(buffered=True)
+	try:
+		load_schema(cursor)
+		cursor.execute("""
+			INSERT INTO indicators (indicator_id, indicator_name, abbreviation, source, category, frequency, unit)
+			VALUES (1, 'Test Indicator', 'TEST', 'FRED', 'Leading', 'M', 'Index')
+		""")
+		db.commit()
+
+		auto_update.write_observations(db, cursor, 1, [(date(2024, 1, 1), 1.5)])
+		cursor.execute("UPDATE indicator_data SET last_updated = '2000-01-01 00:00:00' WHERE indicator_id = 1")
+		db.commit()
+
+		time.sleep(1)
+		assert auto_update.write_observations(db, cursor, 1, [(date(2024, 1, 1), 1.75)]) == (0, 1, 0)
+		cursor.execute("SELECT value, last_updated FROM indicator_data WHERE indicator_id = 1")
+		value, last_updated = cursor.fetchone()
+		assert float(value) == 1.75
+		assert last_updated.year > 2000
+
+		# 🔹 An unchanged value is not rewritten, so last_updated stays put
+		cursor.execute("UPDATE indicator_data SET last_updated = '2000-01-01 00:00:00' WHERE indicator_id = 1")
+		db.commit()
+		assert auto_update.write_observations(db, cursor, 1, [(date(2024, 1, 1), 1.75)]) == (0, 0, 1)
+		cursor.execute("SELECT last_updated FROM indicator_data WHERE indicator_id = 1")
+		assert cursor.fetchone()[0].year == 2000
+	finally:
+		cursor.close()
+		db.close()
@@ -0,0 +1,102 @@
+# 📌 value_formatter.py - Shared value formatting for replies & notifications (raw DECIMAL in, text out)
+import calendar
+from datetime import date, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+
+HISTORY_POINTS = 15  # Data points shown in a reply
+NOT_AVAILABLE = "N/A"
+
+_ONE = Decimal("1")
+_TENTH = Decimal("0.1")
+_HUNDREDTH = Decimal("0.01")
+_THOUSAND = Decimal("1000")
+
+
+def _round(value, places):
+	# ✅ Half-up rounding, the same as MySQL's ROUND()/FORMAT() on DECIMAL columns
+	return value.quantize(places, rounding=ROUND_HALF_UP)
+
+
+# ✅ One rule per format type (stored in `indicators.format_type`)
+FORMAT_RULES = {
+	"yoy_growth": lambda v: f"{_round(v, _HUNDREDTH)}%",             # v is already a YoY percent
+	"percentage": lambda v: f"{_round(v, _HUNDREDTH)}%",
+	"monetary": lambda v: f"${_round(v, _HUNDREDTH)}",
+	"large_numbers": lambda v: f"{_round(v, _ONE):,}",
+	"hours": lambda v: f"{_round(v, _TENTH)} hrs",
+	"decimal_2": lambda v: f"{_round(v, _HUNDREDTH)}",
+	"thousands_2": lambda v: f"{_round(v, _HUNDREDTH):,}",           # e.g. SP500 → 5,123.45
+	"rate": lambda v: f"{_round(v, _HUNDREDTH):,}%",                 # e.g. 10YY → 4.25%
+	"no_decimals": lambda v: f"{_round(v * _THOUSAND, _ONE):,}",
+	"billions": lambda v: f"${_round(v / _THOUSAND, _HUNDREDTH)} B",
+}
+DEFAULT_FORMAT = "decimal_2"
+
+# 🔹 Raw levels of YoY indicators (e.g. the CPI index itself) are not percentages
+LEVEL_FORMATS = {"yoy_growth": "decimal_2"}
+
+
+def _to_decimal(value):
+	if value is None or isinstance(value, Decimal):
+		return value
+	return Decimal(str(value))
+
+
+# ✅ Format a list of values with one rule lookup (None → "N/A")
+def format_values(format_type, values):
+	rule = FORMAT_RULES.get(format_type, FORMAT_RULES[DEFAULT_FORMAT])
+	return [rule(v) if v is not None else NOT_AVAILABLE for v in map(_to_decimal, values)]
+
+
+def format_value(format_type, value):
+	return format_values(format_type, [value])[0]
+
+
+# ✅ Format a raw stored level (used by notifications, which never show YoY)
+def format_level(format_type, value):
+	return format_value(LEVEL_FORMATS.get(format_type, format_type), value)
+
+
+# ✅ "date: value" lines for a list of (record_date, value) rows
+def format_points(format_type, rows):
+	formatted = format_values(format_type, [value for _, value in rows])
+	return [f"{record_date}: {text}" for (record_date, _), text in zip(rows, formatted)]
+
+
+# ----------------------------------------------------------------------------
+# Derived series (inputs are rows ordered newest first, as returned by the raw query)
+
+def subtract_months(day, months):
+	# ✅ Same clamping as MySQL's DATE_SUB(day, INTERVAL n MONTH): Mar 31 → Feb 28/29
+	month_index = day.year * 12 + day.month - 1 - months
+	year, month = divmod(month_index, 12)
+	month += 1
+	return date(year, month, min(day.day, calendar.monthrange(year, month)[1]))
+
+
+def yoy_growth(rows, limit=HISTORY_POINTS):
+	# ✅ ((value - value 12 months earlier) / value 12 months earlier) * 100
+	by_date = {record_date: value for record_date, value in rows}
+	growth = []
+	for record_date, value in rows:
+		past = by_date.get(subtract_months(record_date, 12))
+		if past:
+			growth.append((record_date, (value - past) / past * 100))
+			if len(growth) == limit:
+				break
+	return growth
+
+
+def high_low_52w(rows, today=None):
+	# ✅ MAX/MIN over record_date >= CURDATE() - 52 weeks; (None, None) without recent data
+	start = (today or date.today()) - timedelta(weeks=52)
+	window = [value for record_date, value in rows if record_date >= start]
+	if not window:
+		return None, None
+	return max(window), min(window)
+
+
+def percent_below(high, value):
+	if not high or value is None:
+		return None
+	return _round((high - value) / high * 100, _HUNDREDTH)
@@ -0,0 +1,132 @@
+# 📌 watchlist.py - Per-user indicator watchlists & the indicator → subscribers reverse index
+import threading
+from collections import defaultdict
+
+# ✅ Commands handled by the bot (e.g. "WATCH CPI FFR", "UNWATCH CPI", "WATCHLIST")
+WATCH_COMMAND = "WATCH"
+UNWATCH_COMMAND = "UNWATCH"
+LIST_COMMAND = "WATCHLIST"
+
+ONE_ON_ONE_ONLY = "Watchlists are only available in one-on-one chats."
+UPDATE_FAILED = "⚠️ Error: Unable to update your watchlist. Please try again later."
+
+# ✅ Statements shared by the sync (mysql.connector) and async (aiomysql) servers
+ENSURE_SUBSCRIBER_QUERY = "INSERT IGNORE INTO subscribers (user_id) VALUES (%s)"
+FOLLOW_QUERY = """
+	INSERT INTO subscribers (user_id, active) VALUES (%s, %s)
+	ON DUPLICATE KEY UPDATE active = VALUES(active)
+"""
+UPSERT_SUBSCRIPTION_QUERY = """
+	INSERT INTO subscriptions (user_id, reply_key, active) VALUES (%s, %s, %s)
+	ON DUPLICATE KEY UPDATE active = VALUES(active)
+"""
+LIST_QUERY = """
+	SELECT reply_key FROM subscriptions WHERE user_id = %s AND active = 1 ORDER BY reply_key
+"""
+
+
+class WatchlistIndex:
+	"""
+	In-memory reverse index: reply key (e.g. "CPI", "JOLTS") → set of user IDs.
+
+	`refresh()` only reads subscription rows changed since the previous refresh,
+	so keeping a long-lived index current costs one small range scan.
+	"""
+
+	def __init__(self):
+		self._by_key = defaultdict(set)
+		self._user_keys = defaultdict(set)
+		self._last_seen = None  # Highest subscriptions.updated_at applied so far
+		self._lock = threading.Lock()
+
+	def apply(self, user_id, reply_key, active):
+		with self._lock:
+			if active:
+				self._by_key[reply_key].add(user_id)
+				self._user_keys[user_id].add(reply_key)
+			else:
+				self._by_key[reply_key].discard(user_id)
+				self._user_keys[user_id].discard(reply_key)
+				if not self._user_keys[user_id]:
+					del self._user_keys[user_id]
+
+	def refresh(self, cursor):
+		# 🔹 `>=` re-reads rows sharing the last timestamp; applying them again is harmless
+		if self._last_seen is None:
+			cursor.execute("SELECT user_id, reply_key, active, updated_at FROM subscriptions")
+		else:
+			cursor.execute("""
+				SELECT user_id, reply_key, active, updated_at FROM subscriptions
+				WHERE updated_at >= %s
+			""", (self._last_seen,))
+
+		rows = cursor.fetchall()
+		for user_id, reply_key, active, updated_at in rows:
+			self.apply(user_id, reply_key, bool(active))
+			if self._last_seen is None or updated_at > self._last_seen:
+				self._last_seen = updated_at
+		return len(rows)
+
+	def subscribers_of(self, reply_key):
+		with self._lock:
+			return frozenset(self._by_key.get(reply_key, ()))
+
+	def is_watching(self, user_id):
+		with self._lock:
+			return user_id in self._user_keys
+
+	# ✅ user_id → the changed keys that user watches (users watching none are omitted)
+	def recipients_for(self, changed_keys):
+		recipients = defaultdict(set)
+		with self._lock:
+			for key in changed_keys:
+				for user_id in self._by_key.get(key, ()):
+					recipients[user_id].add(key)
+		return recipients
+
+
+# ----------------------------------------------------------------------------
+# Subscription writes (called from the bot's handle_message)
+
+def set_watch(db, cursor, user_id, reply_keys, active):
+	# 🔹 Watching implies receiving pushes, even for users who followed before `subscribers` existed
+	cursor.execute(ENSURE_SUBSCRIBER_QUERY, (user_id,))
+	cursor.executemany(UPSERT_SUBSCRIPTION_QUERY, subscription_rows(user_id, reply_keys, active))
+	db.commit()
+
+
+def subscription_rows(user_id, reply_keys, active):
+	return [(user_id, key, 1 if active else 0) for key in reply_keys]
+
+
+def get_watchlist(cursor, user_id):
+	cursor.execute(LIST_QUERY, (user_id,))
+	return [row[0] for row in cursor.fetchall()]
+
+
+# ✅ Split requested keys into known & unknown; the third value is a usage hint when nothing is usable
+def check_keys(registry, command, keys):
+	unknown = [key for key in keys if not registry.is_reply_key(key)]
+	keys = [key for key in keys if registry.is_reply_key(key)]
+	if command != LIST_COMMAND and not keys:
+		return keys, unknown, f"Send '{command} <abbreviation>' (e.g., '{command} CPI FFR')."
+	return keys, unknown, None
+
+
+def format_reply(current, unknown):
+	reply_text = f"👀 Your watchlist: {', '.join(current)}" if current else "👀 Your watchlist is empty (you receive every update)."
+	if unknown:
+		reply_text += f"\n❓ Not recognized: {', '.join(unknown)}"
+	return reply_text
+
+
+# ✅ Parse a watchlist command; returns (command, keys) or None if the text is not one
+def parse_command(text):
+	words = text.split()
+	if not words or words[0] not in (WATCH_COMMAND, UNWATCH_COMMAND, LIST_COMMAND):
+		return None
+	return words[0], [word.strip(",") for word in words[1:] if word.strip(",")]
+
+
+# ✅ Process-wide index (notifier & scheduler keep it warm with `refresh()`)
+watchlist_index = WatchlistIndex()
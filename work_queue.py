@@ -0,0 +1,122 @@
+# 📌 work_queue.py - Bounded in-process queue drained by a pool of worker threads
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+import metrics
+
+# ✅ Queue settings (override with environment variables)
+WEBHOOK_WORKERS = int(os.environ.get("WEBHOOK_WORKERS", "8"))
+WEBHOOK_QUEUE_SIZE = int(os.environ.get("WEBHOOK_QUEUE_SIZE", "200"))
+WEBHOOK_ENQUEUE_TIMEOUT = float(os.environ.get("WEBHOOK_ENQUEUE_TIMEOUT", "0.5"))  # Seconds before rejecting
+
+LATENCY_WINDOW = 1000  # Recent samples kept for percentiles
+
+
+def _percentile(samples, pct):
+	if not samples:
+		return None
+	ordered = sorted(samples)
+	index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+	return ordered[index]
+
+
+class WorkQueue:
+	"""
+	Runs `process(item)` on background threads.
+
+	`submit()` never blocks longer than `enqueue_timeout`; when the queue stays
+	full it returns False so the caller can shed load (backpressure).
+	"""
+
+	def __init__(self, process, workers=WEBHOOK_WORKERS, maxsize=WEBHOOK_QUEUE_SIZE,
+				 enqueue_timeout=WEBHOOK_ENQUEUE_TIMEOUT, name="worker"):
+		self.process = process
+		self.workers = workers
+		self.enqueue_timeout = enqueue_timeout
+		self.name = name
+		self._queue = queue.Queue(maxsize=maxsize)
+		self._threads = []
+		self._lock = threading.Lock()
+		self._wait_times = deque(maxlen=LATENCY_WINDOW)
+		self._run_times = deque(maxlen=LATENCY_WINDOW)
+		self._counters = {"submitted": 0, "rejected": 0, "processed": 0, "failed": 0, "max_depth": 0}
+
+	def start(self):
+		with self._lock:
+			if self._threads:
+				return self
+			for n in range(self.workers):
+				thread = threading.Thread(target=self._run, name=f"{self.name}-{n}", daemon=True)
+				thread.start()
+				self._threads.append(thread)
+		return self
+
+	def submit(self, item):
+		self.start()
+		try:
+			self._queue.put((time.monotonic(), item), timeout=self.enqueue_timeout)
+		except queue.Full:
+			with self._lock:
+				self._counters["rejected"] += 1
+			return False
+
+		with self._lock:
+			self._counters["submitted"] += 1
+			self._counters["max_depth"] = max(self._counters["max_depth"], self._queue.qsize())
+		return True
+
+	def _run(self):
+		while True:
+			enqueued_at, item = self._queue.get()
+			started = time.monotonic()
+			failed = False
+			try:
+				self.process(item)
+			except Exception as e:
+				failed = True
+				metrics.log_event("work_item_failed", level=logging.ERROR, queue=self.name, error=repr(e))
+			finally:
+				finished = time.monotonic()
+				with self._lock:
+					self._counters["failed" if failed else "processed"] += 1
+					self._wait_times.append(started - enqueued_at)
+					self._run_times.append(finished - started)
+				self._queue.task_done()
+
+	def join(self):
+		self._queue.join()
+
+	# ✅ Like join(), but gives up after `timeout` seconds (returns False if items are still pending)
+	def drain(self, timeout):
+		deadline = time.monotonic() + timeout
+		with self._queue.all_tasks_done:
+			while self._queue.unfinished_tasks:
+				remaining = deadline - time.monotonic()
+				if remaining <= 0:
+					return False
+				self._queue.all_tasks_done.wait(remaining)
+		return True
+
+	def stats(self):
+		with self._lock:
+			wait_times = list(self._wait_times)
+			run_times = list(self._run_times)
+			stats = dict(self._counters)
+		stats.update({
+			"workers": self.workers,
+			"depth": self._queue.qsize(),
+			"capacity": self._queue.maxsize,
+			"queue_wait_p50_ms": _ms(_percentile(wait_times, 50)),
+			"queue_wait_p95_ms": _ms(_percentile(wait_times, 95)),
+			"process_p50_ms": _ms(_percentile(run_times, 50)),
+			"process_p95_ms": _ms(_percentile(run_times, 95)),
+		})
+		return stats
+
+
+def _ms(seconds):
+	return round(seconds * 1000, 2) if seconds is not None else None